@@ -4,13 +4,26 @@ from waitress import serve
 import os
 import csv
 from io import StringIO, BytesIO
-from flask import send_file
+from flask import send_file, Response, stream_with_context
 from functools import wraps
+from db_config import init_db_pool, get_pool_stats
+from dashboard_rollup import load_rollup, mark_rollup_stale, refresh_unit_counters, rebuild_rollup, check_rollup
+from response_cache import cached_widget, bump_versions, get_cache_stats
+from blueprints.weight_ms import recompute_weight_fitness, run_weight_assessment_check
+from blueprints.chat import rebuild_unread_counts
+from extension import socketio
+from sql_cache import get_sql_cache_stats
+from llm_scheduler import get_llm_scheduler_stats
+from parade_state import ParadeStateGrid, PARADE_DB_COLUMNS, PARADE_CSV_HEADERS, daily_series, upsert_parade_states
+from export_stream import stream_rows, export_chunks
+from carry_forward import latest_on_or_before, invalidate_carry_forward
 
 app = Flask(__name__)
 
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 31536000
 app.secret_key = os.urandom(24)
+init_db_pool(app)
+socketio.init_app(app)
 
 
 
@@ -656,8 +669,11 @@ def assign_personnel():
                     WHERE army_number = %s
                 """, (pid,))
 
+        mark_rollup_stale(user_company)
+
         # ✅ Commit Only If Everything Successful
         conn.commit()
+        bump_versions('personnel', 'assigned_det')
         return jsonify({"message": f"{action_type.upper()} Assigned Successfully"}), 200
 
     except Exception as e:
@@ -823,6 +839,8 @@ def add_board():
 
     conn.commit()
     cur.close()
+    refresh_unit_counters('boards_count')
+    bump_versions('boards')
 
     return jsonify({"status": "success"})
 
@@ -834,6 +852,8 @@ def delete_board(board_id):
     cur.execute("DELETE FROM boards WHERE id=%s", (board_id,))
     conn.commit()
     cur.close()
+    refresh_unit_counters('boards_count')
+    bump_versions('boards')
     return jsonify({"status": "success"})
 
 
@@ -1044,6 +1064,8 @@ def mark_sensitive():
             VALUES (%s, %s, %s)
         """, (army_number, reason.strip(), datetime.now()))
         conn.commit()
+        mark_rollup_stale(army_number=army_number)
+        bump_versions('sensitive_marking')
 
         return jsonify({"success": True, "message": "Personnel marked as sensitive successfully."})
 
@@ -1101,6 +1123,8 @@ def remove_sensitive():
             return jsonify({"success": False, "error": "Personnel not found in sensitive list"}), 404
         
         conn.commit()
+        mark_rollup_stale(army_number=army_number)
+        bump_versions('sensitive_marking')
         return jsonify({"success": True, "message": "Personnel removed from sensitive list."})
 
     except Exception as e:
@@ -1762,175 +1786,63 @@ OFFICER_RANKS = (
 
 @app.route('/api/dashboard_summary', methods=['GET'])
 def dashboard_summary():
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
     user = require_login()
     if not user:
         return jsonify({"status": "error", "message": "Unauthorized"}), 401
-        
+
     current_user = user['army_number']
     company = user['company']
     role = user['role']
     print("Logged-in user's company:", company)
-    
-    try:
-        # 1️⃣ Detachments Count
-        cursor.execute(
-            "SELECT COUNT(*) AS count FROM personnel WHERE detachment_status = 1" + 
-            (f" AND company = %s" if company != "Admin" else ""),
-            (company,) if company != "Admin" else ()
-        )
-        detachment_result = cursor.fetchone()
-        detachments = detachment_result['count'] if detachment_result else 0
-
-        
-
-        # 2️⃣ Manpower Count (Rank-wise - Aggregated for latest available date)
-        # Get the latest reporting date across all companies (if Admin) or for specific company
-        date_query = "SELECT MAX(report_date) as max_date FROM parade_state_daily"
-        date_params = []
-        if company != "Admin":
-            date_query += " WHERE company = %s"
-            date_params.append(company)
-        
-        cursor.execute(date_query, date_params)
-        
-        max_date_result = cursor.fetchone()
-        print("max_date_result")
-        print(max_date_result)
-        latest_date = max_date_result['max_date'] if max_date_result else None
+    if not company:
+        return jsonify({'success': False, 'error': 'No company assigned'}), 400
 
-        if latest_date:
-            query = """
-                SELECT 
-                    SUM(IFNULL(offr_present_unit, 0)) AS officerCount,
-                    SUM(IFNULL(jco_present_unit, 0) + IFNULL(jcoEre_present_unit, 0)) AS jcoCount,
-                    SUM(IFNULL(or_present_unit, 0) + IFNULL(orEre_present_unit, 0)) AS orCount,
-                    SUM(
-                        IFNULL(offr_present_unit, 0) + 
-                        IFNULL(jco_present_unit, 0) + 
-                        IFNULL(jcoEre_present_unit, 0) + 
-                        IFNULL(or_present_unit, 0) + 
-                        IFNULL(orEre_present_unit, 0)
-                    ) AS total
-                FROM parade_state_daily
-                WHERE report_date = %s
-            """
-            params = [latest_date]
-            if company != "Admin":
-                query += " AND company = %s"
-                params.append(company)
-            
-            cursor.execute(query, params)
-            manpower_result = cursor.fetchone()
-        else:
-            manpower_result = None
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
-        if manpower_result and manpower_result['total'] is not None:
-            manpower = {
-                "total": int(manpower_result["total"]),
-                "jcoCount": int(manpower_result["jcoCount"]),
-                "officerCount": int(manpower_result["officerCount"]),
-                "orCount": int(manpower_result["orCount"])
-            }
-        else:
-            manpower = {"total": 0, "jcoCount": 0, "officerCount": 0, "orCount": 0}
+    try:
+        # Company counters come from the materialized rollup ('Admin' = whole unit)
+        rollups = load_rollup(cursor, [company, 'Admin'])
+        rollup = rollups[company]
+        unit_rollup = rollups['Admin']
+
+        manpower = {
+            "total": rollup['manpower_total'],
+            "jcoCount": rollup['jco_count'],
+            "officerCount": rollup['officer_count'],
+            "orCount": rollup['or_count']
+        }
 
-        print(manpower_result,"this is the main power result")
-        # Check if we have valid data from parade_state_daily
-        has_parade_data = manpower_result and (
-            (manpower_result["officerCount"] or 0) > 0 or 
-            (manpower_result["jcoCount"] or 0) > 0 or 
-            (manpower_result["orCount"] or 0) > 0
-        )
+        # Interview Pending - JCOs only see their own home state, so this stays live
+        if role in ['JCO', 'S/JCO']:
+            cursor.execute('SELECT home_state FROM personnel WHERE army_number = %s', (current_user,))
+            home_result = cursor.fetchone()
+            home_state = home_result['home_state'] if home_result else None
 
-        if has_parade_data:
-            manpower = {
-                "total": int(manpower_result["total"] or 0),
-                "jcoCount": int(manpower_result["jcoCount"] or 0),
-                "officerCount": int(manpower_result["officerCount"] or 0),
-                "orCount": int(manpower_result["orCount"] or 0)
-            }
-        else:
-            # FALLBACK: Calculate from personnel table directly
-            print(f"Fallback to personnel table for company: {company}")
-            fallback_query = """
-                SELECT 
-                    SUM(CASE WHEN `rank` IN ('Lieutenant', 'Captain', 'Major', 'Lieutenant Colonel', 'Colonel', 'Brigadier', 'Major General', 'Lieutenant General', 'General', 'OC') THEN 1 ELSE 0 END) as officerCount,
-                    SUM(CASE WHEN `rank` IN ('Subedar', 'Naib Subedar', 'Subedar Major', 'JCO') THEN 1 ELSE 0 END) as jcoCount,
-                    SUM(CASE WHEN `rank` NOT IN ('Lieutenant', 'Captain', 'Major', 'Lieutenant Colonel', 'Colonel', 'Brigadier', 'Major General', 'Lieutenant General', 'General', 'OC', 'Subedar', 'Naib Subedar', 'Subedar Major', 'JCO') THEN 1 ELSE 0 END) as orCount
+            cursor.execute("""
+                SELECT
+                    COALESCE(SUM(interview_status = 0), 0) AS pending_count,
+                    COUNT(*) AS total_count
                 FROM personnel
-                WHERE 1=1
-            """
-            fallback_params = []
-            if company != "Admin":
-                fallback_query += " AND company = %s"
-                fallback_params.append(company)
-            
-            cursor.execute(fallback_query, fallback_params)
-            fb_res = cursor.fetchone()
-            if fb_res:
-                manpower = {
-                    "officerCount": int(fb_res["officerCount"] or 0),
-                    "jcoCount": int(fb_res["jcoCount"] or 0),
-                    "orCount": int(fb_res["orCount"] or 0),
-                    "total": int((fb_res["officerCount"] or 0) + (fb_res["jcoCount"] or 0) + (fb_res["orCount"] or 0))
-                }
-            else:
-                manpower = {"total": 0, "jcoCount": 0, "officerCount": 0, "orCount": 0}
-
-        # 3️⃣ Interview Pending
-        if role in ['JCO', 'S/JCO']:
-             cursor.execute('SELECT home_state FROM personnel WHERE army_number = %s', (current_user,))
-             home_result = cursor.fetchone()
-             home_state = home_result['home_state'] if home_result else None
-
-             query = """
-           SELECT 
-    COALESCE(SUM(interview_status = 0), 0) AS pending_count,
-    COUNT(*) AS total_count
-FROM personnel
-WHERE company = %s
-  AND home_state = %s
-  AND `rank` NOT IN (
-      'Subedar', 'Naib Subedar', 'Subedar Major',
-      'Lieutenant', 'Captain', 'Major',
-      'Lieutenant Colonel', 'Colonel',
-      'Brigadier', 'Major General',
-      'Lieutenant General', 'General'
-  );
-        """
-             cursor.execute(query, (company, home_state))
+                WHERE company = %s
+                  AND home_state = %s
+                  AND `rank` NOT IN (
+                      'Subedar', 'Naib Subedar', 'Subedar Major',
+                      'Lieutenant', 'Captain', 'Major',
+                      'Lieutenant Colonel', 'Colonel',
+                      'Brigadier', 'Major General',
+                      'Lieutenant General', 'General'
+                  )
+            """, (company, home_state))
+            interview_result = cursor.fetchone()
+            pending_count = interview_result['pending_count'] if interview_result else 0
+            total_interview_count = interview_result['total_count'] if interview_result else 0
         else:
-            query = """
-            SELECT 
-                COALESCE(SUM(interview_status = 0), 0) AS pending_count,
-                COUNT(*) AS total_count
-            FROM personnel
-            WHERE `rank` IN ('AGNIVEER', 'Signal Man', 'L NK', 'NK', 'HAV','LOC NK','L HAV','CHM','RHM')
-        """
-            params = []
-            if company != "Admin":
-                query += " AND company = %s"
-                params.append(company)
-            cursor.execute(query, params)
-
-        interview_result = cursor.fetchone()
-        pending_count = interview_result['pending_count'] if interview_result else 0
-        total_interview_count = interview_result['total_count'] if interview_result else 0
+            pending_count = rollup['interview_pending']
+            total_interview_count = rollup['interview_total']
         interview_percentage = round((pending_count / total_interview_count) * 100, 2) if total_interview_count > 0 else 0
 
-        # 4️⃣ Projects Count
-        project_query = "SELECT COUNT(*) AS count FROM projects WHERE 1=1"
-        project_params = []
-        if company != "Admin":
-            project_query += " AND company = %s"
-            project_params.append(company)
-        cursor.execute(project_query, project_params)
-        projects_result = cursor.fetchone()
-        projects = projects_result['count'] if projects_result else 0
-
-        # 5️⃣ Assigned Alarm (Assignments older than 5 days)
+        # Assigned Alarm (Assignments older than 5 days)
         cursor.execute(
             '''
             SELECT 
@@ -1956,65 +1868,7 @@ WHERE company = %s
         )
         assigned_alarm_rows = cursor.fetchall()
 
-        # 6️⃣ Sensitive Personnel Count
-        cursor.execute(
-            '''
-            SELECT COUNT(*) AS count
-            FROM sensitive_marking sm
-            LEFT JOIN personnel p ON sm.army_number = p.army_number
-            ''' + (f" WHERE p.company = %s" if company != "Admin" else ""),
-            (company,) if company != "Admin" else ()
-        )
-        sensitive_result = cursor.fetchone()
-        sensitive_count = sensitive_result['count'] if sensitive_result else 0
-        
-        # 7️⃣ Boards Count
-        cursor.execute("SELECT COUNT(*) AS count FROM boards")
-        boards_result = cursor.fetchone()
-        boards_count = boards_result['count'] if boards_result else 0
-
-        # 🔹 TD Attachments Count (td_status = 1)
-        cursor.execute(
-            "SELECT COUNT(*) AS count FROM personnel WHERE td_status = 1" +
-            (f" AND company = %s" if company != "Admin" else ""),
-            (company,) if company != "Admin" else ()
-        )
-        td_result = cursor.fetchone()
-        td_attachments = td_result['count'] if td_result else 0
-        
-        # 🔹 Courses Count
-        course_query = """
-            SELECT COUNT(*) AS count 
-            FROM candidate_on_courses c
-            LEFT JOIN personnel p ON c.army_number = p.army_number
-            WHERE 1=1
-        """
-        course_params = []
-        if company != "Admin":
-            course_query += " AND p.company = %s"
-            course_params.append(company)
-        cursor.execute(course_query, course_params)
-        courses_result = cursor.fetchone()
-        courses_count = courses_result['count'] if courses_result else 0
-
-        # 🔹 Loans Count
-        cursor.execute(
-            '''
-            SELECT COUNT(*) AS count
-            FROM loans l
-            LEFT JOIN personnel p ON l.army_number = p.army_number
-            ''' + (f" WHERE p.company = %s" if company != "Admin" else ""),
-            (company,) if company != "Admin" else ()
-        )
-        loan_result = cursor.fetchone()
-        loan_count = loan_result['count'] if loan_result else 0
-        
-        # 8️⃣ Roll Call Pending Points
-        cursor.execute("SELECT count(id) as count FROM roll_call_points WHERE status = 'PENDING'")
-        roll_call_result = cursor.fetchone()
-        roll_call_pending_count = roll_call_result['count'] if roll_call_result else 0
-
-        # 🔹 Tasks Count (Assigned to current user)
+        # Tasks Count (Assigned to current user)
         cursor.execute(
             """
             SELECT 
@@ -2030,49 +1884,17 @@ WHERE company = %s
         pending_tasks = task_result['pending_tasks'] if task_result else 0
         pending_percentage = round((pending_tasks / total_tasks) * 100, 2) if total_tasks > 0 else 0
 
-        # 🔹 Duty Count (Domain Specialization)
-        duty_query = """
-            SELECT COUNT(DISTINCT p.army_number) AS count
-            FROM personnel p
-            LEFT JOIN (
-                SELECT army_number, duty_performed
-                FROM units_served
-                WHERE (army_number, sr_no) IN (
-                    SELECT army_number, MAX(sr_no)
-                    FROM units_served
-                    GROUP BY army_number
-                )
-            ) u ON p.army_number = u.army_number
-            WHERE ((u.duty_performed IS NOT NULL AND u.duty_performed != '')
-               OR (p.section IS NOT NULL AND p.section != ''))
-        """
-        duty_params = []
-        if company != "Admin":
-            duty_query += " AND p.company = %s"
-            duty_params.append(company)
-        
-        cursor.execute(duty_query, duty_params)
-        duty_result = cursor.fetchone()
-        duty_count = duty_result['count'] if duty_result else 0
-
-        # AGNIVEER
-        agniveer_query = "SELECT COUNT(id) as agniveer_count from personnel where `rank` = 'Agniveer'"
-        agniveer_params = []
-        # Roles that should see total unit count
+        # AGNIVEER - privileged roles see the whole unit
         privileged_roles = ['Admin', 'CO', '2IC', 'ADJUTANT', 'TRGJCO', 'OC']
-        if company != "Admin" and role not in privileged_roles:
-            agniveer_query += " AND company = %s"
-            agniveer_params.append(company)
-        cursor.execute(agniveer_query, agniveer_params)
-        agniveer_result = cursor.fetchone()
-        count_of_agniveer = agniveer_result['agniveer_count'] if agniveer_result else 0
-        print('$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$$')
-        print(manpower,'this is result of man power')
+        if role in privileged_roles:
+            count_of_agniveer = unit_rollup['agniveer_count']
+        else:
+            count_of_agniveer = rollup['agniveer_count']
 
         # Return combined JSON
         return jsonify({
             "status": "success",
-            "detachments": detachments,
+            "detachments": rollup['detachments'],
             "tasks": {
                 "total": total_tasks,
                 "pending": pending_tasks,
@@ -2084,16 +1906,16 @@ WHERE company = %s
                 "total_count": total_interview_count,
                 "percentage": interview_percentage
             },
-            "projects": projects,
-            "boards_count": boards_count, 
+            "projects": rollup['projects'],
+            "boards_count": rollup['boards_count'],
             "assigned_alarm": assigned_alarm_rows,
-            "sensitive_count": sensitive_count,
-            "attachment_count": td_attachments,
-            "courses_count": courses_count,
-            "loan_count": loan_count,
-            "roll_call_pending_points": roll_call_pending_count,
+            "sensitive_count": rollup['sensitive_count'],
+            "attachment_count": rollup['attachment_count'],
+            "courses_count": rollup['courses_count'],
+            "loan_count": rollup['loan_count'],
+            "roll_call_pending_points": rollup['roll_call_pending_points'],
             "agniveer_count": count_of_agniveer,
-            "duty_count": duty_count
+            "duty_count": rollup['duty_count']
         }), 200
 
     except Exception as e:
@@ -2148,15 +1970,6 @@ def get_current_user():
     except:
         return None
 
-def get_column_name(index):
-    """Helper to map index to column names"""
-    columns = [
-        'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-        'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-        'present_det', 'present_unit', 'dues_in', 'dues_out'
-    ]
-    return columns[index] if index < len(columns) else f'col_{index}'
-
 @app.route('/api/parade-state/get/<date_str>', methods=['GET'])
 def get_parade_state(date_str):
     """Get parade state with calculated columns"""
@@ -2189,38 +2002,25 @@ def get_parade_state(date_str):
                 'is_future': True
             }), 400
         
-        # Get data for specific date and company
-        cursor.execute("""
-            SELECT * FROM parade_state_daily 
-            WHERE report_date = %s AND company = %s
-        """, (date_str, company))
-        
-        row = cursor.fetchone()
+        # Latest report on or before the requested date
+        row = latest_on_or_before(cursor, 'parade_state_daily', requested_date, company)
         
-        # If no data found for today, try to get previous day's data
-        if not row and requested_date == today_date:
-            print(f"No data found for today ({date_str}), trying previous day...")
-            
-            # Get previous day's date
-            previous_date = today_date - timedelta(days=1)
-            cursor.execute("""
-                SELECT * FROM parade_state_daily 
-                WHERE report_date = %s AND company = %s
-            """, (previous_date.strftime('%Y-%m-%d'), company))
-            
-            row = cursor.fetchone()
-            
-            if row:
-                print(f"Using previous day's data ({previous_date}) as template")
+        # If today has no data yet, carry the last report forward as a template
+        if row and row['report_date'] != requested_date:
+            if requested_date == today_date:
+                print(f"Using data from {row['report_date']} as template for {date_str}")
                 row['is_previous_day_template'] = True
                 row['original_date'] = row['report_date']
                 row['report_date'] = date_str
             else:
-                print(f"No data found for date: {date_str} or previous day, company: {company}")
-                return jsonify({
-                    'success': False,
-                    'message': 'No data found for this date or previous day'
-                }), 404
+                row = None
+        
+        if not row:
+            print(f"No data found for date: {date_str}, company: {company}")
+            return jsonify({
+                'success': False,
+                'message': 'No data found for this date or previous day'
+            }), 404
         
         # Convert database row back to frontend format
         result = {
@@ -2234,21 +2034,7 @@ def get_parade_state(date_str):
             result['is_previous_day_template'] = True
             result['original_date'] = row['original_date']
         
-        # All categories in the exact order they appear in frontend
-        all_categories = [
-            'offr', 'jco', 'jcoEre', 'or', 'orEre',
-            'firstTotal',
-            'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr',
-            'secondTotal',
-            'grandTotal'
-        ]
-        
-        for category in all_categories:
-            category_data = []
-            for i in range(17):
-                column_name = f"{category}_{get_column_name(i)}"
-                category_data.append(row.get(column_name, 0))
-            result['data'][category] = category_data
+        result['data'] = ParadeStateGrid.from_row(row).to_dict()
         
         result['calculations'] = {
             't_out_formula': 'LVE + COURSE + DET + MH + SICK/LVE + EX + TD + ATT + AWL/OSL/JC',
@@ -2270,6 +2056,81 @@ def get_parade_state(date_str):
         cursor.close()
         conn.close()
 
+PARADE_RANGE_MAX_DAYS = 366
+PARADE_ALL_COMPANY_ROLES = ('CO', 'O CENTRE NCO')
+
+@app.route('/api/parade-state/range', methods=['GET'])
+def get_parade_state_range():
+    """
+    Parade state trend between two dates (inclusive): per-day GRAND TOTAL
+    present unit, leave and T/OUT plus min/max/mean over the range.
+    CO and O CENTRE NCO may ask for any company or 'All' (every company
+    summed per day); everyone else gets their own company.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+    
+    user_role = (user.get('role') or '').strip()
+    user_company = (user.get('company') or '').strip()
+    company = request.args.get('company') or user_company
+    
+    if user_role not in PARADE_ALL_COMPANY_ROLES and company != user_company:
+        return jsonify({'success': False, 'error': f'Access denied - you can only view data for {user_company}'}), 403
+    if not company:
+        return jsonify({'success': False, 'error': 'No company assigned'}), 400
+    
+    try:
+        from_date = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        to_date = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'from and to must be dates (YYYY-MM-DD)'}), 400
+    
+    if from_date > to_date:
+        return jsonify({'success': False, 'error': 'from must not be after to'}), 400
+    if (to_date - from_date).days >= PARADE_RANGE_MAX_DAYS:
+        return jsonify({'success': False, 'error': f'Range is limited to {PARADE_RANGE_MAX_DAYS} days'}), 400
+    
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    
+    try:
+        # Range scan on unique_company_date (idx_date for 'All')
+        query = f"""
+            SELECT report_date, {', '.join(PARADE_DB_COLUMNS)}
+            FROM parade_state_daily
+            WHERE report_date BETWEEN %s AND %s
+        """
+        params = [from_date, to_date]
+        if company != 'All':
+            query += " AND company = %s"
+            params.append(company)
+        cursor.execute(query + " ORDER BY report_date", params)
+        rows = cursor.fetchall()
+        
+        days, series, stats = daily_series(rows)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'company': company,
+                'from': from_date.isoformat(),
+                'to': to_date.isoformat(),
+                'dates': [day.isoformat() for day in days],
+                'series': series,
+                'stats': stats
+            }
+        })
+    
+    except Exception as e:
+        print(f"Error fetching parade state range: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        cursor.close()
+        conn.close()
+
 @app.route('/test-auth')
 def test_auth():
     user = get_current_user()
@@ -2300,69 +2161,65 @@ def get_co_all_dashboard_data(date_str):
     
     try:
         cursor.execute("""
-            SELECT 
-                SUM(grandTotal_posted_str) as total_posted_str,
-                SUM(grandTotal_present_unit) as present_unit,
-                SUM(grandTotal_trout_det) as total_out,
-                SUM(grandTotal_lve) as total_lve,  -- Add this line
-                COUNT(DISTINCT company) as company_count
-            FROM parade_state_daily
-            WHERE report_date = %s
-        """, (date_str,))
-        parade_summary = cursor.fetchone()
-        
-        cursor.execute("""
-            SELECT 
-                company,
-                grandTotal_lve as on_leave,  -- Changed from grandTotal_trout_det to grandTotal_lve
-                grandTotal_posted_str as total_strength,
-                ROUND((grandTotal_lve / NULLIF(grandTotal_posted_str, 0) * 100), 2) as leave_percentage  -- Changed here too
-            FROM parade_state_daily
-            WHERE report_date = %s
-            ORDER BY company
-        """, (date_str,))
-        leave_data = cursor.fetchall()
-        
-        cursor.execute("""
-            SELECT 
-                company,
-                (IFNULL(offr_present_unit, 0) + IFNULL(attOffr_present_unit, 0)) as officers,
-                (IFNULL(jco_present_unit, 0) + IFNULL(jcoEre_present_unit, 0) + IFNULL(attJco_present_unit, 0)) as jcos,
-                (IFNULL(or_present_unit, 0) + IFNULL(orEre_present_unit, 0) + IFNULL(oaOr_present_unit, 0) + IFNULL(attOr_present_unit, 0)) as other_ranks
-            FROM parade_state_daily
+            SELECT * FROM parade_state_daily
             WHERE report_date = %s
             ORDER BY company
         """, (date_str,))
-        manpower_data = cursor.fetchall()
+        rows = cursor.fetchall()
         
-        if not parade_summary or parade_summary['company_count'] == 0:
+        if not rows:
             return jsonify({
                 'success': False,
                 'message': 'No data found for this date'
             }), 404
         
-        # Update totals to use leave (lve) instead of total out (trout_det)
-        total_on_leave = sum(row['on_leave'] or 0 for row in leave_data)
-        total_strength = sum(row['total_strength'] or 0 for row in leave_data)
-        total_leave_percentage = round((total_on_leave / total_strength * 100), 2) if total_strength > 0 else 0
+        stacked = ParadeStateGrid.stack(rows)
+        grids = [(row['company'], ParadeStateGrid(values)) for row, values in zip(rows, stacked)]
+        summary = ParadeStateGrid(stacked.sum(axis=0))
+        
+        # Leave status uses leave (lve), not total out (trout_det)
+        leave_data = []
+        for company, grid in grids:
+            on_leave = grid.cell('grandTotal', 'lve')
+            strength = grid.cell('grandTotal', 'posted_str')
+            leave_data.append({
+                'company': company,
+                'on_leave': on_leave,
+                'total_strength': strength,
+                'leave_percentage': round(on_leave / strength * 100, 2) if strength else None
+            })
         
-        for row in manpower_data:
-            row['total'] = (row['officers'] or 0) + (row['jcos'] or 0) + (row['other_ranks'] or 0)
+        manpower_data = []
+        for company, grid in grids:
+            officers = grid.total(['offr', 'attOffr'], 'present_unit')
+            jcos = grid.total(['jco', 'jcoEre', 'attJco'], 'present_unit')
+            other_ranks = grid.total(['or', 'orEre', 'oaOr', 'attOr'], 'present_unit')
+            manpower_data.append({
+                'company': company,
+                'officers': officers,
+                'jcos': jcos,
+                'other_ranks': other_ranks,
+                'total': officers + jcos + other_ranks
+            })
         
-        total_officers = sum(row['officers'] or 0 for row in manpower_data)
-        total_jcos = sum(row['jcos'] or 0 for row in manpower_data)
-        total_other_ranks = sum(row['other_ranks'] or 0 for row in manpower_data)
+        total_on_leave = summary.cell('grandTotal', 'lve')
+        total_strength = summary.cell('grandTotal', 'posted_str')
+        total_leave_percentage = round((total_on_leave / total_strength * 100), 2) if total_strength > 0 else 0
+        
+        total_officers = summary.total(['offr', 'attOffr'], 'present_unit')
+        total_jcos = summary.total(['jco', 'jcoEre', 'attJco'], 'present_unit')
+        total_other_ranks = summary.total(['or', 'orEre', 'oaOr', 'attOr'], 'present_unit')
         total_manpower = total_officers + total_jcos + total_other_ranks
         
         return jsonify({
             'success': True,
             'data': {
                 'parade_summary': {
-                    'total_posted_str': parade_summary['total_posted_str'] or 0,
-                    'present_unit': parade_summary['present_unit'] or 0,
-                    'total_out': parade_summary['total_out'] or 0,
-                    'total_lve': parade_summary['total_lve'] or 0,  # Add this
-                    'company_count': parade_summary['company_count'] or 0,
+                    'total_posted_str': total_strength,
+                    'present_unit': summary.cell('grandTotal', 'present_unit'),
+                    'total_out': summary.cell('grandTotal', 'trout_det'),
+                    'total_lve': total_on_leave,
+                    'company_count': len(rows),
                     'report_date': date_str
                 },
                 'leave_status': {
@@ -2427,27 +2284,7 @@ def get_co_aggregated_parade_table(date_str):
             'company': 'ALL COMPANIES (CO VIEW)',
             'data': {}
         }
-        all_categories = [
-            'offr', 'jco', 'jcoEre', 'or', 'orEre',
-            'firstTotal',
-            'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr',
-            'secondTotal',
-            'grandTotal'
-        ]
-        column_names = [
-            'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-            'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-            'present_det', 'present_unit', 'dues_in', 'dues_out'
-        ]
-        for category in all_categories:
-            aggregated['data'][category] = [0] * 17
-        
-        for company_row in companies_data:
-            for category in all_categories:
-                for i, col_name in enumerate(column_names):
-                    db_column = f"{category}_{col_name}"
-                    if db_column in company_row:
-                        aggregated['data'][category][i] += (company_row[db_column] or 0)
+        aggregated['data'] = ParadeStateGrid.sum_rows(companies_data).to_dict()
         
         return jsonify({
             'success': True,
@@ -2564,26 +2401,7 @@ def get_parade_data_by_company(date_str, company):
             'data': {}
         }
         
-        categories = [
-            'offr', 'jco', 'jcoEre', 'or', 'orEre',
-            'firstTotal',
-            'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr',
-            'secondTotal',
-            'grandTotal'
-        ]
-        
-        column_names = [
-            'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-            'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-            'present_det', 'present_unit', 'dues_in', 'dues_out'
-        ]
-        
-        for category in categories:
-            category_data = []
-            for col in column_names:
-                column_name = f"{category}_{col}"
-                category_data.append(row.get(column_name, 0))
-            result['data'][category] = category_data
+        result['data'] = ParadeStateGrid.from_row(row).to_dict()
         
         print(f"DEBUG: Returning data for {company} on {date_str}")
         return jsonify({
@@ -2690,29 +2508,7 @@ def get_all_companies_parade_data(date_str):
             'data': {}
         }
         
-        categories = [
-            'offr', 'jco', 'jcoEre', 'or', 'orEre',
-            'firstTotal',
-            'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr',
-            'secondTotal',
-            'grandTotal'
-        ]
-        
-        column_names = [
-            'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-            'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-            'present_det', 'present_unit', 'dues_in', 'dues_out'
-        ]
-        
-        for category in categories:
-            aggregated['data'][category] = [0] * 17
-        
-        for company_row in companies_data:
-            for category in categories:
-                for i, col in enumerate(column_names):
-                    db_column = f"{category}_{col}"
-                    if db_column in company_row:
-                        aggregated['data'][category][i] += (company_row[db_column] or 0)
+        aggregated['data'] = ParadeStateGrid.sum_rows(companies_data).to_dict()
         
         return jsonify({
             'success': True,
@@ -2784,6 +2580,52 @@ def debug_user_info():
             'error': 'No user found'
         }), 401
 
+@app.route('/debug/db-pool')
+def debug_db_pool():
+    """Connection pool usage, for sizing the pool"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    return jsonify({'success': True, 'pool': get_pool_stats()})
+
+@app.route('/debug/dashboard-cache')
+def debug_dashboard_cache():
+    """Dashboard widget cache hit/miss counters per endpoint"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    return jsonify({'success': True, 'cache': get_cache_stats()})
+
+@app.route('/debug/bot-sql-cache')
+def debug_bot_sql_cache():
+    """Ollama bot question -> SQL cache: hit rate and LLM seconds saved"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    return jsonify({'success': True, 'cache': get_sql_cache_stats()})
+
+@app.route('/debug/llm-scheduler')
+def debug_llm_scheduler():
+    """LLM scheduler queue depth, wait times, rejections and coalesced calls"""
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated'}), 401
+
+    return jsonify({'success': True, 'schedulers': get_llm_scheduler_stats()})
+
+def parade_save_date_error(user_role, report_date_str):
+    """Why report_date_str cannot be saved by this role, or None. ONCO may only save today."""
+    requested_date = datetime.strptime(report_date_str, '%Y-%m-%d').date()
+    today_date = date.today()
+    if user_role == 'ONCO' and requested_date != today_date:
+        return 'ONCO can only save data for today'
+    if requested_date > today_date:
+        return 'Cannot save data for future dates'
+    return None
+
 @app.route('/api/parade-data/save', methods=['POST'])
 def save_parade_data():
     """Save parade data - O CENTRE NCO can save for any company, ONCO only for own"""
@@ -2850,25 +2692,9 @@ def save_parade_data():
             if selected_company != user_company:
                 print(f"WARNING: ONCO frontend sent company '{selected_company}' but saving to '{final_company}'")
         
-        # Validate date restriction for ONCO
-        if user_role == 'ONCO':
-            requested_date = datetime.strptime(report_date_str, '%Y-%m-%d').date()
-            today_date = date.today()
-            
-            if requested_date != today_date:
-                return jsonify({
-                    'success': False,
-                    'error': 'ONCO can only save data for today'
-                }), 400
-        
-        # Validate date is not in future for any user
-        requested_date = datetime.strptime(report_date_str, '%Y-%m-%d').date()
-        today_date = date.today()
-        if requested_date > today_date:
-            return jsonify({
-                'success': False,
-                'error': 'Cannot save data for future dates'
-            }), 400
+        date_error = parade_save_date_error(user_role, report_date_str)
+        if date_error:
+            return jsonify({'success': False, 'error': date_error}), 400
         
         print(f"DEBUG: Saving data for date: {report_date_str}, company: {final_company}, user role: {user_role}")
         
@@ -2880,187 +2706,15 @@ def save_parade_data():
         cursor = conn.cursor()
         
         try:
-            # All input categories from your frontend (editable categories)
-            input_categories = [
-                'offr', 'jco', 'jcoEre', 'or', 'orEre',  # First section
-                'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr'  # Second section
-            ]
-            
-            # Build SQL columns and values - Use final_company (determined above)
-            columns = ['report_date', 'company']
-            values = [report_date_str, final_company]
-            
-            # Helper function to get column name from index
-            def get_column_name_for_db(index):
-                columns_list = [
-                    'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-                    'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-                    'present_det', 'present_unit', 'dues_in', 'dues_out'
-                ]
-                return columns_list[index] if index < len(columns_list) else f'col_{index}'
-            
-            # Process each input category with calculations
-            for category in input_categories:
-                category_data = parade_data.get(category, [0]*17)
-                
-                # Ensure we have at least 13 values (minimum needed for calculations)
-                if len(category_data) < 13:
-                    # Pad with zeros if needed
-                    category_data = category_data + [0] * (13 - len(category_data))
-                
-                # Extract values for calculations
-                posted_str = category_data[2] if len(category_data) > 2 else 0
-                lve = category_data[3] if len(category_data) > 3 else 0
-                course = category_data[4] if len(category_data) > 4 else 0
-                det_value = category_data[5] if len(category_data) > 5 else 0
-                mh = category_data[6] if len(category_data) > 6 else 0
-                sick_lve = category_data[7] if len(category_data) > 7 else 0
-                ex = category_data[8] if len(category_data) > 8 else 0
-                td = category_data[9] if len(category_data) > 9 else 0
-                att = category_data[10] if len(category_data) > 10 else 0
-                awl_osl_jc = category_data[11] if len(category_data) > 11 else 0
-                
-                # Calculate T/OUT = LVE + COURSE + DET + MH + SICK/LVE + EX + TD + ATT + AWL/OSL/JC
-                trout = lve + course + det_value + mh + sick_lve + ex + td + att + awl_osl_jc
-                trout = max(0, trout)  # Ensure non-negative
-                
-                # PRESENT/STR DET = DET column value
-                present_det = det_value
-                
-                # PRESENT/STR UNIT = POSTED/STR - T/OUT
-                present_unit = posted_str - trout
-                present_unit = max(0, present_unit)  # Ensure non-negative
-                
-                # Create final array with calculated values
-                final_data = [
-                    category_data[0] if len(category_data) > 0 else 0,  # AUTH
-                    category_data[1] if len(category_data) > 1 else 0,  # H/S
-                    posted_str,  # POSTED/STR
-                    lve,         # LVE
-                    course,      # COURSE
-                    det_value,   # DET
-                    mh,          # MH
-                    sick_lve,    # SICK/LVE
-                    ex,          # EX
-                    td,          # TD
-                    att,         # ATT
-                    awl_osl_jc,  # AWL/OSL/JC
-                    trout,       # T/OUT (calculated)
-                    present_det, # PRESENT/STR DET (from DET column)
-                    present_unit, # PRESENT/STR UNIT (calculated)
-                    category_data[15] if len(category_data) > 15 else 0,  # DUES IN
-                    category_data[16] if len(category_data) > 16 else 0   # DUES OUT
-                ]
-                
-                # Add each of the 17 columns for this category
-                for i in range(17):
-                    column_name = f"{category}_{get_column_name_for_db(i)}"
-                    columns.append(column_name)
-                    values.append(final_data[i])
-            
-            # Calculate FIRST TOTAL (sum of offr, jco, jcoEre, or, orEre)
-            first_total_values = [0] * 17
-            for cat in ['offr', 'jco', 'jcoEre', 'or', 'orEre']:
-                cat_data = parade_data.get(cat, [0]*17)
-                if len(cat_data) >= 13:
-                    posted_str = cat_data[2] if len(cat_data) > 2 else 0
-                    lve = cat_data[3] if len(cat_data) > 3 else 0
-                    course = cat_data[4] if len(cat_data) > 4 else 0
-                    det_value = cat_data[5] if len(cat_data) > 5 else 0
-                    mh = cat_data[6] if len(cat_data) > 6 else 0
-                    sick_lve = cat_data[7] if len(cat_data) > 7 else 0
-                    ex = cat_data[8] if len(cat_data) > 8 else 0
-                    td = cat_data[9] if len(cat_data) > 9 else 0
-                    att = cat_data[10] if len(cat_data) > 10 else 0
-                    awl_osl_jc = cat_data[11] if len(cat_data) > 11 else 0
-                    
-                    trout = lve + course + det_value + mh + sick_lve + ex + td + att + awl_osl_jc
-                    trout = max(0, trout)                                               
-                    
-                    present_unit = posted_str - trout
-                    present_unit = max(0, present_unit)
-                    
-                    # Sum all columns
-                    for i in range(17):
-                        if i == 12:  # T/OUT
-                            first_total_values[i] += trout
-                        elif i == 14:  # PRESENT/STR UNIT
-                            first_total_values[i] += present_unit
-                        elif i < len(cat_data):
-                            first_total_values[i] += cat_data[i]
-                        else:
-                            first_total_values[i] += 0
-            
-            # Store first total in database
-            for i in range(17):
-                column_name = f"firstTotal_{get_column_name_for_db(i)}"
-                columns.append(column_name)
-                values.append(first_total_values[i])
-            
-            # Calculate SECOND TOTAL (sum of oaOr, attSummary, attOffr, attJco, attOr)
-            second_total_values = [0] * 17
-            for cat in ['oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr']:
-                cat_data = parade_data.get(cat, [0]*17)
-                if len(cat_data) >= 13:
-                    posted_str = cat_data[2] if len(cat_data) > 2 else 0
-                    lve = cat_data[3] if len(cat_data) > 3 else 0
-                    course = cat_data[4] if len(cat_data) > 4 else 0
-                    det_value = cat_data[5] if len(cat_data) > 5 else 0
-                    mh = cat_data[6] if len(cat_data) > 6 else 0
-                    sick_lve = cat_data[7] if len(cat_data) > 7 else 0
-                    ex = cat_data[8] if len(cat_data) > 8 else 0
-                    td = cat_data[9] if len(cat_data) > 9 else 0
-                    att = cat_data[10] if len(cat_data) > 10 else 0
-                    awl_osl_jc = cat_data[11] if len(cat_data) > 11 else 0
-                    
-                    trout = lve + course + det_value + mh + sick_lve + ex + td + att + awl_osl_jc
-                    trout = max(0, trout)
-                    
-                    present_unit = posted_str - trout
-                    present_unit = max(0, present_unit)
-                    
-                    # Sum all columns
-                    for i in range(17):
-                        if i == 12:  # T/OUT
-                            second_total_values[i] += trout
-                        elif i == 14:  # PRESENT/STR UNIT
-                            second_total_values[i] += present_unit
-                        elif i < len(cat_data):
-                            second_total_values[i] += cat_data[i]
-                        else:
-                            second_total_values[i] += 0
-            
-            # Store second total in database
-            for i in range(17):
-                column_name = f"secondTotal_{get_column_name_for_db(i)}"
-                columns.append(column_name)
-                values.append(second_total_values[i])
-            
-            # Calculate GRAND TOTAL (firstTotal + secondTotal)
-            grand_total_values = [0] * 17
-            for i in range(17):
-                grand_total_values[i] = first_total_values[i] + second_total_values[i]
-            
-            # Store grand total in database
-            for i in range(17):
-                column_name = f"grandTotal_{get_column_name_for_db(i)}"
-                columns.append(column_name)
-                values.append(grand_total_values[i])
-            
-            # Build SQL query
-            placeholders = ['%s'] * len(values)
-            
-            sql = f"""
-                INSERT INTO parade_state_daily ({', '.join(columns)})
-                VALUES ({', '.join(placeholders)})
-                ON DUPLICATE KEY UPDATE
-                {', '.join([f"{col} = VALUES({col})" for col in columns if col not in ['report_date', 'company']])},
-                updated_at = NOW()
-            """
+            # Derived cells and total rows are recomputed from the input rows
+            grid = ParadeStateGrid.from_input(parade_data)
             
             print(f"Executing SQL for company: {final_company}")
-            cursor.execute(sql, values)
+            upsert_parade_states(cursor, report_date_str, {final_company: grid})
             conn.commit()
+            mark_rollup_stale(final_company)
+            bump_versions('parade_state_daily')
+            invalidate_carry_forward('parade_state_daily', final_company)
             
             return jsonify({
                 'success': True,
@@ -3071,10 +2725,10 @@ def save_parade_data():
                     'entered_by': user.get('username'),
                     'user_role': user_role,
                     'grand_total': {
-                        'auth': grand_total_values[0],
-                        'posted_str': grand_total_values[2],
-                        't_out': grand_total_values[12],
-                        'present_unit': grand_total_values[14]
+                        'auth': grid.cell('grandTotal', 'auth'),
+                        'posted_str': grid.cell('grandTotal', 'posted_str'),
+                        't_out': grid.cell('grandTotal', 'trout_det'),
+                        'present_unit': grid.cell('grandTotal', 'present_unit')
                     }
                 }
             }), 200
@@ -3103,6 +2757,79 @@ def save_parade_data():
         }), 500
 
 
+PARADE_BATCH_MAX_COMPANIES = 20
+
+@app.route('/api/parade-data/save-batch', methods=['POST'])
+@require_role('O CENTRE NCO')
+def save_parade_data_batch():
+    """
+    Save several companies' parade state for one date in one transaction.
+    Body: {"date": "YYYY-MM-DD", "companies": {"<company>": {<category>: [...]}, ...}}.
+    Either every company is saved or none is.
+    """
+    user = get_current_user()
+    data = request.get_json(silent=True) or {}
+    report_date_str = data.get('date')
+    companies = data.get('companies')
+    
+    if not report_date_str or not isinstance(companies, dict) or not companies:
+        return jsonify({'success': False, 'error': 'Missing required fields: date or companies'}), 400
+    if len(companies) > PARADE_BATCH_MAX_COMPANIES:
+        return jsonify({'success': False, 'error': f'At most {PARADE_BATCH_MAX_COMPANIES} companies per batch'}), 400
+    if 'All' in companies or not all(companies.values()):
+        return jsonify({'success': False, 'error': 'Every entry needs a specific company and its data'}), 400
+    
+    try:
+        date_error = parade_save_date_error('O CENTRE NCO', report_date_str)
+        grids = {company: ParadeStateGrid.from_input(parade_data) for company, parade_data in companies.items()}
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid data: {str(e)}'}), 400
+    if date_error:
+        return jsonify({'success': False, 'error': date_error}), 400
+    
+    conn = get_db_connection()
+    if not conn:
+        return jsonify({'success': False, 'error': 'Database connection failed'}), 500
+    cursor = conn.cursor()
+    
+    try:
+        conn.start_transaction()
+        upsert_parade_states(cursor, report_date_str, grids)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"Database error in batch save: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'error': f'Database error: {str(e)}'}), 500
+    finally:
+        cursor.close()
+        conn.close()
+    
+    mark_rollup_stale(*grids)
+    for company in grids:
+        invalidate_carry_forward('parade_state_daily', company)
+    bump_versions('parade_state_daily')
+    
+    return jsonify({
+        'success': True,
+        'message': f'Parade data saved for {len(grids)} companies on {report_date_str}',
+        'details': {
+            'date': report_date_str,
+            'entered_by': user.get('username'),
+            'companies': {
+                company: {
+                    'auth': grid.cell('grandTotal', 'auth'),
+                    'posted_str': grid.cell('grandTotal', 'posted_str'),
+                    't_out': grid.cell('grandTotal', 'trout_det'),
+                    'present_unit': grid.cell('grandTotal', 'present_unit')
+                }
+                for company, grid in grids.items()
+            }
+        }
+    }), 200
+
+
 @app.route('/api/parade-data/export-csv/<date_str>/<company>', methods=['GET'])
 def export_parade_csv(date_str, company):
     """Export parade data to CSV"""
@@ -3170,45 +2897,12 @@ def export_parade_csv(date_str, company):
             output = StringIO()
             writer = csv.writer(output)
             
-            # Headers
-            headers = ['Category', 'AUTH', 'H/S', 'POSTED/STR', 'LVE', 'COURSE', 'DET', 
-                      'MH', 'SICK/LVE', 'EX', 'TD', 'ATT', 'AWL/OSL/JC', 'T/OUT', 
-                      'PRES/DET', 'PRES/UNIT', 'DUES IN', 'DUES OUT']
             writer.writerow(['AGGREGATED PARADE STATE - ALL COMPANIES'])
             writer.writerow([f'Date: {date_str}'])
             writer.writerow([f'Exported by: {user.get("username")} ({user_role})'])
             writer.writerow([])
-            writer.writerow(headers)
-            
-            # Aggregate data
-            categories = [
-                ('offr', 'OFFR'),
-                ('jco', 'JCO'),
-                ('jcoEre', 'JCO (ERE)'),
-                ('or', 'OR'),
-                ('orEre', 'OR (ERE)'),
-                ('firstTotal', 'TOTAL (I)'),
-                ('oaOr', 'OA/OR'),
-                ('attSummary', 'SUPERNUMARARY'),
-                ('attOffr', 'ATT (OFFR)'),
-                ('attJco', 'ATT (JCO)'),
-                ('attOr', 'ATT (OR)'),
-                ('secondTotal', 'TOTAL (II)'),
-                ('grandTotal', 'GRAND TOTAL')
-            ]
-            
-            column_names = [
-                'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-                'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-                'present_det', 'present_unit', 'dues_in', 'dues_out'
-            ]
-            
-            for cat_key, cat_label in categories:
-                row_data = [cat_label]
-                for col in column_names:
-                    total = sum(company.get(f"{cat_key}_{col}", 0) or 0 for company in companies_data)
-                    row_data.append(total)
-                writer.writerow(row_data)
+            writer.writerow(PARADE_CSV_HEADERS)
+            writer.writerows(ParadeStateGrid.sum_rows(companies_data).csv_rows())
             
             filename = f"parade_state_all_companies_{date_str}.csv"
             
@@ -3231,43 +2925,12 @@ def export_parade_csv(date_str, company):
             output = StringIO()
             writer = csv.writer(output)
             
-            # Headers
-            headers = ['Category', 'AUTH', 'H/S', 'POSTED/STR', 'LVE', 'COURSE', 'DET', 
-                      'MH', 'SICK/LVE', 'EX', 'TD', 'ATT', 'AWL/OSL/JC', 'T/OUT', 
-                      'PRES/DET', 'PRES/UNIT', 'DUES IN', 'DUES OUT']
             writer.writerow([f'PARADE STATE - {company}'])
             writer.writerow([f'Date: {date_str}'])
             writer.writerow([f'Exported by: {user.get("username")} ({user_role})'])
             writer.writerow([])
-            writer.writerow(headers)
-            
-            categories = [
-                ('offr', 'OFFR'),
-                ('jco', 'JCO'),
-                ('jcoEre', 'JCO (ERE)'),
-                ('or', 'OR'),
-                ('orEre', 'OR (ERE)'),
-                ('firstTotal', 'TOTAL (I)'),
-                ('oaOr', 'OA/OR'),
-                ('attSummary', 'SUPERNUMARARY'),
-                ('attOffr', 'ATT (OFFR)'),
-                ('attJco', 'ATT (JCO)'),
-                ('attOr', 'ATT (OR)'),
-                ('secondTotal', 'TOTAL (II)'),
-                ('grandTotal', 'GRAND TOTAL')
-            ]
-            
-            column_names = [
-                'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
-                'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
-                'present_det', 'present_unit', 'dues_in', 'dues_out'
-            ]
-            
-            for cat_key, cat_label in categories:
-                row_data = [cat_label]
-                for col in column_names:
-                    row_data.append(row.get(f"{cat_key}_{col}", 0))
-                writer.writerow(row_data)
+            writer.writerow(PARADE_CSV_HEADERS)
+            writer.writerows(ParadeStateGrid.from_row(row).csv_rows())
             
             filename = f"parade_state_{company.replace(' ', '_')}_{date_str}.csv"
         
@@ -3295,6 +2958,79 @@ def export_parade_csv(date_str, company):
             cursor.close()
         if conn:
             conn.close()
+
+def parse_export_range_args():
+    """
+    Read ?from=&to=&format=csv|xlsx&compress=zstd for the streaming exports.
+    Returns (args, None) or (None, error response).
+    """
+    try:
+        from_date = datetime.strptime(request.args.get('from', ''), '%Y-%m-%d').date()
+        to_date = datetime.strptime(request.args.get('to', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return None, (jsonify({'success': False, 'error': 'from and to must be dates (YYYY-MM-DD)'}), 400)
+    if from_date > to_date:
+        return None, (jsonify({'success': False, 'error': 'from must not be after to'}), 400)
+    
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in ('csv', 'xlsx'):
+        return None, (jsonify({'success': False, 'error': 'format must be csv or xlsx'}), 400)
+    
+    compress = request.args.get('compress', '').lower()
+    if compress not in ('', 'zstd'):
+        return None, (jsonify({'success': False, 'error': 'compress must be zstd'}), 400)
+    
+    return {'from': from_date, 'to': to_date, 'format': fmt, 'compress': compress == 'zstd'}, None
+
+@app.route('/api/parade-data/export', methods=['GET'])
+def export_parade_range():
+    """
+    Stream the parade state for every day in ?from=&to= as CSV or XLSX
+    (?format=), 13 category rows per company per day. ?company= defaults
+    to the user's company; O CENTRE NCO may pass any company or 'All'.
+    ?compress=zstd returns the file zstd-compressed.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated. Please login again.'}), 401
+    
+    user_role = user.get('role', '').strip()
+    user_company = user.get('company', '').strip()
+    company = request.args.get('company') or user_company
+    
+    if user_role == 'ONCO':
+        if company != user_company:
+            return jsonify({'success': False, 'error': f'Access denied - ONCO can only export data for {user_company}'}), 403
+    elif user_role != 'O CENTRE NCO':
+        return jsonify({'success': False, 'error': 'Access denied - Only O CENTRE NCO and ONCO can export parade data'}), 403
+    
+    args, error = parse_export_range_args()
+    if error:
+        return error
+    
+    query = f"""
+        SELECT report_date, company, {', '.join(PARADE_DB_COLUMNS)}
+        FROM parade_state_daily
+        WHERE report_date BETWEEN %s AND %s
+    """
+    params = [args['from'], args['to']]
+    if company != 'All':
+        query += " AND company = %s"
+        params.append(company)
+    query += " ORDER BY report_date, company"
+    
+    def rows():
+        for row in stream_rows(query, params):
+            prefix = [row['report_date'].isoformat(), row['company']]
+            for cells in ParadeStateGrid.from_row(row).csv_rows():
+                yield prefix + cells
+    
+    chunks, mimetype, extension = export_chunks(
+        args['format'], ['Date', 'Company'] + PARADE_CSV_HEADERS, rows(), args['compress'], sheet_name='Parade State')
+    filename = f"parade_state_{company.replace(' ', '_')}_{args['from']}_{args['to']}.{extension}"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/api/get_projects')
 def api_get_projects():
     print("this is in new route of getting projects")
@@ -3384,23 +3120,85 @@ def reset_interview_status():
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute("""
-        UPDATE personnel
-SET interview_status = 0
-WHERE interview_status = 1
-  AND TIMESTAMPDIFF(MINUTE, updated_at, NOW()) > 1;
-
-
-                   
+        SELECT id, company
+        FROM personnel
+        WHERE interview_status = 1
+          AND TIMESTAMPDIFF(MINUTE, updated_at, NOW()) > 1
     """)
-    conn.commit()
+    rows = cursor.fetchall()
+    if rows:
+        # Reset exactly the rows read, so only their companies need refreshing
+        cursor.execute(f"""
+            UPDATE personnel
+            SET interview_status = 0
+            WHERE interview_status = 1
+              AND id IN ({', '.join(['%s'] * len(rows))})
+        """, [row[0] for row in rows])
+        conn.commit()
     cursor.close()
     conn.close()
+    if rows:
+        mark_rollup_stale(*{row[1] or 'Admin' for row in rows})
+        bump_versions('personnel')
     
 
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=reset_interview_status, trigger="interval", seconds=6630)  # check every 30s
 scheduler.start()
 
+
+@app.cli.command('rebuild-dashboard-rollup')
+def rebuild_dashboard_rollup_command():
+    """Recompute the dashboard_rollup table for every company"""
+    companies = rebuild_rollup()
+    print(f"Rebuilt dashboard rollup for {len(companies)} companies: {', '.join(companies)}")
+
+
+@app.cli.command('check-dashboard-rollup')
+def check_dashboard_rollup_command():
+    """Diff dashboard_rollup against the live aggregates"""
+    mismatches = check_rollup()
+    for m in mismatches:
+        flag = ' (stale, refreshes on next read)' if m['is_stale'] else ''
+        print(f"{m['company']}: {m['field']} rollup={m['rollup']} live={m['live']}{flag}")
+
+    drift = [m for m in mismatches if not m['is_stale']]
+    if drift:
+        print(f"{len(drift)} mismatches in fresh rows - run rebuild-dashboard-rollup")
+        raise SystemExit(1)
+    print("Dashboard rollup is consistent")
+
+
+@app.cli.command('recompute-weight-fitness')
+def recompute_weight_fitness_command():
+    """Add the fitness columns to weight_info if missing and recompute every row
+
+    Edits to ideal_weights are picked up by the running app within
+    IDEAL_WEIGHT_GRID_TTL; run this after a bulk edit to apply it at once.
+    """
+    updated = recompute_weight_fitness()
+    print(f"Recomputed fitness for {updated} weight_info rows")
+
+
+@app.cli.command('check-weight-assessment')
+def check_weight_assessment_command():
+    """Check the vectorised weight assessment against the original per-row logic"""
+    checked, mismatches = run_weight_assessment_check()
+    for m in mismatches[:50]:
+        print(f"{m['row']}: {m['field']} reference={m['reference']} vectorised={m['vectorised']}")
+
+    if mismatches:
+        print(f"{len(mismatches)} mismatches in {checked} rows")
+        raise SystemExit(1)
+    print(f"Weight assessment matches the per-row logic for {checked} rows")
+
+
+@app.cli.command('rebuild-chat-unread-counts')
+def rebuild_chat_unread_counts_command():
+    """Add the messages indexes if missing and rebuild message_unread_counts"""
+    pairs = rebuild_unread_counts()
+    print(f"Rebuilt unread counters for {pairs} receiver/sender pairs")
+
 # AGNIVEER DATA FATCH WITH TABLE STARTING CODE++++++++++++++++++++++++++++++++++++++++++++++++++++
 
 
@@ -3565,6 +3363,7 @@ def upcomming_test_alarms():
 
 # ========== 1. DETACHMENTS COUNT ==========
 @app.route('/api/dashboard/detachments', methods=['GET'])
+@cached_widget('personnel')
 def get_detachments_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3599,6 +3398,7 @@ def get_detachments_count():
 
 # ========== 1.1 DOMAIN SPECIALIZATION COUNT ==========
 @app.route('/api/dashboard/duty_count', methods=['GET'])
+@cached_widget('personnel', 'units_served')
 def get_duty_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3650,6 +3450,7 @@ def get_duty_count():
 
 # ========== 2. MANPOWER DATA ==========
 @app.route('/api/dashboard/manpower', methods=['GET'])
+@cached_widget('parade_state_daily', 'personnel')
 def get_manpower_data():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3752,6 +3553,7 @@ def get_manpower_data():
 excluded_ranks = ('Naib Subedar', 'Subedar', 'Sub Maj', 'Subedar Major')
 # ========== 3. INTERVIEW DATA ==========
 @app.route('/api/dashboard/interviews', methods=['GET'])
+@cached_widget('personnel', per_user=lambda user: user['role'] in ['JCO', 'S/JCO'])
 def get_interview_data():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3820,6 +3622,7 @@ def get_interview_data():
 
 # ========== 4. ATTACHMENTS/TD COUNT ==========
 @app.route('/api/dashboard/attachments', methods=['GET'])
+@cached_widget('personnel')
 def get_attachments_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3854,6 +3657,7 @@ def get_attachments_count():
 
 # ========== 5. AGNIVEER COUNT ==========
 @app.route('/api/dashboard/agniveers', methods=['GET'])
+@cached_widget('personnel')
 def get_agniveer_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3891,6 +3695,7 @@ def get_agniveer_count():
 
 # ========== 6. PROJECTS COUNT ==========
 @app.route('/api/dashboard/projects', methods=['GET'])
+@cached_widget('projects')
 def get_projects_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -3925,6 +3730,7 @@ def get_projects_count():
 
 # ========== 7. SENSITIVE PERSONNEL COUNT ==========
 @app.route('/api/dashboard/sensitive', methods=['GET'])
+@cached_widget('sensitive_marking', 'personnel')
 def get_sensitive_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -4002,6 +3808,7 @@ def get_sensitive_count():
             conn.close()
 # ========== 9. COURSES COUNT ==========
 @app.route('/api/dashboard/courses', methods=['GET'])
+@cached_widget('candidate_on_courses', 'personnel')
 def get_courses_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -4041,6 +3848,7 @@ def get_courses_count():
 
 # ========== 10. ROLL CALL POINTS ==========
 @app.route('/api/dashboard/rollcall', methods=['GET'])
+@cached_widget('roll_call_points')
 def get_rollcall_points():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -4067,6 +3875,7 @@ def get_rollcall_points():
 
 # ========== 11. BOARDS COUNT ==========
 @app.route('/api/dashboard/boards', methods=['GET'])
+@cached_widget('boards')
 def get_boards_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -4093,6 +3902,7 @@ def get_boards_count():
 
 # ========== 12. TASKS DATA ==========
 @app.route('/api/dashboard/tasks', methods=['GET'])
+@cached_widget('tasks', per_user=True)
 def get_tasks_data():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
@@ -4254,16 +4064,19 @@ def get_trade_manpower(date):
     Get trade manpower data for a specific date.
     If data doesn't exist for requested date, return data from last available date.
     """
+    try:
+        requested_date = datetime.strptime(date, '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'success': False, 'error': 'date must be YYYY-MM-DD'}), 400
+
     try:
         conn = get_db_connection()
         cursor = conn.cursor(dictionary=True)
-        # First, check if data exists for requested date
-        cursor.execute("""
-            SELECT * FROM trade_manpower_daily 
-            WHERE report_date = %s
-        """, (date,))
-        
-        current_data = cursor.fetchone()
+        # Latest report on or before the requested date
+        current_data = latest_on_or_before(cursor, 'trade_manpower_daily', requested_date)
+        template_data = None
+        if current_data and current_data['report_date'] != requested_date:
+            template_data, current_data = current_data, None
         
         if current_data:
             # Data exists for requested date
@@ -4278,26 +4091,9 @@ def get_trade_manpower(date):
                 'is_present_day': True  # Add this flag
             })
         else:
-            # No data for requested date, find last available date
-            cursor.execute("""
-                SELECT report_date FROM trade_manpower_daily 
-                WHERE report_date < %s
-                ORDER BY report_date DESC 
-                LIMIT 1
-            """, (date,))
-            
-            last_date_row = cursor.fetchone()
-            
-            if last_date_row:
-                # Found data from previous date
-                last_date = last_date_row['report_date'].strftime('%Y-%m-%d')
-                
-                cursor.execute("""
-                    SELECT * FROM trade_manpower_daily 
-                    WHERE report_date = %s
-                """, (last_date,))
-                
-                template_data = cursor.fetchone()
+            if template_data:
+                # No data for requested date, carry the last available date forward
+                last_date = template_data['report_date'].strftime('%Y-%m-%d')
                 return_data = format_data_for_frontend(template_data, date, True)
                 
                 return jsonify({
@@ -4491,6 +4287,7 @@ def save_trade_manpower():
             action = 'inserted'
         
         conn.commit()
+        invalidate_carry_forward('trade_manpower_daily')
         
         print(f"DEBUG: Data {action} successfully for {date}")
         
@@ -4517,6 +4314,45 @@ def save_trade_manpower():
         if 'conn' in locals():
             conn.close()
                         
+TRADE_EXPORT_HEADER = [
+    'SR NO', 'TRADE/CAT', 'AUTH', 'H/S', 'HELD', 'AV',
+    'HQ COY DIST', '1 COY DIST', '2 COY DIST', '3 COY DIST',
+    'HQ COY STATE', '1 COY STATE', '2 COY STATE', '3 COY STATE',
+    'HQ COY PRESENT', '1 COY PRESENT', '2 COY PRESENT', '3 COY PRESENT'
+]
+
+# (label, column prefix) in sheet order
+TRADE_EXPORT_TRADES = [
+    ('OP CIPH', 'op_ciph'),
+    ('OSS', 'oss'),
+    ('OCC', 'occ'),
+    ('TTC', 'ttc'),
+    ('LMN', 'lmn'),
+    ('EFS', 'efs'),
+    ('DVR MT', 'dvr_mt'),
+    ('DR', 'dr'),
+    ('DTMN', 'dtmn'),
+    ('SKT', 'skt'),
+    ('ARTSN', 'artsn'),
+    ('W/MAN', 'w_man'),
+    ('STEWARD', 'steward'),
+    ('DRESSER', 'dresser'),
+    ('HKEEPER', 'hkeeper'),
+    ('MKEEPER', 'mkeeper'),
+    ('CHEF MESS', 'chef_mess'),
+    ('CHEF COM', 'chef_com'),
+    ('ER', 'er'),
+    ('TLR', 'tlr'),
+    ('CLK SD', 'clk_sd'),
+    ('ERE', 'ere')
+]
+
+TRADE_EXPORT_FIELDS = [
+    'auth', 'hs', 'held', 'av', 'dist_hq', 'dist_1', 'dist_2', 'dist_3',
+    'state_hq', 'state_1', 'state_2', 'state_3',
+    'present_hq', 'present_1', 'present_2', 'present_3'
+]
+
 @app.route('/api/trade-manpower/export-csv/<date>', methods=['GET'])
 def export_trade_csv(date):
     """
@@ -4543,43 +4379,10 @@ def export_trade_csv(date):
         output = StringIO()
         writer = csv.writer(output)
         
-        # Write header
-        header = [
-            'SR NO', 'TRADE/CAT', 'AUTH', 'H/S', 'HELD', 'AV',
-            'HQ COY DIST', '1 COY DIST', '2 COY DIST', '3 COY DIST',
-            'HQ COY STATE', '1 COY STATE', '2 COY STATE', '3 COY STATE',
-            'HQ COY PRESENT', '1 COY PRESENT', '2 COY PRESENT', '3 COY PRESENT'
-        ]
-        writer.writerow(header)
-        
-        # Trade order
-        trades = [
-            ('OP CIPH', 'op_ciph'),
-            ('OSS', 'oss'),
-            ('OCC', 'occ'),
-            ('TTC', 'ttc'),
-            ('LMN', 'lmn'),
-            ('EFS', 'efs'),
-            ('DVR MT', 'dvr_mt'),
-            ('DR', 'dr'),
-            ('DTMN', 'dtmn'),
-            ('SKT', 'skt'),
-            ('ARTSN', 'artsn'),
-            ('W/MAN', 'w_man'),
-            ('STEWARD', 'steward'),
-            ('DRESSER', 'dresser'),
-            ('HKEEPER', 'hkeeper'),
-            ('MKEEPER', 'mkeeper'),
-            ('CHEF MESS', 'chef_mess'),
-            ('CHEF COM', 'chef_com'),
-            ('ER', 'er'),
-            ('TLR', 'tlr'),
-            ('CLK SD', 'clk_sd'),
-            ('ERE', 'ere')
-        ]
+        writer.writerow(TRADE_EXPORT_HEADER)
         
         # Write trade rows
-        for sr_no, (trade_name, trade_code) in enumerate(trades, 1):
+        for sr_no, (trade_name, trade_code) in enumerate(TRADE_EXPORT_TRADES, 1):
             row = [
                 sr_no,
                 trade_name,
@@ -4642,6 +4445,44 @@ def export_trade_csv(date):
         if 'conn' in locals():
             conn.close()
 
+
+@app.route('/api/trade-manpower/export', methods=['GET'])
+def export_trade_range():
+    """
+    Stream trade manpower for every day in ?from=&to= as CSV or XLSX
+    (?format=), one block of trade rows plus a TOTAL row per day.
+    ?compress=zstd returns the file zstd-compressed.
+    """
+    user = get_current_user()
+    if not user:
+        return jsonify({'success': False, 'error': 'Not authenticated. Please login again.'}), 401
+    
+    args, error = parse_export_range_args()
+    if error:
+        return error
+    
+    columns = ['report_date'] + [f"{code}_{field}" for _, code in TRADE_EXPORT_TRADES for field in TRADE_EXPORT_FIELDS]
+    columns += [f"total_{field}" for field in TRADE_EXPORT_FIELDS]
+    query = f"""
+        SELECT {', '.join(columns)}
+        FROM trade_manpower_daily
+        WHERE report_date BETWEEN %s AND %s
+        ORDER BY report_date
+    """
+    
+    def rows():
+        for row in stream_rows(query, (args['from'], args['to'])):
+            day = row['report_date'].isoformat()
+            for sr_no, (trade_name, code) in enumerate(TRADE_EXPORT_TRADES, 1):
+                yield [day, sr_no, trade_name] + [row[f"{code}_{field}"] or 0 for field in TRADE_EXPORT_FIELDS]
+            yield [day, '', 'TOTAL'] + [row[f"total_{field}"] or 0 for field in TRADE_EXPORT_FIELDS]
+    
+    chunks, mimetype, extension = export_chunks(
+        args['format'], ['DATE'] + TRADE_EXPORT_HEADER, rows(), args['compress'], sheet_name='Trade Manpower')
+    filename = f"trade_manpower_{args['from']}_{args['to']}.{extension}"
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 @app.route('/api/company/interview-pending')
 def company_interview_pending():
     user = require_login()
@@ -4944,6 +4785,8 @@ def mark_interview_done():
             """, (home_state,))
 
         conn.commit()
+        mark_rollup_stale(army_number=army_number_front_end)
+        bump_versions('personnel')
 
     except Exception as e:
         conn.rollback()
@@ -5079,6 +4922,80 @@ def get_today_birthdays():
         conn.close()
 
 
+# Widget name -> endpoint served by /api/dashboard/batch
+DASHBOARD_BATCH_WIDGETS = {
+    'summary': 'dashboard_summary',
+    'detachments': 'get_detachments_count',
+    'duty_count': 'get_duty_count',
+    'manpower': 'get_manpower_data',
+    'interviews': 'get_interview_data',
+    'attachments': 'get_attachments_count',
+    'agniveers': 'get_agniveer_count',
+    'projects': 'get_projects_count',
+    'sensitive': 'get_sensitive_count',
+    'courses': 'get_courses_count',
+    'rollcall': 'get_rollcall_points',
+    'boards': 'get_boards_count',
+    'tasks': 'get_tasks_data',
+    'assigned_alarm': 'get_assigned_alarm',
+    'birthdays': 'get_today_birthdays',
+    'event_alarms': 'today_event_alarm',
+    'rejected_leaves': 'apply_leave.co_rejected_leaves',
+}
+
+
+@app.route('/api/dashboard/batch', methods=['GET'])
+def dashboard_batch():
+    """
+    Serve several dashboard widgets in one response:
+    /api/dashboard/batch?widgets=manpower,interviews,tasks,birthdays
+
+    Each widget runs its normal view inside this request, so all of them
+    share the request's pooled connection, decoded JWT and widget cache.
+    A failing widget is reported under its own name and does not fail
+    the batch.
+    """
+    user = require_login()
+    if not user:
+        return jsonify({"status": "error", "message": "Unauthorized"}), 401
+
+    requested = [w.strip() for w in request.args.get('widgets', '').split(',') if w.strip()]
+    if not requested:
+        return jsonify({
+            "status": "error",
+            "message": "widgets parameter is required",
+            "available": sorted(DASHBOARD_BATCH_WIDGETS)
+        }), 400
+
+    unknown = [w for w in requested if w not in DASHBOARD_BATCH_WIDGETS]
+    if unknown:
+        return jsonify({
+            "status": "error",
+            "message": f"Unknown widgets: {', '.join(unknown)}",
+            "available": sorted(DASHBOARD_BATCH_WIDGETS)
+        }), 400
+
+    widgets = {}
+    errors = {}
+    for name in dict.fromkeys(requested):
+        view = app.view_functions[DASHBOARD_BATCH_WIDGETS[name]]
+        try:
+            response = make_response(view())
+        except Exception as e:
+            print(f"Error building dashboard widget {name}:", e)
+            errors[name] = {"status": 500, "message": "Internal Server Error"}
+            continue
+
+        payload = response.get_json(silent=True)
+        if response.status_code == 200:
+            widgets[name] = payload
+        else:
+            message = payload.get('message') or payload.get('error') if isinstance(payload, dict) else None
+            errors[name] = {"status": response.status_code, "message": message or "Request failed"}
+
+    return jsonify({"status": "success", "widgets": widgets, "errors": errors}), 200
+
+
 @app.route('/settings')
 def settings_page():
     """Settings page - theme and other preferences."""
@@ -5111,4 +5028,4 @@ def get_gallery():
         return jsonify([]), 500
 
 if __name__ == '__main__':
-    app.run(port=5000,debug=True)
+    socketio.run(app, port=5000, debug=True)
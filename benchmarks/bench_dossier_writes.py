@@ -0,0 +1,169 @@
+"""
+Round trips for the child tables of a ~100-row personnel dossier, before
+and after batching.
+
+before: one INSERT per child row (the original insert_dynamic_data), and on
+        update a DELETE of every child table followed by the same inserts.
+after:  insert_dynamic_data / insert_sports_data (one multi-row INSERT per
+        table) on create, sync_dynamic_data (one SELECT per table plus only
+        the changed rows) on update.
+
+Statements go to a stub cursor, so no database is needed. A round trip is
+one execute(); executemany() of an INSERT is one round trip too, since
+mysql-connector sends it as a single multi-row INSERT, and any other
+executemany() is one per row. Latency is the Python time plus round trips
+times --rtt.
+
+    python benchmarks/bench_dossier_writes.py [--rtt 0.5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import imports  # noqa: E402,F401  (loads the blueprints in the right order)
+from blueprints.personal_information import (  # noqa: E402
+    PERSONNEL_CHILD_TABLES, child_table_columns, child_table_rows, delete_related_records,
+    insert_dynamic_data, insert_sports_data, sports_rows, sync_dynamic_data
+)
+
+PERSONNEL_ID = 1
+ARMY_NUMBER = '15000001A'
+ROWS_PER_TABLE = 10     # x 10 child tables = 100 rows, plus sports
+
+
+class StubCursor:
+    """Counts statements and round trips; answers the sync SELECTs from `stored`."""
+
+    def __init__(self, stored=None):
+        self.stored = stored or {}
+        self.calls = 0
+        self.round_trips = 0
+        self._result = []
+
+    def execute(self, sql, params=()):
+        self.calls += 1
+        self.round_trips += 1
+        self._result = []
+        if sql.lstrip().upper().startswith('SELECT'):
+            self._result = list(self.stored.get(re.search(r'FROM\s+(\w+)', sql).group(1), []))
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        self.calls += 1
+        self.round_trips += 1 if sql.lstrip().upper().startswith('INSERT') else len(rows)
+
+    def fetchall(self):
+        return self._result
+
+
+def dossier(edit=0):
+    """Payload with ROWS_PER_TABLE items per child table; the first `edit` items of each get new remarks."""
+    def item(spec, i):
+        values = {
+            'courses': {'course': f'Course {i}', 'courseFrom': '2020-01-01', 'courseTo': '2020-03-01',
+                        'courseInstitute': 'MCTE', 'courseGrading': 'AX', 'courseRemarks': 'ok'},
+            'units': {'unit': f'Unit {i}', 'unitFrom': '2015-01-01', 'unitTo': '2018-01-01', 'unitDuty': 'OP'},
+            'loans': {'loanType': 'HBA', 'loanAmount': '500000', 'loanBank': 'SBI',
+                      'loanEMI': '9000', 'loanPending': '120000', 'loanRemarks': 'ok'},
+            'punishments': {'punishmentDate': '2019-05-05', 'punishment': 'Warning',
+                            'punishmentAASec': '63', 'punishmentRemarks': 'ok'},
+            'detailedCourses': {'detailedCourseName': f'Cadre {i}', 'detailedCourseFrom': '2021-01-01',
+                                'detailedCourseTo': '2021-02-01', 'detailedCourseRemarks': 'ok'},
+            'leaves': {'leaveYear': str(2010 + i), 'leaveAL': '60', 'leaveCL': '20',
+                       'leaveAAL': '0', 'leaveTotal': '80', 'leaveRemarks': 'ok'},
+            'family': {'familyRelation': 'Son', 'familyName': f'Name {i}', 'familyDOB': '2012-01-01',
+                       'familyUID': f'UID{i}', 'familyPartII': f'P2/{i}'},
+            'children': {'childName': f'Child {i}', 'childDOB': '2014-01-01', 'childClass': '5',
+                         'childPartII': f'P2/{i}', 'childUID': f'CUID{i}'},
+            'mobiles': {'mobileType': 'Personal', 'mobileNumber': f'98000000{i:02d}',
+                        'mobileProvider': 'BSNL', 'mobileRemarks': 'ok'},
+            'discordCases': {'discordCaseNo': f'C{i}', 'discordAmount': '1000', 'discordSanction': f'S{i}'},
+        }[spec['key']]
+        if i < edit:
+            for key in values:
+                if key.endswith('Remarks') or key in ('unitDuty', 'familyPartII', 'childPartII', 'discordSanction'):
+                    values[key] = 'edited'
+        return values
+
+    data = {spec['key']: [item(spec, i) for i in range(ROWS_PER_TABLE)] for spec in PERSONNEL_CHILD_TABLES}
+    data['sports'] = ['Football', 'Hockey']
+    data['otherSports'] = 'Chess, Kabaddi'
+    return data
+
+
+def stored_rows(data):
+    """What the tables hold after saving `data`, as the sync SELECTs return it."""
+    stored = {spec['table']: [(row_id,) + row for row_id, row in enumerate(child_table_rows(spec, data), 1)]
+              for spec in PERSONNEL_CHILD_TABLES}
+    stored['personnel_sports'] = [(row_id,) + row for row_id, row in enumerate(sports_rows(data), 1)]
+    return stored
+
+
+def before_insert(cursor, data):
+    """The original insert_dynamic_data / insert_sports_data: one INSERT per row."""
+    for spec in PERSONNEL_CHILD_TABLES:
+        columns = child_table_columns(spec)
+        for row in child_table_rows(spec, data):
+            cursor.execute(
+                f"INSERT INTO {spec['table']} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})",
+                (PERSONNEL_ID, ARMY_NUMBER) + row
+            )
+    for row in sports_rows(data):
+        cursor.execute(
+            "INSERT INTO personnel_sports (personnel_id, army_number, sport_type, sport_name) VALUES (%s, %s, %s, %s)",
+            (PERSONNEL_ID, ARMY_NUMBER) + row
+        )
+
+
+def before_update(cursor, data):
+    delete_related_records(cursor, PERSONNEL_ID, ARMY_NUMBER)
+    before_insert(cursor, data)
+
+
+def after_insert(cursor, data):
+    insert_dynamic_data(cursor, PERSONNEL_ID, ARMY_NUMBER, data)
+    insert_sports_data(cursor, PERSONNEL_ID, ARMY_NUMBER, data)
+
+
+def after_update(cursor, data):
+    sync_dynamic_data(cursor, PERSONNEL_ID, ARMY_NUMBER, data)
+
+
+def measure(fn, data, stored=None, repeat=200):
+    cursor = StubCursor(stored)
+    fn(cursor, data)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(StubCursor(stored), data)
+    python_ms = (time.perf_counter() - started) * 1000 / repeat
+    return cursor.calls, cursor.round_trips, python_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dossier child-table round trips, before and after batching.')
+    parser.add_argument('--rtt', type=float, default=0.5, help='milliseconds per database round trip')
+    args = parser.parse_args()
+
+    saved = dossier()
+    child_rows = sum(len(child_table_rows(spec, saved)) for spec in PERSONNEL_CHILD_TABLES)
+    print(f"dossier: {child_rows} child rows + {len(sports_rows(saved))} sports, rtt {args.rtt} ms\n")
+    print(f"{'scenario':<28} {'version':<7} {'calls':>6} {'round trips':>12} {'python ms':>10} {'latency ms':>11}")
+
+    scenarios = [
+        ('create', before_insert, after_insert, saved, None),
+        ('update, nothing changed', before_update, after_update, saved, stored_rows(saved)),
+        ('update, 10% of rows edited', before_update, after_update, dossier(edit=1), stored_rows(saved)),
+    ]
+    for name, before, after, data, stored in scenarios:
+        for version, fn in (('before', before), ('after', after)):
+            calls, round_trips, python_ms = measure(fn, data, stored)
+            latency_ms = python_ms + round_trips * args.rtt
+            print(f"{name:<28} {version:<7} {calls:>6} {round_trips:>12} {python_ms:>10.3f} {latency_ms:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
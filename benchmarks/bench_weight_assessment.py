@@ -0,0 +1,115 @@
+"""
+Old vs new weight assessment at 1k / 10k / 50k weight_info rows.
+
+old: the original per-soldier loop (reference_assessment), one ideal_weights
+     lookup per row. With --db each lookup is also the real
+     `SELECT ... FROM ideal_weights WHERE height_cm = %s` round trip.
+new: assess_weights() over every row with the IdealWeightGrid.
+
+    python benchmarks/bench_weight_assessment.py [--sizes 1000,10000,50000] [--db]
+
+Without --db the ideal_weights rows are synthetic (the shape of latest.sql)
+and nothing touches the database.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import imports  # noqa: E402,F401  (loads the blueprints in the right order)
+from blueprints.weight_ms import (  # noqa: E402
+    IdealWeightGrid, assess_weights, reference_assessment, round_to_nearest_even
+)
+from db_config import get_db_connection  # noqa: E402
+
+AGE_BANDS = ['18-22', '23-27', '28-32', '33-37', '38-42', '43-47', '48-70']
+
+
+def synthetic_ideal_weights():
+    rows = []
+    for height in range(150, 192, 2):
+        for i, age_range in enumerate(AGE_BANDS):
+            ideal = (height - 100) * 0.9 + i * 0.75
+            rows.append({'height_cm': height, 'age_range': age_range,
+                         'ideal_weight_kg': Decimal(f"{ideal:.2f}")})
+    return rows
+
+
+def synthetic_weight_rows(count, seed=1):
+    rng = random.Random(seed)
+    return [{
+        'height': round(rng.uniform(152, 188), 1),
+        'age': rng.randint(18, 58),
+        'actual_weight': round(rng.uniform(45, 95), 1),
+    } for _ in range(count)]
+
+
+def old_in_memory(rows, ideal_rows):
+    # ideal_weights has no index on height_cm, so each query scanned the table too
+    return [reference_assessment(row, ideal_rows) for row in rows]
+
+
+def old_with_queries(rows, cursor):
+    results = []
+    for row in rows:
+        cursor.execute(
+            "SELECT height_cm, age_range, ideal_weight_kg FROM ideal_weights WHERE height_cm = %s",
+            (round_to_nearest_even(row['height']),)
+        )
+        results.append(reference_assessment(row, cursor.fetchall()))
+    return results
+
+
+def new(rows, ideal_rows):
+    # Grid construction included, as on a cold cache
+    return assess_weights(rows, None, grid=IdealWeightGrid(ideal_rows))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,50000')
+    parser.add_argument('--db', action='store_true',
+                        help='use ideal_weights from the configured database and time the per-row queries')
+    args = parser.parse_args()
+
+    conn = cursor = None
+    if args.db:
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT height_cm, age_range, ideal_weight_kg FROM ideal_weights ORDER BY id")
+        ideal_rows = cursor.fetchall()
+    else:
+        ideal_rows = synthetic_ideal_weights()
+
+    if not args.db:
+        print("old excludes the per-row query round trip; pass --db to include it")
+    print(f"{'rows':>7}  {'old (s)':>9}  {'new (s)':>9}  {'speedup':>8}  same output")
+    try:
+        for size in (int(s) for s in args.sizes.split(',')):
+            rows = synthetic_weight_rows(size)
+            if args.db:
+                old_seconds, old_result = timed(old_with_queries, rows, cursor)
+            else:
+                old_seconds, old_result = timed(old_in_memory, rows, ideal_rows)
+            new_seconds, new_result = timed(new, rows, ideal_rows)
+            same = new_result == old_result
+            print(f"{size:>7}  {old_seconds:>9.3f}  {new_seconds:>9.3f}  "
+                  f"{old_seconds / new_seconds:>7.1f}x  {same}")
+    finally:
+        if conn is not None:
+            cursor.close()
+            conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""
+Local chat load test: N sender/receiver pairs, delivery latency and server
+CPU for Socket.IO push against the polling clients.
+
+    python benchmarks/load_test_chat.py [--clients 20] [--messages 5] [--gap 1.0]
+                                        [--modes socket,poll,longpoll] [--out results.json]
+
+socket:   receivers hold a socketio.test_client and get 'chat:message' pushes
+poll:     receivers GET /chat/messages/<id>?after_id=... every --poll-interval
+          seconds (the messenger's old 2 s conversation poll)
+longpoll: receivers loop on ?wait=25; at most LONG_POLL_MAX_WAITERS are held,
+          the rest are told to retry_after
+
+The app runs in-process (Flask / Socket.IO test clients, one thread per
+client) against the database in db_config, so CPU is this process's CPU
+time over the run. It needs 2 x --clients rows in `users`; the messages it
+sends are tagged and deleted afterwards (unless --keep), and the unread
+counters rebuilt.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app  # noqa: E402
+from blueprints.chat import LONG_POLL_MAX_WAITERS, rebuild_unread_counts  # noqa: E402
+from db_config import db_pool  # noqa: E402
+from extension import socketio  # noqa: E402
+from middleware import JWT_ALGO, JWT_SECRET, jwt  # noqa: E402
+
+MARKER = "loadtest"
+
+
+def load_users(count):
+    conn = db_pool.checkout()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT id, username, role, company FROM users ORDER BY id LIMIT %s", (count,))
+        users = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    if len(users) < count:
+        sys.exit(f"Need {count} users, found {len(users)}")
+    return users
+
+
+def login(user):
+    token = jwt.encode({'user_id': user['id'], 'username': user['username'],
+                        'role': user['role'], 'company': user['company']}, JWT_SECRET, algorithm=JWT_ALGO)
+    client = app.test_client()
+    client.set_cookie('token', token)
+    return client
+
+
+def cleanup(run_id):
+    conn = db_pool.checkout()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DELETE FROM messages WHERE message LIKE %s", (f"{MARKER} {run_id} %",))
+        deleted = cursor.rowcount
+    finally:
+        cursor.close()
+        conn.close()
+    rebuild_unread_counts()
+    return deleted
+
+
+class Run:
+    """Send times and receive times per message text."""
+
+    def __init__(self, mode, pairs, args):
+        self.mode = mode
+        self.pairs = pairs
+        self.args = args
+        self.run_id = uuid.uuid4().hex[:8]
+        self.sent = {}
+        self.received = {}
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+
+    def record_received(self, text):
+        now = time.perf_counter()
+        with self.lock:
+            if text.startswith(f"{MARKER} {self.run_id} ") and text not in self.received:
+                self.received[text] = now
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def sender(self, index, sender, receiver):
+        client = login(sender)
+        for n in range(self.args.messages):
+            text = f"{MARKER} {self.run_id} {index}:{n}"
+            with self.lock:
+                self.sent[text] = time.perf_counter()
+            client.post('/chat/messages', json={'receiver_id': receiver['id'], 'message': text})
+            self.count_request()
+            time.sleep(self.args.gap)
+
+    def socket_receiver(self, sender, receiver):
+        client = socketio.test_client(app, flask_test_client=login(receiver))
+        while not self.stop.is_set():
+            for event in client.get_received():
+                if event['name'] == 'chat:message':
+                    self.record_received(event['args'][0]['message'])
+            time.sleep(0.005)
+        client.disconnect()
+
+    def poll_receiver(self, sender, receiver, wait=0):
+        client = login(receiver)
+        after_id = self._latest_id(client, sender)
+        while not self.stop.is_set():
+            data = client.get(f"/chat/messages/{sender['id']}?after_id={after_id}&wait={wait}").get_json()
+            self.count_request()
+            for message in data['messages']:
+                after_id = max(after_id, message['id'])
+                self.record_received(message['message'])
+            if wait == 0:
+                self.stop.wait(self.args.poll_interval)
+            elif data.get('retry_after'):
+                self.stop.wait(data['retry_after'])
+
+    def _latest_id(self, client, sender):
+        data = client.get(f"/chat/messages/{sender['id']}?limit=1").get_json()
+        return max([m['id'] for m in data['messages']] or [0])
+
+    def run(self):
+        receiver_target = {
+            'socket': self.socket_receiver,
+            'poll': self.poll_receiver,
+            'longpoll': lambda s, r: self.poll_receiver(s, r, wait=25),
+        }[self.mode]
+        receivers = [threading.Thread(target=receiver_target, args=pair, daemon=True) for pair in self.pairs]
+        senders = [threading.Thread(target=self.sender, args=(i,) + pair) for i, pair in enumerate(self.pairs)]
+
+        for thread in receivers:
+            thread.start()
+        time.sleep(1)   # receivers connected / first poll done
+
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        for thread in senders:
+            thread.start()
+        for thread in senders:
+            thread.join()
+
+        expected = len(self.pairs) * self.args.messages
+        drain_until = time.perf_counter() + self.args.drain
+        while len(self.received) < expected and time.perf_counter() < drain_until:
+            time.sleep(0.05)
+        cpu = time.process_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+
+        self.stop.set()
+        # Long-polls still held are woken by nothing; do not wait for them
+        for thread in receivers:
+            thread.join(timeout=1)
+
+        latencies = sorted((self.received[t] - self.sent[t]) * 1000 for t in self.received if t in self.sent)
+        return {
+            'mode': self.mode,
+            'clients': len(self.pairs),
+            'expected': expected,
+            'delivered': len(latencies),
+            'latency_ms_p50': round(statistics.median(latencies), 1) if latencies else None,
+            'latency_ms_p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 1) if latencies else None,
+            'latency_ms_max': round(latencies[-1], 1) if latencies else None,
+            'requests': self.requests,
+            'cpu_seconds': round(cpu, 3),
+            'cpu_ms_per_message': round(cpu * 1000 / max(len(latencies), 1), 2),
+            'wall_seconds': round(wall, 2),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chat delivery latency and CPU: Socket.IO push vs polling.')
+    parser.add_argument('--clients', type=int, default=20, help='sender/receiver pairs')
+    parser.add_argument('--messages', type=int, default=5, help='messages per sender')
+    parser.add_argument('--gap', type=float, default=1.0, help='seconds between one sender\'s messages')
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    parser.add_argument('--drain', type=float, default=30.0, help='seconds to wait for stragglers')
+    parser.add_argument('--modes', default='socket,poll,longpoll')
+    parser.add_argument('--out', help='also write the results here as JSON')
+    parser.add_argument('--keep', action='store_true', help='keep the test messages')
+    args = parser.parse_args()
+
+    users = load_users(args.clients * 2)
+    pairs = [(users[2 * i], users[2 * i + 1]) for i in range(args.clients)]
+
+    results = []
+    for mode in args.modes.split(','):
+        run = Run(mode, pairs, args)
+        try:
+            results.append(run.run())
+        finally:
+            if not args.keep:
+                cleanup(run.run_id)
+
+    print(f"\n{args.clients} pairs x {args.messages} messages, LONG_POLL_MAX_WAITERS={LONG_POLL_MAX_WAITERS}\n")
+    columns = ['mode', 'delivered', 'latency_ms_p50', 'latency_ms_p95', 'latency_ms_max',
+               'requests', 'cpu_seconds', 'cpu_ms_per_message']
+    print("  ".join(f"{c:>18}" for c in columns))
+    for result in results:
+        print("  ".join(f"{str(result[c]):>18}" for c in columns))
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,271 @@
 from imports import *
 
+import threading
+import time
+
+from flask_socketio import join_room
+from werkzeug.http import http_date
+
+from db_config import release_request_connection
+from extension import socketio
+
 chat_bp = Blueprint('chat_bp', __name__, url_prefix='/chat')
 
+LONG_POLL_MAX_WAIT = 25  # seconds
+# Each waiting long-poll holds a server thread for up to LONG_POLL_MAX_WAIT
+# (waitress serves with 4 threads unless --threads says otherwise), so only
+# this many wait at once; the rest answer straight away with retry_after
+LONG_POLL_MAX_WAITERS = int(os.environ.get("CHAT_LONG_POLL_MAX_WAITERS", 2))
+LONG_POLL_BUSY_RETRY = 5  # seconds
+MESSAGE_PAGE_SIZE = 50
+MESSAGE_PAGE_MAX = 200
+UNREAD_COUNTS_RETRY = 60  # seconds between attempts while the table cannot be created
+
+# One row per (receiver, sender) pair with unread messages, so the contact
+# list and the badge never count rows in `messages`. Bumped on send and
+# recounted for the pair on read-marking; rebuild-chat-unread-counts
+# repairs it after writes made outside the app.
+UNREAD_COUNTS_DDL = """
+    CREATE TABLE IF NOT EXISTS message_unread_counts (
+        receiver_id INT NOT NULL,
+        sender_id INT NOT NULL,
+        unread_count INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (receiver_id, sender_id)
+    )
+"""
+
+# Indexes on messages the unread counters and keyset paging rely on
+MESSAGE_INDEXES = {
+    'idx_conversation': '(sender_id, receiver_id, id)',
+    'idx_unread': '(receiver_id, sender_id, status, id)'
+}
+
+FILL_UNREAD_COUNTS_SQL = """
+    INSERT INTO message_unread_counts (receiver_id, sender_id, unread_count)
+    SELECT receiver_id, sender_id, COUNT(*)
+    FROM messages
+    WHERE status = 'sent'
+    GROUP BY receiver_id, sender_id
+"""
+
+_unread_counts_ready = False
+_unread_counts_tried_at = None
+_unread_counts_lock = threading.Lock()
+
+
+def unread_counts_ready():
+    """Whether message_unread_counts exists; until then unread rows are counted in messages."""
+    return _unread_counts_ready
+
+
+def ensure_unread_counts():
+    """
+    Once per process, before a chat route's own queries (the DDL would
+    commit an open transaction): check for message_unread_counts and, on a
+    database that predates it, create and fill it from messages. A failed
+    attempt is retried after UNREAD_COUNTS_RETRY seconds.
+    """
+    global _unread_counts_ready, _unread_counts_tried_at
+    if _unread_counts_ready:
+        return True
+    with _unread_counts_lock:
+        if _unread_counts_ready:
+            return True
+        now = time.monotonic()
+        if _unread_counts_tried_at is not None and now - _unread_counts_tried_at < UNREAD_COUNTS_RETRY:
+            return False
+        _unread_counts_tried_at = now
+
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.TABLES
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'message_unread_counts'
+            """)
+            if not cursor.fetchone()[0]:
+                cursor.execute(UNREAD_COUNTS_DDL)
+                conn.start_transaction()
+                cursor.execute(FILL_UNREAD_COUNTS_SQL)
+                conn.commit()
+            _unread_counts_ready = True
+        except Error as e:
+            if conn.in_transaction:
+                conn.rollback()
+            print("Error preparing message_unread_counts:", e)
+        finally:
+            cursor.close()
+            conn.close()
+        return _unread_counts_ready
+
+
+@chat_bp.before_request
+def _prepare_unread_counts():
+    ensure_unread_counts()
+
+
+class MessageEvents:
+    """
+    Per-user change counters for long-polling. Sending a message or marking
+    messages read bumps the users involved, and waiting requests wake when
+    their counter moves. In-process only: with several workers a waiter
+    simply times out and the client polls again. At most max_waiters
+    requests block at a time.
+    """
+
+    def __init__(self, max_waiters=LONG_POLL_MAX_WAITERS):
+        self.max_waiters = max_waiters
+        self._versions = {}
+        self._waiters = 0
+        self._cond = threading.Condition()
+
+    def version(self, user_id):
+        with self._cond:
+            return self._versions.get(user_id, 0)
+
+    def notify(self, *user_ids):
+        with self._cond:
+            for user_id in user_ids:
+                self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self._cond.notify_all()
+
+    def wait(self, user_id, seen, timeout):
+        """
+        Block until user_id's counter moves past `seen`; False on timeout,
+        None without waiting when max_waiters requests are already blocked.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if self._versions.get(user_id, 0) != seen:
+                return True
+            if self._waiters >= self.max_waiters:
+                return None
+            self._waiters += 1
+            try:
+                while self._versions.get(user_id, 0) == seen:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._waiters -= 1
+
+    def waiters(self):
+        with self._cond:
+            return self._waiters
+
+
+message_events = MessageEvents()
+
+
+# ---- Socket.IO push ----
+# Each logged-in socket joins its user's room; the HTTP routes push new
+# messages, read receipts and unread counts there. Clients fall back to
+# the polling endpoints while the socket is down.
+
+def _user_room(user_id):
+    return f"user:{user_id}"
+
+
+@socketio.on('connect')
+def chat_socket_connect(auth=None):
+    user = require_login()
+    if not user:
+        return False
+    join_room(_user_room(user['user_id']))
+
+
+def _message_payload(row):
+    payload = dict(row)
+    # Same date format jsonify() gives the polling endpoints
+    if payload.get('created_at'):
+        payload['created_at'] = http_date(payload['created_at'])
+    return payload
+
+
+def _unread_count(cursor, user_id):
+    if not unread_counts_ready():
+        cursor.execute("""
+            SELECT COUNT(*) AS unread_count
+            FROM messages
+            WHERE receiver_id = %s AND status = 'sent'
+        """, (user_id,))
+        return int(cursor.fetchone()['unread_count'])
+    cursor.execute("""
+        SELECT COALESCE(SUM(unread_count), 0) AS unread_count
+        FROM message_unread_counts
+        WHERE receiver_id = %s
+    """, (user_id,))
+    return int(cursor.fetchone()['unread_count'])
+
+
+def _bump_unread(cursor, receiver_id, sender_id):
+    if not unread_counts_ready():
+        return
+    cursor.execute("""
+        INSERT INTO message_unread_counts (receiver_id, sender_id, unread_count)
+        VALUES (%s, %s, 1)
+        ON DUPLICATE KEY UPDATE unread_count = unread_count + 1
+    """, (receiver_id, sender_id))
+
+
+def _recount_unread(cursor, receiver_id, sender_id):
+    """Reset one pair's counter from messages (a range on idx_unread)."""
+    if not unread_counts_ready():
+        return
+    cursor.execute("""
+        INSERT INTO message_unread_counts (receiver_id, sender_id, unread_count)
+        SELECT %s, %s, COUNT(*)
+        FROM messages
+        WHERE receiver_id = %s AND sender_id = %s AND status = 'sent'
+        ON DUPLICATE KEY UPDATE unread_count = VALUES(unread_count)
+    """, (receiver_id, sender_id, receiver_id, sender_id))
+
+
+def ensure_message_indexes(cursor):
+    """Add MESSAGE_INDEXES to messages where missing. Returns the names added."""
+    cursor.execute("""
+        SELECT DISTINCT INDEX_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'messages'
+    """)
+    existing = {row[0] for row in cursor.fetchall()}
+    added = []
+    for name, columns in MESSAGE_INDEXES.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE messages ADD INDEX {name} {columns}")
+            added.append(name)
+    return added
+
+
+def rebuild_unread_counts():
+    """
+    Add the messages indexes and message_unread_counts if needed and
+    rebuild the counters from messages. Returns the pairs stored.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for name in ensure_message_indexes(cursor):
+            print(f"Added index {name} to messages")
+        cursor.execute(UNREAD_COUNTS_DDL)
+        conn.start_transaction()
+        cursor.execute("DELETE FROM message_unread_counts")
+        cursor.execute(FILL_UNREAD_COUNTS_SQL)
+        pairs = cursor.rowcount
+        conn.commit()
+        return pairs
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def push_unread_count(cursor, user_id):
+    socketio.emit('chat:unread', {'unread_count': _unread_count(cursor, user_id)}, to=_user_room(user_id))
+
+
 @chat_bp.route("/users")
 def chat_users():
     print("in this route of the page")
@@ -12,34 +276,36 @@ def chat_users():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    if q:
-        cursor.execute("""
-            SELECT 
-                u.id, 
-                u.username,
-                COUNT(m.id) as unread_count
-            FROM users u
-            LEFT JOIN messages m ON m.sender_id = u.id 
-                AND m.receiver_id = %s 
-                AND m.status = 'sent'
-            WHERE u.username LIKE %s AND u.id != %s
-            GROUP BY u.id, u.username
-            ORDER BY unread_count DESC, u.username
-        """, (current_user_id, f"%{q}%", current_user_id))
+    # Unread counts come from the counter table: one key lookup per contact.
+    # Until it exists they are counted per sender from messages.
+    params = []
+    if unread_counts_ready():
+        unread_source = "message_unread_counts"
     else:
-        cursor.execute("""
-            SELECT 
-                u.id, 
-                u.username,
-                COUNT(m.id) as unread_count
-            FROM users u
-            LEFT JOIN messages m ON m.sender_id = u.id 
-                AND m.receiver_id = %s 
-                AND m.status = 'sent'
-            WHERE u.id != %s
-            GROUP BY u.id, u.username
-            ORDER BY unread_count DESC, u.username
-        """, (current_user_id, current_user_id))
+        unread_source = """(
+            SELECT receiver_id, sender_id, COUNT(*) AS unread_count
+            FROM messages
+            WHERE receiver_id = %s AND status = 'sent'
+            GROUP BY receiver_id, sender_id
+        )"""
+        params.append(current_user_id)
+    filters = "u.id != %s"
+    params += [current_user_id, current_user_id]
+    if q:
+        filters += " AND u.username LIKE %s"
+        params.append(f"%{q}%")
+
+    cursor.execute(f"""
+        SELECT
+            u.id,
+            u.username,
+            COALESCE(c.unread_count, 0) AS unread_count
+        FROM users u
+        LEFT JOIN {unread_source} c
+            ON c.receiver_id = %s AND c.sender_id = u.id
+        WHERE {filters}
+        ORDER BY unread_count DESC, u.username
+    """, params)
 
     users = cursor.fetchall()
     cursor.close()
@@ -57,41 +323,172 @@ def get_current_user():
     return jsonify({"id": user_id})
 
 
-@chat_bp.route("/messages/<int:receiver_id>")
-def chat_messages(receiver_id):
-    user = require_login()
-    sender_id = user['user_id']
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch all messages between sender and receiver
-    cursor.execute("""
+def _fetch_conversation(cursor, user_id, other_id, after_id=None):
+    """Messages between two users, optionally only those newer than after_id."""
+    query = """
         SELECT id, sender_id, receiver_id, message, created_at, status
         FROM messages
-        WHERE 
+        WHERE (
           (sender_id = %s AND receiver_id = %s)
           OR
           (sender_id = %s AND receiver_id = %s)
-        ORDER BY created_at
-    """, (sender_id, receiver_id, receiver_id, sender_id))
-    
-    messages = cursor.fetchall()
+        )
+    """
+    params = [user_id, other_id, other_id, user_id]
+    if after_id is not None:
+        query += " AND id > %s ORDER BY id"
+        params.append(after_id)
+    else:
+        query += " ORDER BY created_at"
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def _fetch_conversation_page(cursor, user_id, other_id, limit, before_id=None):
+    """
+    The `limit` newest messages between two users older than before_id
+    (newest overall without it), oldest first, plus whether older ones exist.
+    Each direction is its own bounded range on idx_conversation
+    (sender_id, receiver_id, id) instead of a scan of the OR.
+    """
+    older = " AND id < %s" if before_id is not None else ""
+    branch = f"""
+        (SELECT id, sender_id, receiver_id, message, created_at, status
+         FROM messages
+         WHERE sender_id = %s AND receiver_id = %s{older}
+         ORDER BY id DESC
+         LIMIT %s)
+    """
+    params = []
+    for sender, receiver in ((user_id, other_id), (other_id, user_id)):
+        params += [sender, receiver] + ([before_id] if before_id is not None else []) + [limit + 1]
+
+    cursor.execute(f"""
+        SELECT * FROM ({branch} UNION ALL {branch}) page
+        ORDER BY id DESC
+        LIMIT %s
+    """, params + [limit + 1])
+    rows = cursor.fetchall()
+
+    has_more = len(rows) > limit
+    messages = rows[:limit]
+    messages.reverse()
+    return messages, has_more
+
 
-    # Mark messages as read (where current user is receiver and status is 'sent')
+def _read_up_to(cursor, user_id, other_id):
+    """Highest id of user_id's messages to other_id that have been read."""
+    cursor.execute("""
+        SELECT COALESCE(MAX(id), 0) AS read_up_to
+        FROM messages
+        WHERE sender_id = %s AND receiver_id = %s AND status = 'read'
+    """, (user_id, other_id))
+    return cursor.fetchone()['read_up_to']
+
+
+def _mark_read(cursor, user_id, other_id, messages):
+    """
+    Mark the returned incoming messages read, only if any of them are unread.
+    Pushes the read receipt to the other user and the new unread count to
+    this one.
+    """
+    unread = [m['id'] for m in messages if m['receiver_id'] == user_id and m['status'] == 'sent']
+    if not unread:
+        return False
     cursor.execute("""
         UPDATE messages
         SET status = 'read'
         WHERE receiver_id = %s 
           AND sender_id = %s 
           AND status = 'sent'
-    """, (sender_id, receiver_id))
-    
-    conn.commit()
+          AND id <= %s
+    """, (user_id, other_id, max(unread)))
+    _recount_unread(cursor, user_id, other_id)
+    socketio.emit('chat:read', {'reader_id': user_id, 'read_up_to': max(unread)}, to=_user_room(other_id))
+    push_unread_count(cursor, user_id)
+    return True
+
+
+@chat_bp.route("/messages/<int:receiver_id>")
+def chat_messages(receiver_id):
+    """
+    Without parameters: the whole conversation as a list.
+    With ?limit=N and/or ?before_id=M: one page, {"messages": [...], "has_more"}
+    with the N newest messages older than M (the latest page without it).
+    With ?after_id=N: {"messages": [...newer than N], "read_up_to": id}
+    where read_up_to is the last of my messages the other user has read.
+    Adding &wait=S (max LONG_POLL_MAX_WAIT) long-polls: the request is held
+    until a new message arrives, read_up_to moves past ?read_up_to, or S
+    seconds pass. When LONG_POLL_MAX_WAITERS requests are already held it
+    answers at once with "retry_after" seconds to wait before polling again.
+    """
+    user = require_login()
+    sender_id = user['user_id']
+    after_id = request.args.get('after_id', type=int)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    before_id = request.args.get('before_id', type=int)
+    limit = request.args.get('limit', type=int)
+    if after_id is None and (before_id is not None or limit is not None):
+        limit = min(max(limit or MESSAGE_PAGE_SIZE, 1), MESSAGE_PAGE_MAX)
+        messages, has_more = _fetch_conversation_page(cursor, sender_id, receiver_id, limit, before_id)
+        # Opening the conversation (latest page) reads everything up to it
+        if before_id is None and _mark_read(cursor, sender_id, receiver_id, messages):
+            conn.commit()
+            message_events.notify(receiver_id)
+        cursor.close()
+        conn.close()
+        return jsonify({"messages": messages, "has_more": has_more})
+
+    if after_id is None:
+        messages = _fetch_conversation(cursor, sender_id, receiver_id)
+        if _mark_read(cursor, sender_id, receiver_id, messages):
+            conn.commit()
+            message_events.notify(receiver_id)
+        cursor.close()
+        conn.close()
+        return jsonify(messages)
+
+    known_read = request.args.get('read_up_to', 0, type=int)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), LONG_POLL_MAX_WAIT)
+    deadline = time.monotonic() + wait
+    busy = False
+
+    while True:
+        # Taken before querying so a message sent in between still wakes us
+        seen = message_events.version(sender_id)
+        messages = _fetch_conversation(cursor, sender_id, receiver_id, after_id)
+        read_up_to = _read_up_to(cursor, sender_id, receiver_id)
+
+        remaining = deadline - time.monotonic()
+        if messages or read_up_to > known_read or remaining <= 0:
+            break
+
+        # Do not hold a pooled connection while waiting
+        cursor.close()
+        release_request_connection()
+        woken = message_events.wait(sender_id, seen, remaining)
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+        if woken is None:
+            # Every waiter slot is taken: answer now rather than queue for a thread
+            busy = True
+            break
+        if not woken:
+            break
+
+    if _mark_read(cursor, sender_id, receiver_id, messages):
+        conn.commit()
+        message_events.notify(receiver_id)
     cursor.close()
     conn.close()
 
-    return jsonify(messages)
+    response = {"messages": messages, "read_up_to": read_up_to}
+    if busy:
+        response["retry_after"] = LONG_POLL_BUSY_RETRY
+    return jsonify(response)
 
 
 @chat_bp.route("/messages", methods=["POST"])
@@ -106,19 +503,38 @@ def send_message():
     if not receiver_id or not message:
         return jsonify({"error": "Missing receiver_id or message"}), 400
 
+    receiver_id = int(receiver_id)
+
     conn = get_db_connection()
-    cursor = conn.cursor()
+    cursor = conn.cursor(dictionary=True)
 
+    # Message and counter land together
+    conn.start_transaction()
     cursor.execute("""
         INSERT INTO messages (sender_id, receiver_id, message, created_at, status)
         VALUES (%s, %s, %s, NOW(), 'sent')
     """, (sender_id, receiver_id, message))
+    message_id = cursor.lastrowid
+    _bump_unread(cursor, receiver_id, sender_id)
 
     conn.commit()
+
+    cursor.execute("""
+        SELECT id, sender_id, receiver_id, message, created_at, status
+        FROM messages WHERE id = %s
+    """, (message_id,))
+    payload = _message_payload(cursor.fetchone())
+
+    # Receiver and the sender's other tabs
+    socketio.emit('chat:message', payload, to=_user_room(receiver_id))
+    socketio.emit('chat:message', payload, to=_user_room(sender_id))
+    push_unread_count(cursor, receiver_id)
+
     cursor.close()
     conn.close()
+    message_events.notify(receiver_id, sender_id)
 
-    return jsonify({"success": True})
+    return jsonify({"success": True, "message": payload})
 
 
 
@@ -131,15 +547,9 @@ def get_unread_count():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    # Count unread messages where current user is the receiver
-    cursor.execute("""
-        SELECT COUNT(*) as unread_count
-        FROM messages
-        WHERE receiver_id = %s AND status = 'sent'
-    """, (user_id,))
-    
-    result = cursor.fetchone()
+    # Sum of the per-sender counters where current user is the receiver
+    unread_count = _unread_count(cursor, user_id)
     cursor.close()
     conn.close()
 
-    return jsonify({"unread_count": result['unread_count']})
\ No newline at end of file
+    return jsonify({"unread_count": unread_count})
\ No newline at end of file
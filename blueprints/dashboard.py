@@ -1,5 +1,7 @@
 from imports import *
 from db_config  import get_db_connection
+from dashboard_rollup import mark_rollup_stale
+from response_cache import bump_versions
 dashboard_bp =  Blueprint('dasboard',__name__,url_prefix='/stats')
 
 
@@ -118,6 +120,8 @@ def delete_personnel():
 
         cursor.close()
         conn.close()
+        mark_rollup_stale(army_number=army_number)
+        bump_versions('personnel', 'assigned_det')
 
         return jsonify({"status": "success", "message": f"{army_number} removed from detachment"})
 
@@ -276,6 +280,8 @@ def delete_attachment(army_number):
 
         # Commit only if both queries succeed
         conn.commit()
+        mark_rollup_stale(company)
+        bump_versions('personnel')
         return jsonify({"message": "Attachment marked inactive and TD record deleted successfully"})
 
     except Exception as e:
@@ -4,7 +4,11 @@ from langchain_ollama import OllamaLLM
 import re
 import time
 import threading
+from flask import Response, current_app, stream_with_context
 from schema import USERS_SCHEMA, PERSONNEL_SCHEMA, get_schema_for_question, get_schema_summary
+from llm_scheduler import ollama_scheduler, LLMBusy, LLMTimeout
+from sql_cache import (question_sql_cache, sql_template_cache, question_shape,
+                       build_sql_template, fill_sql_template, TEMPLATE_FORMAT)
 
 ollama_bot_bp = Blueprint('bot', __name__, url_prefix='/bot')
 
@@ -12,41 +16,36 @@ print("🔵 Starting HRMS Offline SQL Flask Chat...")
 print(get_schema_summary())
 
 # -------------------------
-# CONNECT TO DATABASE
+# OLLAMA MODEL (LAZY)
 # -------------------------
-print("🔵 Connecting to database...")
-_db_start = time.time()
-
-try:
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    print(f"✅ Database connected successfully. ({time.time() - _db_start:.3f}s)")
-except mysql.connector.Error as err:
-    print(f"❌ Database connection failed: {err}")
-    exit()
-
-# -------------------------
-# LOAD OLLAMA MODEL
-# -------------------------
-print("🔵 Loading Ollama model...")
-_model_start = time.time()
-
-try:
-    llm = OllamaLLM(
-        model="llama3.2:3b",
-        temperature=0,
-        keep_alive=-1,
-        base_url="http://127.0.0.1:11434"
-    )
-    print(f"✅ Ollama model ready. ({time.time() - _model_start:.3f}s)")
-except Exception as e:
-    print("❌ Failed to load Ollama model:", e)
-    exit()
-
-
-
-
-print("🚀 Flask HRMS Chat App Ready")
+# Nothing connects at import: the app starts even when the model host or
+# the database is down. Each request takes its own pooled DB connection
+# (get_db_connection), and the LLM client is created on first use.
+OLLAMA_MODEL = "llama3.2:3b"
+OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
+
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm():
+    """Create the Ollama client on first use; raises if it cannot be created."""
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                print("🔵 Loading Ollama model...")
+                _model_start = time.time()
+                _llm = OllamaLLM(
+                    model=OLLAMA_MODEL,
+                    temperature=0,
+                    keep_alive=-1,
+                    base_url=OLLAMA_BASE_URL,
+                    # The scheduler deadline also bounds the HTTP call itself
+                    client_kwargs={"timeout": ollama_scheduler.timeout}
+                )
+                print(f"✅ Ollama model ready. ({time.time() - _model_start:.3f}s)")
+    return _llm
 
 
 # =====================================================
@@ -133,15 +132,17 @@ def extract_name_search(question: str):
 # =====================================================
 # 🔥 DUAL TABLE NAME SEARCH
 # =====================================================
-def search_name_in_both_tables(name: str):
+def search_name_in_both_tables(cursor, name: str):
     """
     Search name/army_number in users first, then personnel.
     Returns (result, source_table, sql_used)
     """
+    pattern = f"%{name}%"
+
     # Search users table first
-    sql_users = f"SELECT username, role, company FROM users WHERE username LIKE '%{name}%'"
-    print(f"🔍 Searching users: {sql_users}")
-    cursor.execute(sql_users)
+    sql_users = "SELECT username, role, company FROM users WHERE username LIKE %s"
+    print(f"🔍 Searching users: {sql_users} [{pattern}]")
+    cursor.execute(sql_users, (pattern,))
     result = cursor.fetchall()
 
     if result:
@@ -149,9 +150,9 @@ def search_name_in_both_tables(name: str):
         return result, "users", sql_users
 
     # Not found in users → search personnel
-    sql_personnel = f"SELECT army_number, name, `rank`, company FROM personnel WHERE name LIKE '%{name}%' OR army_number LIKE '%{name}%'"
-    print(f"🔍 Searching personnel: {sql_personnel}")
-    cursor.execute(sql_personnel)
+    sql_personnel = "SELECT army_number, name, `rank`, company FROM personnel WHERE name LIKE %s OR army_number LIKE %s"
+    print(f"🔍 Searching personnel: {sql_personnel} [{pattern}]")
+    cursor.execute(sql_personnel, (pattern, pattern))
     result = cursor.fetchall()
 
     if result:
@@ -201,25 +202,44 @@ def format_result(result, generated_sql):
 
 
 # -------------------------
-# CHAT API
+# CHAT PIPELINE
 # -------------------------
-@ollama_bot_bp.route("/chat", methods=["POST"])
-def chat():
+def build_prompt(schema_to_use, question):
+    return f"""
+You are an expert MySQL query generator for HRMS.
 
-    _total_start = time.time()
-    print("\n================ NEW REQUEST ================")
+STRICT RULES:
+1. ONLY generate SELECT queries.
+2. NEVER use DELETE, UPDATE, INSERT, DROP, ALTER.
+3. NEVER select password column.
+4. Return ONLY the SQL query, nothing else.
+5. ALWAYS replace placeholders with actual values from the question.
+6. Company names are case sensitive:
+   - '1 Company'
+   - '2 Company'
+   - '3 Company'
+   - 'HQ Company'
+7. CRITICAL: `rank` is a reserved MySQL word — ALWAYS wrap in backticks: `rank`
 
-    # -------------------------
-    # STEP 1: Extract Question
-    # -------------------------
-    _step_start = time.time()
-    question = request.json.get("message", "").strip()
-    print("🔵 Original User Question:", question)
-    print(f"⏱️  [Step 1] Extract question: {time.time() - _step_start:.4f}s")
+Database Information:
+{schema_to_use}
 
-    if not question:
-        print("❌ Empty question received.")
-        return jsonify({"error": "Empty question"}), 400
+User Question:
+{question}
+
+Return ONLY SQL query:
+"""
+
+
+def run_chat_pipeline(question, stream_sql=False):
+    """
+    The /bot/chat steps as a generator of (event, data) pairs.
+    Progress events: "routing", "sql_token" (only with stream_sql), "sql",
+    "executed", "rows". It always ends with "answer" {"answer"[, "status"]}
+    or "error" {"error", "status"}. /bot/chat only looks at the last event;
+    /bot/chat/stream forwards them all as Server-Sent Events.
+    """
+    _total_start = time.time()
 
     # -------------------------
     # STEP 2: Normalize
@@ -237,7 +257,8 @@ def chat():
         print(f"💬 Returning greeting response.")
         print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
         print("=============================================\n")
-        return jsonify({"answer": GREETING_RESPONSE})
+        yield "answer", {"answer": GREETING_RESPONSE}
+        return
 
     print(f"⏱️  [Step 2.5] Greeting check: {time.time() - _step_start:.4f}s")
 
@@ -252,54 +273,75 @@ def chat():
         # ========================
         # PATH A: LLM FLOW
         # ========================
+        yield "routing", {"path": "llm", "keyword": matched_keyword, "table": matched_table}
 
         # STEP 4: Build Prompt
         _step_start = time.time()
-        prompt = f"""
-You are an expert MySQL query generator for HRMS.
-
-STRICT RULES:
-1. ONLY generate SELECT queries.
-2. NEVER use DELETE, UPDATE, INSERT, DROP, ALTER.
-3. NEVER select password column.
-4. Return ONLY the SQL query, nothing else.
-5. ALWAYS replace placeholders with actual values from the question.
-6. Company names are case sensitive:
-   - '1 Company'
-   - '2 Company'
-   - '3 Company'
-   - 'HQ Company'
-7. CRITICAL: `rank` is a reserved MySQL word — ALWAYS wrap in backticks: `rank`
-
-Database Information:
-{schema_to_use}
-
-User Question:
-{question}
-
-Return ONLY SQL query:
-"""
+        prompt = build_prompt(schema_to_use, question)
         print(f"⏱️  [Step 4] Prompt built (keyword: '{matched_keyword}' → table: '{matched_table}'): {time.time() - _step_start:.4f}s")
 
-        # STEP 5: LLM Call
-        print("🔵 Sending prompt to Ollama LLM...")
-        _step_start = time.time()
-        try:
-            generated_sql = llm.invoke(prompt)
-        except Exception as e:
-            print("❌ Error calling Ollama:", e)
-            return jsonify({"error": str(e)}), 500
-        print(f"⏱️  [Step 5] LLM generation: {time.time() - _step_start:.4f}s")
-        print("\n🟡 Raw LLM Output:")
-        print(generated_sql)
+        # STEP 5: LLM Call (skipped for questions answered before, or
+        # with the same shape as one answered before)
+        llm_seconds = None
+        sql_params = None
+        shape, entities = question_shape(question)
+        template = None
+        generated_sql = question_sql_cache.get(question, schema_to_use)
+        if not generated_sql and entities:
+            template = sql_template_cache.get_entry(shape, schema_to_use)
+            sql_params = fill_sql_template(template, entities) if template else None
+            if sql_params is None:
+                template = None
+        if generated_sql:
+            print("⚡ LLM SKIPPED — using cached SQL for this question")
+            sql_source = "cache"
+        elif template:
+            generated_sql = template['sql']
+            print(f"⚡ LLM SKIPPED — template '{shape}' with values {sql_params}")
+            sql_source = "template"
+        else:
+            print("🔵 Sending prompt to Ollama LLM...")
+            sql_source = "llm"
+            _step_start = time.time()
+            # Both go through the scheduler: bounded concurrency and queue,
+            # and identical prompts in flight share one model call
+            try:
+                if stream_sql:
+                    chunks = []
+                    with ollama_scheduler.slot():
+                        for chunk in get_llm().stream(prompt):
+                            chunks.append(chunk)
+                            yield "sql_token", {"text": chunk}
+                    generated_sql = "".join(chunks)
+                else:
+                    generated_sql = ollama_scheduler.run(prompt, lambda: get_llm().invoke(prompt))
+            except LLMBusy as e:
+                print("❌ LLM queue full:", e)
+                yield "error", {"error": "The assistant is busy, please try again in a moment.", "status": 503}
+                return
+            except LLMTimeout as e:
+                print("❌ LLM timed out:", e)
+                yield "error", {"error": "The assistant took too long to answer, please try again.", "status": 504}
+                return
+            except Exception as e:
+                print("❌ Error calling Ollama:", e)
+                yield "error", {"error": str(e), "status": 500}
+                return
+            llm_seconds = time.time() - _step_start
+            print(f"⏱️  [Step 5] LLM generation: {llm_seconds:.4f}s")
+            print("\n🟡 Raw LLM Output:")
+            print(generated_sql)
+
+            # STEP 6: Clean SQL
+            _step_start = time.time()
+            generated_sql = re.sub(r"```sql|```", "", generated_sql).strip()
+            generated_sql = re.sub(r"^SQL:\s*", "", generated_sql, flags=re.IGNORECASE)
+            print(f"⏱️  [Step 6] SQL cleaning: {time.time() - _step_start:.4f}s")
+            print("\n🟢 Cleaned SQL:")
+            print(generated_sql)
 
-        # STEP 6: Clean SQL
-        _step_start = time.time()
-        generated_sql = re.sub(r"```sql|```", "", generated_sql).strip()
-        generated_sql = re.sub(r"^SQL:\s*", "", generated_sql, flags=re.IGNORECASE)
-        print(f"⏱️  [Step 6] SQL cleaning: {time.time() - _step_start:.4f}s")
-        print("\n🟢 Cleaned SQL:")
-        print(generated_sql)
+        yield "sql", {"sql": generated_sql, "source": sql_source,
+                      "llm_seconds": round(llm_seconds, 3) if llm_seconds is not None else None}
 
         # STEP 7: Safety Checks
         _step_start = time.time()
@@ -307,27 +349,52 @@ Return ONLY SQL query:
         dangerous = ['delete', 'update', 'insert', 'drop', 'alter', 'create', 'truncate']
         if any(word in sql_lower for word in dangerous):
             print("❌ Dangerous operation detected.")
-            return jsonify({"error": "Only SELECT allowed"}), 400
+            yield "error", {"error": "Only SELECT allowed", "status": 400}
+            return
         if not sql_lower.startswith("select"):
             print("❌ Query does not start with SELECT.")
-            return jsonify({"error": "Invalid query"}), 400
+            yield "error", {"error": "Invalid query", "status": 400}
+            return
         print(f"⏱️  [Step 7] Safety checks: {time.time() - _step_start:.4f}s")
         print("✅ Safety checks passed.")
 
         # STEP 8: Execute Query
         print("🔵 Executing SQL on database...")
         _step_start = time.time()
+        # Taken only now, so no pooled connection sits idle during the LLM call
+        conn = get_db_connection()
+        if conn is None:
+            yield "error", {"error": "Database connection failed", "status": 503}
+            return
         try:
-            cursor.execute(generated_sql)
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(generated_sql, sql_params)
             result = cursor.fetchall()
+            cursor.close()
             print(f"⏱️  [Step 8] DB execution: {time.time() - _step_start:.4f}s")
             print(f"📊 Found {len(result)} record(s).")
         except mysql.connector.Error as e:
             print("❌ MySQL Error:", e)
-            return jsonify({"error": str(e)}), 500
+            if template:
+                sql_template_cache.delete(shape, schema_to_use)
+            elif llm_seconds is None:
+                question_sql_cache.delete(question, schema_to_use)
+            yield "error", {"error": str(e), "status": 500}
+            return
         except Exception as e:
             print("❌ Unexpected Error:", e)
-            return jsonify({"error": str(e)}), 500
+            yield "error", {"error": str(e), "status": 500}
+            return
+        yield "executed", {"row_count": len(result), "seconds": round(time.time() - _step_start, 4)}
+        yield "rows", {"rows": result}
+
+        # Only SQL that passed the checks and ran is worth reusing
+        if llm_seconds is not None:
+            question_sql_cache.set(question, schema_to_use, generated_sql, llm_seconds)
+            sql_template = build_sql_template(generated_sql, entities)
+            if sql_template:
+                sql_template_cache.set(shape, schema_to_use, sql_template[0], llm_seconds,
+                                       slots=sql_template[1], format=TEMPLATE_FORMAT)
 
         # STEP 9: Format & Return
         _step_start = time.time()
@@ -336,38 +403,119 @@ Return ONLY SQL query:
         print(f"💬 Natural Answer:\n{natural_answer}")
         print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
         print("=============================================\n")
-        return jsonify({"answer": natural_answer})
+        yield "answer", {"answer": natural_answer}
+        return
 
-    else:
-        # ========================
-        # PATH B: NAME SEARCH
-        # ========================
+    # ========================
+    # PATH B: NAME SEARCH
+    # ========================
+    _step_start = time.time()
+    name = extract_name_search(question)
+    print(f"⏱️  [Step 3.5] Name search check: {time.time() - _step_start:.4f}s")
+
+    if name:
+        print(f"⚡ LLM SKIPPED — Searching both tables for: '{name}'")
+        yield "routing", {"path": "name_search", "name": name}
         _step_start = time.time()
-        name = extract_name_search(question)
-        print(f"⏱️  [Step 3.5] Name search check: {time.time() - _step_start:.4f}s")
 
-        if name:
-            print(f"⚡ LLM SKIPPED — Searching both tables for: '{name}'")
-            _step_start = time.time()
+        conn = get_db_connection()
+        if conn is None:
+            yield "error", {"error": "Database connection failed", "status": 503}
+            return
+        try:
+            cursor = conn.cursor(dictionary=True)
+            result, source_table, generated_sql = search_name_in_both_tables(cursor, name)
+            cursor.close()
+        except mysql.connector.Error as e:
+            print("❌ MySQL Error:", e)
+            yield "error", {"error": str(e), "status": 500}
+            return
+        print(f"⏱️  [Step 4 - Dual Search] DB execution: {time.time() - _step_start:.4f}s")
+        yield "sql", {"sql": generated_sql, "source": source_table, "llm_seconds": None}
+        yield "executed", {"row_count": len(result), "seconds": round(time.time() - _step_start, 4)}
+        yield "rows", {"rows": result}
 
-            try:
-                result, source_table, generated_sql = search_name_in_both_tables(name)
-                print(f"⏱️  [Step 4 - Dual Search] DB execution: {time.time() - _step_start:.4f}s")
+        natural_answer = format_result(result, generated_sql)
+        print(f"💬 Natural Answer:\n{natural_answer}")
+        print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
+        print("=============================================\n")
+        yield "answer", {"answer": natural_answer}
+        return
 
-                natural_answer = format_result(result, generated_sql)
-                print(f"💬 Natural Answer:\n{natural_answer}")
-                print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
-                print("=============================================\n")
-                return jsonify({"answer": natural_answer})
+    # ========================
+    # PATH C: NO MATCH AT ALL
+    # ========================
+    print("❌ No keyword or name pattern matched.")
+    print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
+    print("=============================================\n")
+    yield "answer", {"answer": "i could not understand your quetion", "status": 400}
 
-            except mysql.connector.Error as e:
-                print("❌ MySQL Error:", e)
-                return jsonify({"error": str(e)}), 500
 
-        # ========================
-        # PATH C: NO MATCH AT ALL
-        # ========================
-        print("❌ No keyword or name pattern matched.")
-        print(f"\n🏁 TOTAL request time: {time.time() - _total_start:.4f}s")
-        print("=============================================\n")
-        return jsonify({"answer": "i could not understand your quetion"}), 400
\ No newline at end of file
+def _extract_question():
+    """STEP 1: the question from the JSON body (or ?message= for EventSource GETs)."""
+    _step_start = time.time()
+    data = request.get_json(silent=True) or {}
+    question = (data.get("message") or request.args.get("message") or "").strip()
+    print("🔵 Original User Question:", question)
+    print(f"⏱️  [Step 1] Extract question: {time.time() - _step_start:.4f}s")
+    return question
+
+
+# -------------------------
+# CHAT API
+# -------------------------
+@ollama_bot_bp.route("/chat", methods=["POST"])
+def chat():
+    print("\n================ NEW REQUEST ================")
+
+    question = _extract_question()
+    if not question:
+        print("❌ Empty question received.")
+        return jsonify({"error": "Empty question"}), 400
+
+    event, data = None, None
+    for event, data in run_chat_pipeline(question):
+        pass
+
+    if event == "answer":
+        return jsonify({"answer": data["answer"]}), data.get("status", 200)
+    return jsonify({"error": data["error"]}), data["status"]
+
+
+ROWS_CHUNK_SIZE = 50
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+
+@ollama_bot_bp.route("/chat/stream", methods=["GET", "POST"])
+def chat_stream():
+    """
+    Same pipeline as /bot/chat, streamed as Server-Sent Events: routing,
+    SQL tokens as the model writes them, execution timing, rows in chunks
+    of ROWS_CHUNK_SIZE, then the formatted answer (or an error).
+    """
+    print("\n================ NEW STREAM REQUEST ================")
+
+    question = _extract_question()
+    if not question:
+        print("❌ Empty question received.")
+        return jsonify({"error": "Empty question"}), 400
+
+    def generate():
+        # Sent at once so the client sees the first byte immediately
+        yield _sse("accepted", {"question": question})
+        for event, data in run_chat_pipeline(question, stream_sql=True):
+            if event == "rows":
+                rows = data["rows"]
+                for start in range(0, len(rows), ROWS_CHUNK_SIZE):
+                    yield _sse("rows", {"offset": start, "rows": rows[start:start + ROWS_CHUNK_SIZE]})
+            else:
+                yield _sse(event, data)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,4 +1,6 @@
 from imports import *
+from dashboard_rollup import mark_rollup_stale
+from response_cache import bump_versions
 
 oncourses_bp = Blueprint('oncourses_bp', __name__, url_prefix='/oncourses')
 
@@ -40,6 +42,8 @@ def add_on_course():
             institute_name
         ))
         conn.commit()
+        mark_rollup_stale(army_number=army_number)
+        bump_versions('candidate_on_courses')
         return jsonify({"status": "success"}), 200
     except Exception as e:
         conn.rollback()
@@ -1,6 +1,10 @@
 from imports import *
 from middleware import require_login
+from dashboard_rollup import mark_rollup_stale
+from response_cache import VersionedCache, bump_versions
+from blueprints.weight_ms import store_weight_fitness
 import datetime
+from collections import Counter
 
 personnel_info = Blueprint('personal', __name__, url_prefix='/personnel_information')
 
@@ -39,188 +43,312 @@ def dashboard():
         cursor.close()
         connection.close()
 
-def insert_sports_data(cursor, personnel_id, army_number, data):
-    """Insert sports data into personnel_sports table"""
-   
-    sports_list = data.get('sports', [])
-    for sport in sports_list:
-        cursor.execute("""
-            INSERT INTO personnel_sports (personnel_id, army_number, sport_type, sport_name)
-            VALUES (%s, %s, %s, %s)
-        """, (
-            personnel_id,
-            army_number,
-            sport,
-            sport
-        ))
-   
+def _number(value, cast):
+    return cast(value) if value else None
+
+
+# Child tables of a personnel dossier: payload key, whether rows carry a
+# sr_no (their 1-based position in the submitted list), the columns after
+# personnel_id/army_number/sr_no, and how to build them from one item
+PERSONNEL_CHILD_TABLES = [
+    {
+        'table': 'courses', 'key': 'courses', 'sr_no': True,
+        'columns': ['course', 'from_date', 'to_date', 'institute', 'grading', 'remarks'],
+        'values': lambda course: (
+            course.get('course', ''),
+            course.get('courseFrom', None),
+            course.get('courseTo', None),
+            course.get('courseInstitute', ''),
+            course.get('courseGrading', ''),
+            course.get('courseRemarks', '')
+        )
+    },
+    {
+        'table': 'units_served', 'key': 'units', 'sr_no': True,
+        'columns': ['unit', 'from_date', 'to_date', 'duty_performed'],
+        'values': lambda unit: (
+            unit.get('unit', ''),
+            unit.get('unitFrom', None),
+            unit.get('unitTo', None),
+            unit.get('unitDuty', '')
+        )
+    },
+    {
+        'table': 'loans', 'key': 'loans', 'sr_no': True,
+        'columns': ['loan_type', 'total_amount', 'bank_details', 'emi_per_month', 'pending', 'remarks'],
+        'values': lambda loan: (
+            loan.get('loanType', ''),
+            _number(loan.get('loanAmount'), float),
+            loan.get('loanBank', ''),
+            _number(loan.get('loanEMI'), float),
+            _number(loan.get('loanPending'), float),
+            loan.get('loanRemarks', '')
+        )
+    },
+    {
+        'table': 'punishments', 'key': 'punishments', 'sr_no': True,
+        'columns': ['punishment_date', 'punishment', 'aa_sec', 'remarks'],
+        'values': lambda punishment: (
+            punishment.get('punishmentDate', None),
+            punishment.get('punishment', ''),
+            punishment.get('punishmentAASec', ''),
+            punishment.get('punishmentRemarks', '')
+        )
+    },
+    {
+        'table': 'detailed_courses', 'key': 'detailedCourses', 'sr_no': True,
+        'columns': ['course_name', 'from_date', 'to_date', 'remarks'],
+        'values': lambda detailed: (
+            detailed.get('detailedCourseName', ''),
+            detailed.get('detailedCourseFrom', None),
+            detailed.get('detailedCourseTo', None),
+            detailed.get('detailedCourseRemarks', '')
+        )
+    },
+    {
+        'table': 'leave_details', 'key': 'leaves', 'sr_no': True,
+        'columns': ['year', 'al_days', 'cl_days', 'aal_days', 'total_days', 'remarks'],
+        'values': lambda leave: (
+            leave.get('leaveYear', ''),
+            _number(leave.get('leaveAL'), int),
+            _number(leave.get('leaveCL'), int),
+            _number(leave.get('leaveAAL'), int),
+            _number(leave.get('leaveTotal'), int),
+            leave.get('leaveRemarks', '')
+        )
+    },
+    {
+        'table': 'family_members', 'key': 'family', 'sr_no': False,
+        'columns': ['relation', 'name', 'date_of_birth', 'uid_no', 'part_ii_order'],
+        'values': lambda family: (
+            family.get('familyRelation', ''),
+            family.get('familyName', ''),
+            family.get('familyDOB', None),
+            family.get('familyUID', ''),
+            family.get('familyPartII', '')
+        )
+    },
+    {
+        'table': 'children', 'key': 'children', 'sr_no': True,
+        'columns': ['name', 'date_of_birth', 'class', 'part_ii_order', 'uid_no'],
+        'values': lambda child: (
+            child.get('childName', ''),
+            child.get('childDOB', None),
+            child.get('childClass', ''),
+            child.get('childPartII', ''),
+            child.get('childUID', '')
+        )
+    },
+    {
+        'table': 'mobile_phones', 'key': 'mobiles', 'sr_no': True,
+        'columns': ['type', 'number', 'service_provider', 'remarks'],
+        'values': lambda mobile: (
+            mobile.get('mobileType', ''),
+            mobile.get('mobileNumber', ''),
+            mobile.get('mobileProvider', ''),
+            mobile.get('mobileRemarks', '')
+        )
+    },
+    {
+        'table': 'marital_discord_cases', 'key': 'discordCases', 'sr_no': True,
+        'columns': ['case_no', 'amount_to_pay', 'sanction_letter_no'],
+        'values': lambda discord: (
+            discord.get('discordCaseNo', ''),
+            _number(discord.get('discordAmount'), float),
+            discord.get('discordSanction', '')
+        )
+    },
+]
+
+
+def child_table_rows(spec, data):
+    """Rows for one child table from the payload, skipping empty items; sr_no first when the table has one."""
+    rows = []
+    for idx, item in enumerate(data.get(spec['key'], []), 1):
+        if any(item.values()):
+            values = spec['values'](item)
+            rows.append((idx,) + values if spec['sr_no'] else values)
+    return rows
+
+
+def child_table_columns(spec):
+    return ['personnel_id', 'army_number'] + (['sr_no'] if spec['sr_no'] else []) + spec['columns']
+
+
+def insert_child_rows(cursor, table, columns, rows):
+    """One multi-row INSERT for all rows (executemany batches INSERT ... VALUES)."""
+    if not rows:
+        return
+    cursor.executemany(f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        VALUES ({', '.join(['%s'] * len(columns))})
+    """, rows)
+
+
+def sports_rows(data):
+    """(sport_type, sport_name) pairs for personnel_sports."""
+    rows = [(sport, sport) for sport in data.get('sports', [])]
     other_sports = data.get('otherSports', '')
     if other_sports:
-        additional_sports = [sport.strip() for sport in other_sports.split(',') if sport.strip()]
-        for sport in additional_sports:
-            cursor.execute("""
-                INSERT INTO personnel_sports (personnel_id, army_number, sport_type, sport_name)
-                VALUES (%s, %s, %s, %s)
-            """, (
-                personnel_id,
-                army_number,
-                'Other',
-                sport
-            ))
+        rows += [('Other', sport.strip()) for sport in other_sports.split(',') if sport.strip()]
+    return rows
+
+
+def insert_sports_data(cursor, personnel_id, army_number, data):
+    """Insert sports data into personnel_sports table"""
+    insert_child_rows(
+        cursor, 'personnel_sports',
+        ['personnel_id', 'army_number', 'sport_type', 'sport_name'],
+        [(personnel_id, army_number) + row for row in sports_rows(data)]
+    )
 
 def insert_dynamic_data(cursor, personnel_id, army_number, data):
-    """Insert dynamic data into related tables"""
-    
-    # Insert courses
-    for idx, course in enumerate(data.get('courses', []), 1):
-        if any(course.values()):
-            cursor.execute("""
-                INSERT INTO courses (personnel_id, army_number, sr_no, course, from_date, to_date, institute, grading, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                course.get('course', ''),
-                course.get('courseFrom', None),
-                course.get('courseTo', None),
-                course.get('courseInstitute', ''),
-                course.get('courseGrading', ''),
-                course.get('courseRemarks', '')
-            ))
-    
-    # Insert units
-    for idx, unit in enumerate(data.get('units', []), 1):
-        if any(unit.values()):
-            cursor.execute("""
-                INSERT INTO units_served (personnel_id, army_number, sr_no, unit, from_date, to_date, duty_performed)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                unit.get('unit', ''),
-                unit.get('unitFrom', None),
-                unit.get('unitTo', None),
-                unit.get('unitDuty', '')
-            ))
-    
-    # Insert loans
-    for idx, loan in enumerate(data.get('loans', []), 1):
-        if any(loan.values()):
-            cursor.execute("""
-                INSERT INTO loans (personnel_id, army_number, sr_no, loan_type, total_amount, bank_details, emi_per_month, pending, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                loan.get('loanType', ''),
-                float(loan.get('loanAmount', 0)) if loan.get('loanAmount') else None,
-                loan.get('loanBank', ''),
-                float(loan.get('loanEMI', 0)) if loan.get('loanEMI') else None,
-                float(loan.get('loanPending', 0)) if loan.get('loanPending') else None,
-                loan.get('loanRemarks', '')
-            ))
-    
-    # Insert punishments
-    for idx, punishment in enumerate(data.get('punishments', []), 1):
-        if any(punishment.values()):
-            cursor.execute("""
-                INSERT INTO punishments (personnel_id, army_number, sr_no, punishment_date, punishment, aa_sec, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                punishment.get('punishmentDate', None),
-                punishment.get('punishment', ''),
-                punishment.get('punishmentAASec', ''),
-                punishment.get('punishmentRemarks', '')
-            ))
-    
-    # Insert detailed courses
-    for idx, detailed in enumerate(data.get('detailedCourses', []), 1):
-        if any(detailed.values()):
-            cursor.execute("""
-                INSERT INTO detailed_courses (personnel_id, army_number, sr_no, course_name, from_date, to_date, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                detailed.get('detailedCourseName', ''),
-                detailed.get('detailedCourseFrom', None),
-                detailed.get('detailedCourseTo', None),
-                detailed.get('detailedCourseRemarks', '')
-            ))
-    
-    # Insert leaves
-    for idx, leave in enumerate(data.get('leaves', []), 1):
-        if any(leave.values()):
-            cursor.execute("""
-                INSERT INTO leave_details (personnel_id, army_number, sr_no, year, al_days, cl_days, aal_days, total_days, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                leave.get('leaveYear', ''),
-                int(leave.get('leaveAL', 0)) if leave.get('leaveAL') else None,
-                int(leave.get('leaveCL', 0)) if leave.get('leaveCL') else None,
-                int(leave.get('leaveAAL', 0)) if leave.get('leaveAAL') else None,
-                int(leave.get('leaveTotal', 0)) if leave.get('leaveTotal') else None,
-                leave.get('leaveRemarks', '')
-            ))
-    
-    # Insert family members
-    for idx, family in enumerate(data.get('family', []), 1):
-        if any(family.values()):
-            cursor.execute("""
-                INSERT INTO family_members (personnel_id, army_number, relation, name, date_of_birth, uid_no, part_ii_order)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number,
-                family.get('familyRelation', ''),
-                family.get('familyName', ''),
-                family.get('familyDOB', None),
-                family.get('familyUID', ''),
-                family.get('familyPartII', '')
-            ))
-    
-    # Insert children
-    for idx, child in enumerate(data.get('children', []), 1):
-        if any(child.values()):
-            cursor.execute("""
-                INSERT INTO children (personnel_id, army_number, sr_no, name, date_of_birth, class, part_ii_order, uid_no)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                child.get('childName', ''),
-                child.get('childDOB', None),
-                child.get('childClass', ''),
-                child.get('childPartII', ''),
-                child.get('childUID', '')
-            ))
-    
-    # Insert mobiles
-    for idx, mobile in enumerate(data.get('mobiles', []), 1):
-        if any(mobile.values()):
-            cursor.execute("""
-                INSERT INTO mobile_phones (personnel_id, army_number, sr_no, type, number, service_provider, remarks)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                mobile.get('mobileType', ''),
-                mobile.get('mobileNumber', ''),
-                mobile.get('mobileProvider', ''),
-                mobile.get('mobileRemarks', '')
-            ))
-    
-    # Insert discord cases
-    for idx, discord in enumerate(data.get('discordCases', []), 1):
-        if any(discord.values()):
-            cursor.execute("""
-                INSERT INTO marital_discord_cases (personnel_id, army_number, sr_no, case_no, amount_to_pay, sanction_letter_no)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                personnel_id, army_number, idx,
-                discord.get('discordCaseNo', ''),
-                float(discord.get('discordAmount', 0)) if discord.get('discordAmount') else None,
-                discord.get('discordSanction', '')
-            ))
+    """Insert dynamic data into related tables, one multi-row INSERT per table"""
+    for spec in PERSONNEL_CHILD_TABLES:
+        insert_child_rows(
+            cursor, spec['table'], child_table_columns(spec),
+            [(personnel_id, army_number) + row for row in child_table_rows(spec, data)]
+        )
     
     # Insert sports data
     insert_sports_data(cursor, personnel_id, army_number, data)
 
+def _is_number(value):
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _comparable(value):
+    """
+    Normalise a stored or submitted value so unchanged rows compare equal.
+    An empty form field is NULL, which is how an optional DATE column stores it.
+    """
+    if value == '':
+        return None
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if _is_number(value):
+        return float(value)
+    return value
+
+
+def _same_value(stored, submitted):
+    """
+    Whether a submitted value leaves the stored one unchanged. Form values
+    arrive as strings, so a numeric-looking string is read as a number when
+    the other side is one ('2024' matches 2024 and 2024.0); string against
+    string stays an exact match, keeping '0123' and '123' apart.
+    """
+    stored, submitted = _comparable(stored), _comparable(submitted)
+    if isinstance(stored, float) != isinstance(submitted, float):
+        try:
+            return float(stored) == float(submitted)
+        except (TypeError, ValueError):
+            return False
+    return stored == submitted
+
+
+def sync_child_rows(cursor, table, columns, personnel_id, army_number, rows, keyed=True):
+    """
+    Bring one child table in line with the submitted rows, writing only the
+    difference. With keyed=True each row starts with its sr_no and is matched
+    on it; otherwise rows are matched by position against the stored rows in
+    id order. Expects a tuple cursor. Returns (inserted, updated, deleted).
+    """
+    match_columns = (['sr_no'] if keyed else []) + columns
+    cursor.execute(
+        f"SELECT id, {', '.join(f'`{c}`' for c in match_columns)} FROM {table} "
+        f"WHERE personnel_id = %s ORDER BY id",
+        (personnel_id,)
+    )
+
+    stored = {}
+    stale_ids = []
+    for position, (row_id, *values) in enumerate(cursor.fetchall(), 1):
+        key = values[0] if keyed else position
+        if key is None or key in stored:
+            stale_ids.append(row_id)
+            continue
+        stored[key] = (row_id, tuple(values[1:] if keyed else values))
+
+    inserts = []
+    updates = []
+    for position, row in enumerate(rows, 1):
+        key = row[0] if keyed else position
+        values = tuple(row[1:] if keyed else row)
+        current = stored.pop(key, None)
+        if current is None:
+            inserts.append((personnel_id, army_number) + tuple(row))
+        elif not all(map(_same_value, current[1], values)):
+            updates.append(values + (current[0],))
+    stale_ids += [row_id for row_id, _ in stored.values()]
+
+    if stale_ids:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(stale_ids))})",
+            stale_ids
+        )
+    if updates:
+        cursor.executemany(
+            f"UPDATE {table} SET {', '.join(f'`{c}` = %s' for c in columns)} WHERE id = %s",
+            updates
+        )
+    insert_child_rows(cursor, table, ['personnel_id', 'army_number'] + match_columns, inserts)
+    return len(inserts), len(updates), len(stale_ids)
+
+
+def sync_sports_data(cursor, personnel_id, army_number, data):
+    """Sync personnel_sports as a multiset of (sport_type, sport_name). Returns (inserted, deleted)."""
+    cursor.execute(
+        "SELECT id, sport_type, sport_name FROM personnel_sports WHERE personnel_id = %s ORDER BY id",
+        (personnel_id,)
+    )
+    wanted = Counter(sports_rows(data))
+    stale_ids = []
+    for row_id, sport_type, sport_name in cursor.fetchall():
+        if wanted[(sport_type, sport_name)] > 0:
+            wanted[(sport_type, sport_name)] -= 1
+        else:
+            stale_ids.append(row_id)
+
+    if stale_ids:
+        cursor.execute(
+            f"DELETE FROM personnel_sports WHERE id IN ({', '.join(['%s'] * len(stale_ids))})",
+            stale_ids
+        )
+    inserts = [
+        (personnel_id, army_number, sport_type, sport_name)
+        for (sport_type, sport_name), count in wanted.items()
+        for _ in range(count)
+    ]
+    insert_child_rows(
+        cursor, 'personnel_sports',
+        ['personnel_id', 'army_number', 'sport_type', 'sport_name'],
+        inserts
+    )
+    return len(inserts), len(stale_ids)
+
+
+def sync_dynamic_data(cursor, personnel_id, army_number, data):
+    """
+    Update path counterpart of insert_dynamic_data: diff the submitted child
+    rows against the stored ones and emit only the needed INSERT/UPDATE/DELETE.
+    Returns {table: (inserted, updated, deleted)} for tables that changed.
+    """
+    changes = {}
+    for spec in PERSONNEL_CHILD_TABLES:
+        counts = sync_child_rows(
+            cursor, spec['table'], spec['columns'], personnel_id, army_number,
+            child_table_rows(spec, data), keyed=spec['sr_no']
+        )
+        if any(counts):
+            changes[spec['table']] = counts
+
+    inserted, deleted = sync_sports_data(cursor, personnel_id, army_number, data)
+    if inserted or deleted:
+        changes['personnel_sports'] = (inserted, 0, deleted)
+    return changes
+
+
 def delete_related_records(cursor, personnel_id, army_number):
     """Delete all related records for a personnel before updating/deleting"""
     tables = [
@@ -505,6 +633,9 @@ def create_personnel():
     try:
         data = request.get_json()
         print("Received data:", data)
+
+        # The connection autocommits; keep the dossier and its child rows atomic
+        connection.start_transaction()
         
        
         def get_value(key, default=None):
@@ -693,8 +824,11 @@ def create_personnel():
                 restrictions
             )
             cursor.execute(weight_query, weight_values)
+            store_weight_fitness(connection, [army_number])
 
         connection.commit()
+        mark_rollup_stale(get_value('company'))
+        bump_versions('personnel', 'units_served', 'loans', 'weight_info')
         return jsonify({'success': True, 'personnel_id': personnel_id}), 201
     except Error as e:
         connection.rollback()
@@ -943,171 +1077,195 @@ def update_personnel_page():
     """Render the update personnel page"""
     return render_template('/personnel_info/update.html', active_tab='update-personnel')
 
-@personnel_info.route('/api/personnel/search/<army_number>', methods=['GET'])
-def search_personnel(army_number):
-    """Search for personnel by army number and return all details"""
+# Dossier section -> child table, all fetched with the personnel row in one query
+DOSSIER_SECTIONS = {
+    'courses': 'courses',
+    'units': 'units_served',
+    'loans': 'loans',
+    'punishments': 'punishments',
+    'detailed_courses': 'detailed_courses',
+    'leaves': 'leave_details',
+    'family': 'family_members',
+    'children': 'children',
+    'mobiles': 'mobile_phones',
+    'discord_cases': 'marital_discord_cases'
+}
+
+PERSONNEL_DATE_FIELDS = ['date_of_birth', 'date_of_enrollment', 'date_of_tos', 'date_of_tors',
+                         'i_card_date', 'bpet_date', 'kin_marriage_date', 'vehicle_purchase_date',
+                         'license_issue_date', 'license_expiry_date', 'folder_prepared_on',
+                         'prior_station_date', 'last_recat_bd_date', 'next_recat_due']
+
+DOSSIER_CACHE_ENABLED = True
+DOSSIER_CACHE_TTL = 300  # seconds
+
+# army_number -> dossier; dropped by update/delete and by writes to these tables
+DOSSIER_TABLES = ('personnel', 'weight_info', 'units_served', 'loans')
+dossier_cache = VersionedCache(max_entries=256, ttl=DOSSIER_CACHE_TTL)
+
+_dossier_columns = None
+
+
+def _get_dossier_columns(cursor):
+    """{table: [(column, data_type)]} for the child tables, read once per process."""
+    global _dossier_columns
+    if _dossier_columns is None:
+        tables = list(DOSSIER_SECTIONS.values())
+        cursor.execute(f"""
+            SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """, tables)
+        columns = {table: [] for table in tables}
+        for row in cursor.fetchall():
+            columns[row['TABLE_NAME']].append((row['COLUMN_NAME'], row['DATA_TYPE'].lower()))
+        _dossier_columns = columns
+    return _dossier_columns
+
+
+def _json_rows(raw, columns):
+    """Decode a JSON_ARRAYAGG column back into rows typed like a normal SELECT * fetch."""
+    if raw is None:
+        return []
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode('utf-8')
+    rows = json.loads(raw, parse_float=Decimal)
+
+    types = dict(columns)
+    for row in rows:
+        for column, value in row.items():
+            if value is None:
+                continue
+            data_type = types.get(column)
+            if data_type in ('float', 'double'):
+                row[column] = float(value)
+            elif data_type in ('datetime', 'timestamp'):
+                fmt = '%Y-%m-%d %H:%M:%S.%f' if '.' in value else '%Y-%m-%d %H:%M:%S'
+                row[column] = datetime.datetime.strptime(value, fmt)
+            # DATE values already arrive as 'YYYY-MM-DD', the format the form expects
+    return rows
+
+
+def _sort_key(row):
+    # ORDER BY sr_no puts NULLs first; id keeps insertion order among ties
+    sr_no = row.get('sr_no')
+    return (sr_no is not None, sr_no or 0, row.get('id') or 0)
+
+
+def load_personnel_dossier(cursor, army_number):
+    """
+    Fetch a personnel record with every child section in one round trip,
+    using a JSON_ARRAYAGG subquery per child table. Returns None when the
+    army number does not exist.
+    """
+    columns = _get_dossier_columns(cursor)
+
+    subqueries = []
+    for section, table in DOSSIER_SECTIONS.items():
+        pairs = ', '.join(f"'{name}', t.`{name}`" for name, _ in columns[table])
+        subqueries.append(
+            f"(SELECT JSON_ARRAYAGG(JSON_OBJECT({pairs})) FROM {table} t "
+            f"WHERE t.personnel_id = p.id) AS `__{section}`"
+        )
+
+    cursor.execute(f"""
+        SELECT p.*,
+            {', '.join(subqueries)},
+            (SELECT JSON_ARRAYAGG(JSON_OBJECT('id', s.id, 'sport_name', s.sport_name))
+             FROM personnel_sports s WHERE s.personnel_id = p.id) AS `__sports`,
+            (SELECT JSON_OBJECT('status_type', w.status_type, 'category_type', w.category_type,
+                                'restrictions', w.restrictions)
+             FROM weight_info w WHERE w.army_number = p.army_number LIMIT 1) AS `__weight_info`
+        FROM personnel p
+        WHERE p.army_number = %s
+    """, (army_number,))
+    personnel = cursor.fetchone()
+    if not personnel:
+        return None
+
+    dossier = {}
+    for section, table in DOSSIER_SECTIONS.items():
+        rows = _json_rows(personnel.pop(f'__{section}'), columns[table])
+        rows.sort(key=_sort_key)
+        dossier[section] = rows
+
+    sports = _json_rows(personnel.pop('__sports'), [])
+    sports.sort(key=lambda sport: sport['id'])
+    dossier['sports'] = [sport['sport_name'] for sport in sports]
+
+    weight_info = personnel.pop('__weight_info')
+    if weight_info:
+        if isinstance(weight_info, (bytes, bytearray)):
+            weight_info = weight_info.decode('utf-8')
+        weight_info = json.loads(weight_info)
+        personnel['physical_status'] = weight_info.get('status_type')
+        personnel['category_type'] = weight_info.get('category_type')
+        personnel['physical_restrictions'] = weight_info.get('restrictions')
+
+    for field in PERSONNEL_DATE_FIELDS:
+        if field in personnel and personnel[field]:
+            personnel[field] = personnel[field].strftime('%Y-%m-%d')
+
+    return {'personnel': personnel, **dossier}
+
+
+def get_personnel_dossier(army_number):
+    """Cached load_personnel_dossier(); treat the result as read-only."""
+    if DOSSIER_CACHE_ENABLED:
+        dossier = dossier_cache.get('personnel_dossier', army_number, DOSSIER_TABLES)
+        if dossier is not None:
+            return dossier
+
     connection = get_db_connection()
     if not connection:
-        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
-   
+        raise Error(msg='Database connection failed')
     cursor = connection.cursor(dictionary=True)
-   
     try:
-        # Get personnel basic information
-        cursor.execute("""
-            SELECT * FROM personnel WHERE army_number = %s
-        """, (army_number,))
-        personnel = cursor.fetchone()
-       
-        if not personnel:
-            return jsonify({'success': False, 'message': 'Personnel not found'}), 404
-       
-        personnel_id = personnel['id']
-       
-        # Convert dates to string format for JSON
-        date_fields = ['date_of_birth', 'date_of_enrollment', 'date_of_tos', 'date_of_tors',
-                      'i_card_date', 'bpet_date', 'kin_marriage_date', 'vehicle_purchase_date',
-                      'license_issue_date', 'license_expiry_date', 'folder_prepared_on',
-                      'prior_station_date', 'last_recat_bd_date', 'next_recat_due']
-       
-        for field in date_fields:
-            if field in personnel and personnel[field]:
-                personnel[field] = personnel[field].strftime('%Y-%m-%d')
-       
-        # Get courses
-        cursor.execute("""
-            SELECT * FROM courses WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        courses = cursor.fetchall()
-       
-        for course in courses:
-            if course.get('from_date'):
-                course['from_date'] = course['from_date'].strftime('%Y-%m-%d')
-            if course.get('to_date'):
-                course['to_date'] = course['to_date'].strftime('%Y-%m-%d')
-       
-        # Get units served
-        cursor.execute("""
-            SELECT * FROM units_served WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        units = cursor.fetchall()
-       
-        for unit in units:
-            if unit.get('from_date'):
-                unit['from_date'] = unit['from_date'].strftime('%Y-%m-%d')
-            if unit.get('to_date'):
-                unit['to_date'] = unit['to_date'].strftime('%Y-%m-%d')
-       
-        # Get loans
-        cursor.execute("""
-            SELECT * FROM loans WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        loans = cursor.fetchall()
-       
-        # Get punishments
-        cursor.execute("""
-            SELECT * FROM punishments WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        punishments = cursor.fetchall()
-       
-        for punishment in punishments:
-            if punishment.get('punishment_date'):
-                punishment['punishment_date'] = punishment['punishment_date'].strftime('%Y-%m-%d')
-       
-        # Get detailed courses
-        cursor.execute("""
-            SELECT * FROM detailed_courses WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        detailed_courses = cursor.fetchall()
-       
-        for course in detailed_courses:
-            if course.get('from_date'):
-                course['from_date'] = course['from_date'].strftime('%Y-%m-%d')
-            if course.get('to_date'):
-                course['to_date'] = course['to_date'].strftime('%Y-%m-%d')
-       
-        # Get leave details
-        cursor.execute("""
-            SELECT * FROM leave_details WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        leaves = cursor.fetchall()
-       
-        # Get family members
-        cursor.execute("""
-            SELECT * FROM family_members WHERE personnel_id = %s
-        """, (personnel_id,))
-        family = cursor.fetchall()
-       
-        for member in family:
-            if member.get('date_of_birth'):
-                member['date_of_birth'] = member['date_of_birth'].strftime('%Y-%m-%d')
-       
-        # Get children
-        cursor.execute("""
-            SELECT * FROM children WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        children = cursor.fetchall()
-       
-        for child in children:
-            if child.get('date_of_birth'):
-                child['date_of_birth'] = child['date_of_birth'].strftime('%Y-%m-%d')
-       
-        # Get mobile phones
-        cursor.execute("""
-            SELECT * FROM mobile_phones WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        mobiles = cursor.fetchall()
-       
-        # Get marital discord cases
-        cursor.execute("""
-            SELECT * FROM marital_discord_cases WHERE personnel_id = %s ORDER BY sr_no
-        """, (personnel_id,))
-        discord_cases = cursor.fetchall()
-        
-        # Get sports data - return as list of sport names
-        cursor.execute("""
-            SELECT sport_name FROM personnel_sports WHERE personnel_id = %s
-        """, (personnel_id,))
-        sports_data = cursor.fetchall()
-        sports = [sport['sport_name'] for sport in sports_data]
-        
-        # Get weight_info data for status fields
-        cursor.execute("""
-            SELECT status_type, category_type, restrictions FROM weight_info WHERE army_number = %s LIMIT 1
-        """, (army_number,))
-        weight_info = cursor.fetchone()
-        
-        # Add weight_info fields to personnel object
-        if weight_info:
-            personnel['physical_status'] = weight_info.get('status_type')
-            personnel['category_type'] = weight_info.get('category_type')
-            personnel['physical_restrictions'] = weight_info.get('restrictions')
-       
-        return jsonify({
-            'success': True,
-            'data': {
-                'personnel': personnel,
-                'courses': courses,
-                'units': units,
-                'loans': loans,
-                'punishments': punishments,
-                'detailed_courses': detailed_courses,
-                'leaves': leaves,
-                'family': family,
-                'children': children,
-                'mobiles': mobiles,
-                'discord_cases': discord_cases,
-                'sports': sports  # Now returns ['Football', 'Basketball', 'Cricket']
-            }
-        }), 200
-   
-    except Error as e:
-        print(f"Database error: {e}")
-        return jsonify({'success': False, 'message': str(e)}), 500
+        versions = dossier_cache.versions(DOSSIER_TABLES)
+        dossier = load_personnel_dossier(cursor, army_number)
     finally:
         cursor.close()
         connection.close()
 
+    if dossier is not None and DOSSIER_CACHE_ENABLED:
+        dossier_cache.set(army_number, versions, dossier)
+    return dossier
+
+
+def invalidate_personnel_dossier(army_number):
+    dossier_cache.delete(army_number)
+
+
+@personnel_info.route('/api/personnel/search/<army_number>', methods=['GET'])
+def search_personnel(army_number):
+    """
+    Search for personnel by army number and return all details.
+    ?fields=courses,units,... limits the child sections returned
+    (personnel is always included).
+    """
+    fields = request.args.get('fields')
+    sections = None
+    if fields:
+        sections = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = [f for f in sections if f not in DOSSIER_SECTIONS and f not in ('personnel', 'sports')]
+        if unknown:
+            return jsonify({'success': False, 'message': f"Unknown fields: {', '.join(unknown)}"}), 400
+
+    try:
+        dossier = get_personnel_dossier(army_number)
+    except Error as e:
+        print(f"Database error: {e}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+    if dossier is None:
+        return jsonify({'success': False, 'message': 'Personnel not found'}), 404
+
+    if sections is not None:
+        dossier = {key: value for key, value in dossier.items() if key == 'personnel' or key in sections}
+
+    return jsonify({'success': True, 'data': dossier}), 200
+
 @personnel_info.route('/api/personnel/update/<army_number>', methods=['PUT'])
 def update_personnel(army_number):
     """Update personnel information"""
@@ -1118,15 +1276,18 @@ def update_personnel(army_number):
     try:
         data = request.get_json()
         print("Received update data:", json.dumps(data, indent=2))
+
+        # The connection autocommits; keep the dossier and its child rows atomic
+        connection.start_transaction()
        
-        # First, get the personnel ID
-        cursor.execute("SELECT id FROM personnel WHERE army_number = %s", (army_number,))
+        # First, get the personnel ID (and the company, which the update may change)
+        cursor.execute("SELECT id, company FROM personnel WHERE army_number = %s", (army_number,))
         result = cursor.fetchone()
        
         if not result:
             return jsonify({'success': False, 'message': 'Personnel not found'}), 404
        
-        personnel_id = result[0]
+        personnel_id, old_company = result
        
         # Helper functions (same as create)
         def get_value(key, default=None):
@@ -1283,15 +1444,12 @@ def update_personnel(army_number):
         cursor.execute(personnel_query, personnel_values)
         print(f"Personnel table updated. Rows affected: {cursor.rowcount}")
 
-        # Delete old related records
-        print("Deleting old related records...")
-        delete_related_records(cursor, personnel_id, army_number)
+        # Write only the child rows that changed
+        print("Syncing dynamic data...")
+        changes = sync_dynamic_data(cursor, personnel_id, army_number, data)
+        print(f"Dynamic data synced: {changes}")
 
-        # CRITICAL: Re-insert all dynamic data
-        print("Inserting dynamic data...")
-        insert_dynamic_data(cursor, personnel_id, army_number, data)
-
-        # Re-insert into weight_info
+        # Upsert weight_info (army_number is unique)
         if army_number and get_value('name'):
             print("Updating weight_info...")
             date_of_birth_str = get_date('dateOfBirth')
@@ -1308,6 +1466,11 @@ def update_personnel(army_number):
             weight_query = """
             INSERT INTO weight_info (name, army_number, age, `rank`, height, actual_weight, company, status_type, category_type, restrictions)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                name = VALUES(name), age = VALUES(age), `rank` = VALUES(`rank`),
+                height = VALUES(height), actual_weight = VALUES(actual_weight),
+                company = VALUES(company), status_type = VALUES(status_type),
+                category_type = VALUES(category_type), restrictions = VALUES(restrictions)
             """
             weight_values = (
                 get_value('name'),
@@ -1323,9 +1486,15 @@ def update_personnel(army_number):
             )
             cursor.execute(weight_query, weight_values)
             print(f"Weight info updated. Rows affected: {cursor.rowcount}")
+            store_weight_fitness(connection, [army_number])
+        else:
+            cursor.execute("DELETE FROM weight_info WHERE army_number = %s", (army_number,))
 
         connection.commit()
         print("Transaction committed successfully!")
+        mark_rollup_stale(old_company, get_value('company'))
+        bump_versions('personnel', 'units_served', 'loans', 'weight_info')
+        invalidate_personnel_dossier(army_number)
         return jsonify({'success': True, 'personnel_id': personnel_id, 'message': 'Personnel updated successfully'}), 200
         
     except Error as e:
@@ -1358,13 +1527,13 @@ def delete_personnel(army_number):
     cursor = connection.cursor()
     try:
         # First, get the personnel ID
-        cursor.execute("SELECT id FROM personnel WHERE army_number = %s", (army_number,))
+        cursor.execute("SELECT id, company FROM personnel WHERE army_number = %s", (army_number,))
         result = cursor.fetchone()
         
         if not result:
             return jsonify({'success': False, 'message': 'Personnel not found'}), 404
         
-        personnel_id = result[0]
+        personnel_id, company = result
         
         # Delete related records
         delete_related_records(cursor, personnel_id, army_number)
@@ -1373,6 +1542,9 @@ def delete_personnel(army_number):
         cursor.execute("DELETE FROM personnel WHERE id = %s", (personnel_id,))
         
         connection.commit()
+        mark_rollup_stale(company)
+        bump_versions('personnel', 'units_served', 'loans', 'weight_info')
+        invalidate_personnel_dossier(army_number)
         return jsonify({'success': True, 'message': 'Personnel deleted successfully'}), 200
     except Error as e:
         connection.rollback()
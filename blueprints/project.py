@@ -1,4 +1,6 @@
 from imports import *
+from dashboard_rollup import mark_rollup_stale
+from response_cache import bump_versions
 from datetime import datetime
 
 projects_bp = Blueprint('@projects_bp',__name__,url_prefix='/projects')
@@ -525,6 +527,8 @@ def api_delete_project(project_id):
             pass
 
         conn.commit()
+        mark_rollup_stale(project['company'])
+        bump_versions('projects')
 
         return jsonify({
             'status': 'success',
@@ -647,6 +651,9 @@ def create_project():
         ))
 
         connection.commit()
+        # Created without a company, so only the unit-wide count changes
+        mark_rollup_stale('Admin')
+        bump_versions('projects')
 
         return jsonify({"status": "success"})
 
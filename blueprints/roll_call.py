@@ -1,4 +1,6 @@
 from imports import *
+from dashboard_rollup import refresh_unit_counters
+from response_cache import bump_versions
 roll_call_bp = Blueprint("roll_call", __name__, url_prefix="/roll_call")
 
 @roll_call_bp.route("/submit", methods=["POST"])
@@ -47,6 +49,9 @@ def submit_roll_call():
         conn.commit()
         cursor.close()
         conn.close()
+        if status == "PENDING":
+            refresh_unit_counters('roll_call_pending_points')
+        bump_versions('roll_call_points')
 
         return jsonify({"success": True, "message": "Point submitted successfully"})
 
@@ -193,6 +198,8 @@ def update_roll_call_status():
         conn.commit()
         cursor.close()
         conn.close()
+        refresh_unit_counters('roll_call_pending_points')
+        bump_versions('roll_call_points')
 
         return jsonify({
             "status": "success",
@@ -1,4 +1,5 @@
 from imports import *
+from response_cache import bump_versions
 
 task_bp = Blueprint('task',__name__,url_prefix='/task_manager')
 
@@ -39,6 +40,7 @@ def update_task():
 
 
         conn.commit()
+        bump_versions('tasks')
 
         return jsonify({"status": "success", "message": "Task updated successfully"})
 
@@ -92,6 +94,7 @@ def delete_task(id):
     try:
         query = 'DELETE FROM tasks where id = %s'
         cursor.execute(query,(id,))
+        bump_versions('tasks')
     except Exception as e:
         print('Exception',str(e))
     return jsonify({'message': f'{id} deleted'}),200
@@ -144,6 +147,7 @@ def edit_task(task_id):
 
         cursor.execute(query, (task_name, description, priority, assigned_to, due_date, task_id))
         conn.commit()
+        bump_versions('tasks')
 
         cursor.close()
         conn.close()
@@ -207,6 +211,7 @@ def jco_update_task():
 
         query = f"UPDATE tasks SET {column} = %s WHERE id = %s"
         cursor.execute(query, (value, task_id))
+        bump_versions('tasks')
         
         cursor.close()
 
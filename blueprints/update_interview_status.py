@@ -1,4 +1,6 @@
 from imports import *
+from dashboard_rollup import mark_rollup_stale
+from response_cache import bump_versions
 
 
 inteview_bp = Blueprint('inteview_bp',__name__,url_prefix='/inteview_update')
@@ -52,7 +54,11 @@ def complete_kunba_interview():
         WHERE id = %s
     """, (personnel_id,))
     conn.commit()
+    cursor.execute("SELECT company FROM personnel WHERE id = %s", (personnel_id,))
+    row = cursor.fetchone()
     cursor.close()
+    mark_rollup_stale(row[0] if row else None)
+    bump_versions('personnel')
 
     return jsonify({"success": True})
 
@@ -1,5 +1,12 @@
 from imports import *
 
+import threading
+import time
+
+import numpy as np
+
+from response_cache import VersionedCache, bump_versions
+
 weight_ms = Blueprint('weight', __name__, url_prefix='/weight_system')
 
 # --- Helper functions ---
@@ -15,89 +22,649 @@ def round_to_nearest_even(n):
             rounded -= 1
     return rounded
 
+IDEAL_WEIGHT_GRID_TTL = 300  # seconds; covers edits made directly in the database
+
+
+class IdealWeightGrid:
+    """
+    The ideal_weights table as a (height, age) lookup array.
+    Cell [height - min_height, age] holds the ideal weight and its 10%
+    limits, NaN where no band applies, so a whole unit is looked up with
+    one array index instead of one query per soldier.
+    """
+
+    def __init__(self, rows):
+        bands = []
+        for row in rows:
+            try:
+                lower_age, upper_age = map(int, row['age_range'].split('-'))
+            except (AttributeError, ValueError):
+                continue
+            bands.append((int(row['height_cm']), max(lower_age, 0), upper_age, float(row['ideal_weight_kg'])))
+
+        if bands:
+            self.min_height = min(b[0] for b in bands)
+            shape = (max(b[0] for b in bands) - self.min_height + 1, max(b[2] for b in bands) + 1)
+        else:
+            self.min_height = 0
+            shape = (0, 0)
+
+        self.ideal = np.full(shape, np.nan)
+        self.lower = np.full(shape, np.nan)
+        self.upper = np.full(shape, np.nan)
+
+        for height, lower_age, upper_age, ideal_weight in bands:
+            row = height - self.min_height
+            cells = slice(lower_age, upper_age + 1)
+            # The per-row lookup returned the first matching band, so earlier rows win
+            free = np.isnan(self.ideal[row, cells])
+            self.ideal[row, cells][free] = ideal_weight
+            self.lower[row, cells][free] = round(ideal_weight * 0.9, 2)
+            self.upper[row, cells][free] = round(ideal_weight * 1.1, 2)
+
+    def lookup_many(self, ages, heights_cm):
+        """Return (ideal, lower, upper) arrays for the given ages and rounded heights."""
+        ages = np.asarray(ages, dtype=float)
+        rows = np.asarray(heights_cm, dtype=float) - self.min_height
+
+        with np.errstate(invalid='ignore'):
+            found = (
+                (rows >= 0) & (rows < self.ideal.shape[0]) &
+                (ages >= 0) & (ages < self.ideal.shape[1]) &
+                (rows == np.floor(rows)) & (ages == np.floor(ages))
+            )
+        rows = rows[found].astype(int)
+        cols = ages[found].astype(int)
+
+        result = []
+        for table in (self.ideal, self.lower, self.upper):
+            values = np.full(ages.shape, np.nan)
+            values[found] = table[rows, cols]
+            result.append(values)
+        return tuple(result)
+
+    def lookup(self, age, height_cm):
+        if age is None or height_cm is None:
+            return None
+        ideal = self.lookup_many([age], [height_cm])[0][0]
+        return None if np.isnan(ideal) else float(ideal)
+
+
+_ideal_weight_grid = None
+_ideal_weight_grid_loaded_at = 0.0
+_ideal_weight_rows = None   # the rows the grid was built from, to spot edits
+_ideal_weight_grid_lock = threading.Lock()
+
+
+def get_ideal_weight_grid(cursor):
+    """
+    Return the cached IdealWeightGrid, reloading it with `cursor` once it is
+    older than the TTL. When the reload finds ideal_weights different from
+    the last load (or it is this process's first), the persisted fitness
+    columns are refreshed in the background.
+    """
+    global _ideal_weight_grid, _ideal_weight_grid_loaded_at, _ideal_weight_rows
+    with _ideal_weight_grid_lock:
+        if (_ideal_weight_grid is not None and
+                time.monotonic() - _ideal_weight_grid_loaded_at < IDEAL_WEIGHT_GRID_TTL):
+            return _ideal_weight_grid
+
+    cursor.execute("SELECT height_cm, age_range, ideal_weight_kg FROM ideal_weights ORDER BY id")
+    ideal_rows = cursor.fetchall()
+    grid = IdealWeightGrid(ideal_rows)
+    signature = [(r['height_cm'], r['age_range'], r['ideal_weight_kg']) for r in ideal_rows]
+
+    with _ideal_weight_grid_lock:
+        changed = signature != _ideal_weight_rows
+        first_load = _ideal_weight_rows is None
+        _ideal_weight_grid = grid
+        _ideal_weight_grid_loaded_at = time.monotonic()
+        _ideal_weight_rows = signature
+
+    if changed:
+        if not first_load:
+            bump_versions('ideal_weights')
+        refresh_weight_fitness_in_background()
+    return grid
+
+
+def invalidate_ideal_weight_grid():
+    """Drop the cached grid and fitness snapshots after ideal_weights is edited."""
+    global _ideal_weight_grid
+    with _ideal_weight_grid_lock:
+        _ideal_weight_grid = None
+    bump_versions('ideal_weights')
+
+
 def get_ideal_weight(age, height_cm, cursor):
-    cursor.execute("SELECT age_range, ideal_weight_kg FROM ideal_weights WHERE height_cm = %s", (height_cm,))
-    rows = cursor.fetchall()
-    for row in rows:
-        age_range = row['age_range']
-        ideal_weight = row['ideal_weight_kg']
+    return get_ideal_weight_grid(cursor).lookup(age, height_cm)
+
+
+def _float_array(rows, key):
+    return np.array([np.nan if row[key] is None else float(row[key]) for row in rows], dtype=float)
+
+
+def round_to_nearest_even_array(values):
+    """Vectorised round_to_nearest_even(); NaN stays NaN."""
+    rounded = np.rint(values)
+    with np.errstate(invalid='ignore'):
+        odd = np.mod(rounded, 2) != 0
+    return np.where(odd & (values > rounded), rounded + 1, np.where(odd, rounded - 1, rounded))
+
+
+def assess_weights(rows, cursor, height_key='height', grid=None):
+    """
+    Fit / UnFit check for a list of weight_info rows in one array pass.
+    Returns one dict per row with height_cm (rounded to the nearest even
+    cm), ideal_weight, lower_limit, upper_limit, status,
+    weight_deviation_percent and weight_deviation_kg.
+    """
+    if not rows:
+        return []
+
+    grid = grid or get_ideal_weight_grid(cursor)
+    heights = round_to_nearest_even_array(_float_array(rows, height_key))
+    actual = _float_array(rows, 'actual_weight')
+    ideal, lower, upper = grid.lookup_many(_float_array(rows, 'age'), heights)
+
+    with np.errstate(invalid='ignore'):
+        has_ideal = ~np.isnan(ideal) & ~np.isnan(actual)
+        fit = has_ideal & (lower <= actual) & (actual <= upper)
+        under = has_ideal & ~fit & (actual < lower)
+        over = has_ideal & ~fit & ~under
+        deviation = np.where(under, lower - actual, np.where(over, actual - upper, 0.0))
+        percent = np.where(under, (deviation / lower) * 100, np.where(over, (deviation / upper) * 100, 0.0))
+
+    results = []
+    for height, has, is_fit, ideal_w, low, up, dev, pct in zip(
+            heights.tolist(), has_ideal.tolist(), fit.tolist(), ideal.tolist(),
+            lower.tolist(), upper.tolist(), deviation.tolist(), percent.tolist()):
+        if not has:
+            assessment = {
+                "ideal_weight": None, "lower_limit": None, "upper_limit": None,
+                "status": "No ideal weight found",
+                "weight_deviation_percent": None, "weight_deviation_kg": None
+            }
+        elif is_fit:
+            assessment = {
+                "ideal_weight": ideal_w, "lower_limit": low, "upper_limit": up,
+                "status": "Fit",
+                "weight_deviation_percent": 0, "weight_deviation_kg": 0
+            }
+        else:
+            # Python round() keeps the output identical to the per-row version
+            assessment = {
+                "ideal_weight": ideal_w, "lower_limit": low, "upper_limit": up,
+                "status": "UnFit",
+                "weight_deviation_percent": round(pct, 1), "weight_deviation_kg": round(dev, 1)
+            }
+        assessment["height_cm"] = None if np.isnan(height) else int(height)
+        results.append(assessment)
+    return results
+
+
+ASSESSMENT_FIELDS = ['height_cm', 'ideal_weight', 'lower_limit', 'upper_limit', 'status',
+                     'weight_deviation_percent', 'weight_deviation_kg']
+
+NO_IDEAL_WEIGHT = {
+    "ideal_weight": None, "lower_limit": None, "upper_limit": None,
+    "status": "No ideal weight found",
+    "weight_deviation_percent": None, "weight_deviation_kg": None
+}
+
+
+def reference_assessment(row, ideal_rows):
+    """
+    The original per-row compute_authorization logic (one ideal_weights
+    query per soldier), kept as the reference assess_weights is checked
+    against. ideal_rows stands in for the table, in id order.
+    Raises TypeError where the original did (NULL height or actual weight).
+    """
+    age = row['age']
+    height_cm = round_to_nearest_even(row['height'])
+    actual_weight = row['actual_weight']
+
+    ideal_weight = None
+    for band in ideal_rows:
+        if band['height_cm'] != height_cm:
+            continue
         try:
-            lower_age, upper_age = map(int, age_range.split('-'))
+            lower_age, upper_age = map(int, band['age_range'].split('-'))
             if lower_age <= age <= upper_age:
-                return float(ideal_weight)
+                ideal_weight = float(band['ideal_weight_kg'])
+                break
         except:
             continue
-    return None
 
-def compute_authorization(company=None):
+    if ideal_weight is None:
+        return dict(NO_IDEAL_WEIGHT, height_cm=height_cm)
+
+    lower = round(ideal_weight * 0.9, 2)
+    upper = round(ideal_weight * 1.1, 2)
+    result = {"height_cm": height_cm, "ideal_weight": ideal_weight, "lower_limit": lower, "upper_limit": upper}
+    if lower <= actual_weight <= upper:
+        result.update(status="Fit", weight_deviation_kg=0, weight_deviation_percent=0)
+    elif actual_weight < lower:
+        deviation = lower - actual_weight
+        result.update(status="UnFit", weight_deviation_kg=round(deviation, 1),
+                      weight_deviation_percent=round((deviation / lower) * 100, 1))
+    else:
+        deviation = actual_weight - upper
+        result.update(status="UnFit", weight_deviation_kg=round(deviation, 1),
+                      weight_deviation_percent=round((deviation / upper) * 100, 1))
+    return result
+
+
+def assessment_check_rows(ideal_rows):
+    """
+    Synthetic weight_info rows covering the ideal_weights table: every
+    half-cm height and every age around its range, weights on both sides
+    of and exactly on each band's limits, and NULL / out-of-range values.
+    """
+    heights = sorted({int(b['height_cm']) for b in ideal_rows}) or [170]
+    ages = [None, -1, 0] + list(range(15, 75))
+    weights = [None, 0, 30.0, 45.5, 50.0, 55.25, 60.0, 65.0, 70.0, 75.5, 80.0, 90.0, 120.0]
+
+    rows = []
+    height_cm = heights[0] - 4
+    while height_cm <= heights[-1] + 4:
+        for age in ages:
+            for weight in weights:
+                rows.append({'height': height_cm, 'age': age, 'actual_weight': weight})
+        height_cm += 0.5
+    rows.extend({'height': None, 'age': 25, 'actual_weight': 60.0} for _ in range(2))
+
+    # Exactly on, and just past, each band's limits
+    for band in ideal_rows:
+        try:
+            age = int(band['age_range'].split('-')[0])
+        except (AttributeError, ValueError):
+            age = 25
+        ideal = float(band['ideal_weight_kg'])
+        for limit in (round(ideal * 0.9, 2), round(ideal * 1.1, 2)):
+            for weight in (limit - 0.01, limit, limit + 0.01):
+                rows.append({'height': band['height_cm'], 'age': age, 'actual_weight': weight})
+    return rows
+
+
+def check_weight_assessment(ideal_rows, rows):
+    """
+    Run reference_assessment and assess_weights over the same rows and
+    return the differences as [{row, field, reference, vectorised}].
+    Rows the original logic crashed on (TypeError) must come out as
+    "No ideal weight found".
+    """
+    grid = IdealWeightGrid(ideal_rows)
+    mismatches = []
+    for row, got in zip(rows, assess_weights(rows, None, grid=grid)):
+        try:
+            expected = reference_assessment(row, ideal_rows)
+        except TypeError:
+            height = row['height']
+            expected = dict(NO_IDEAL_WEIGHT,
+                            height_cm=None if height is None else round_to_nearest_even(height))
+        for field in ASSESSMENT_FIELDS:
+            if got[field] != expected[field] or (got[field] is None) != (expected[field] is None):
+                mismatches.append({'row': row, 'field': field,
+                                   'reference': expected[field], 'vectorised': got[field]})
+    return mismatches
+
+
+def run_weight_assessment_check():
+    """check_weight_assessment over the synthetic grid plus every weight_info row. Returns (rows checked, mismatches)."""
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT height_cm, age_range, ideal_weight_kg FROM ideal_weights ORDER BY id")
+        ideal_rows = cursor.fetchall()
+        cursor.execute("SELECT age, height, actual_weight FROM weight_info")
+        rows = assessment_check_rows(ideal_rows) + cursor.fetchall()
+        return len(rows), check_weight_assessment(ideal_rows, rows)
+    finally:
+        cursor.close()
+        connection.close()
+
+
+# Persisted on weight_info by store_weight_fitness(); fit_status holds the
+# same strings as the API "status" field
+FITNESS_COLUMNS = {
+    'ideal_weight': 'DOUBLE DEFAULT NULL',
+    'lower_limit': 'DOUBLE DEFAULT NULL',
+    'upper_limit': 'DOUBLE DEFAULT NULL',
+    'fit_status': 'VARCHAR(25) DEFAULT NULL',
+    'weight_deviation_kg': 'DOUBLE DEFAULT NULL',
+    'weight_deviation_percent': 'DOUBLE DEFAULT NULL'
+}
+
+
+def ensure_fitness_columns(cursor):
+    """Add the persisted fitness columns and their index to weight_info if missing."""
+    cursor.execute("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'weight_info'
+    """)
+    existing = {row['COLUMN_NAME'] for row in cursor.fetchall()}
+    for column, definition in FITNESS_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE weight_info ADD COLUMN {column} {definition}")
+
+    cursor.execute("SHOW INDEX FROM weight_info WHERE Key_name = 'idx_company_fit_status'")
+    if not cursor.fetchall():
+        cursor.execute("ALTER TABLE weight_info ADD INDEX idx_company_fit_status (company, fit_status)")
+
+
+def store_weight_fitness(connection, army_numbers=None, changed_only=False):
+    """
+    Recompute the persisted fitness columns of weight_info for the given
+    army numbers, or every row when army_numbers is None (with changed_only,
+    only rows whose stored values differ from the live assessment are
+    written). Runs on the caller's connection so it joins the caller's
+    transaction; does nothing while the columns are not there yet.
+    Returns the number of rows updated.
+    """
+    cursor = connection.cursor(dictionary=True)
+    try:
+        if not fitness_columns_present(cursor):
+            return 0
+        query = f"SELECT troop_id, age, height, actual_weight, {', '.join(FITNESS_COLUMNS)} FROM weight_info"
+        params = []
+        if army_numbers is not None:
+            army_numbers = [a for a in army_numbers if a]
+            if not army_numbers:
+                return 0
+            query += f" WHERE army_number IN ({', '.join(['%s'] * len(army_numbers))})"
+            params = army_numbers
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+
+        updates = []
+        for row, a in zip(rows, assess_weights(rows, cursor)):
+            values = (a['ideal_weight'], a['lower_limit'], a['upper_limit'], a['status'],
+                      a['weight_deviation_kg'], a['weight_deviation_percent'])
+            stored = (row['ideal_weight'], row['lower_limit'], row['upper_limit'], row['fit_status'],
+                      row['weight_deviation_kg'], row['weight_deviation_percent'])
+            if not changed_only or values != stored:
+                updates.append(values + (row['troop_id'],))
+        if updates:
+            cursor.executemany("""
+                UPDATE weight_info
+                SET ideal_weight = %s, lower_limit = %s, upper_limit = %s, fit_status = %s,
+                    weight_deviation_kg = %s, weight_deviation_percent = %s
+                WHERE troop_id = %s
+            """, updates)
+        return len(updates)
+    finally:
+        cursor.close()
+
+
+def recompute_weight_fitness():
+    """Add the columns if needed (databases older than latest.sql) and recompute every row."""
     connection = get_db_connection()
     cursor = connection.cursor(dictionary=True)
+    try:
+        ensure_fitness_columns(cursor)
+        _mark_fitness_columns(True)
+        invalidate_ideal_weight_grid()
+        connection.start_transaction()
+        updated = store_weight_fitness(connection)
+        connection.commit()
+        bump_versions('weight_info')
+        return updated
+    finally:
+        cursor.close()
+        connection.close()
+
+
+FITNESS_COLUMNS_RETRY = 60  # seconds between checks while the columns are missing
+
+_fitness_columns = False
+_fitness_columns_checked_at = None
+_fitness_columns_lock = threading.Lock()
+
+
+def _mark_fitness_columns(present):
+    global _fitness_columns, _fitness_columns_checked_at
+    with _fitness_columns_lock:
+        _fitness_columns = present
+        _fitness_columns_checked_at = time.monotonic()
 
+
+def fitness_columns_present(cursor):
+    """
+    Whether weight_info has the persisted fitness columns (latest.sql, or
+    `flask recompute-weight-fitness` on an older database). Cached once
+    true; while missing, re-checked at most every FITNESS_COLUMNS_RETRY
+    seconds and everything is assessed live.
+    """
+    with _fitness_columns_lock:
+        if _fitness_columns:
+            return True
+        if (_fitness_columns_checked_at is not None and
+                time.monotonic() - _fitness_columns_checked_at < FITNESS_COLUMNS_RETRY):
+            return False
+    cursor.execute("""
+        SELECT 1 FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'weight_info' AND COLUMN_NAME = 'fit_status'
+    """)
+    present = bool(cursor.fetchall())
+    _mark_fitness_columns(present)
+    return present
+
+
+def refresh_weight_fitness():
+    """Rewrite the persisted fitness of every row whose stored values no longer match ideal_weights."""
+    connection = get_db_connection()
+    if connection is None:
+        return 0
+    try:
+        connection.start_transaction()
+        updated = store_weight_fitness(connection, changed_only=True)
+        connection.commit()
+        if updated:
+            bump_versions('weight_info')
+        return updated
+    except Error:
+        if connection.in_transaction:
+            connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+_fitness_refresh_lock = threading.Lock()
+_fitness_refresh_pending = False
+
+
+def _run_fitness_refresh():
+    global _fitness_refresh_pending
+    with _fitness_refresh_lock:
+        while _fitness_refresh_pending:
+            _fitness_refresh_pending = False
+            try:
+                updated = refresh_weight_fitness()
+                if updated:
+                    print(f"Refreshed fitness for {updated} weight_info rows after an ideal_weights change")
+            except Error as e:
+                print("Error refreshing weight fitness:", e)
+
+
+def refresh_weight_fitness_in_background():
+    """
+    Queue refresh_weight_fitness() on its own thread and connection, so it
+    never runs inside a request's transaction; refreshes requested while
+    one is running are folded into a single follow-up run.
+    """
+    global _fitness_refresh_pending
+    _fitness_refresh_pending = True
+    threading.Thread(target=_run_fitness_refresh, daemon=True).start()
+
+
+def fitness_counts(cursor, company=None, group_by_rank=False):
+    """
+    Fit / UnFit counts as {status: count} or, with group_by_rank,
+    {(rank, status): count}. Persisted fit_status is counted in SQL; rows
+    not backfilled yet (e.g. written outside the app), or every row while
+    the columns are missing, are assessed live, so the counts always match
+    the listings.
+    """
+    conditions = []
+    params = ()
     if company and company != "All":
-        cursor.execute("SELECT army_number, name,`rank`,company, age, height, actual_weight,status_type FROM weight_info WHERE company = %s", (company,))
-    else:
-        cursor.execute("SELECT army_number, name,`rank`, company, age, height, actual_weight,status_type FROM weight_info")
-    
-    soldiers = cursor.fetchall()
-    
-    results = []
+        conditions.append("company = %s")
+        params = (company,)
+
+    counts = {}
+    if fitness_columns_present(cursor):
+        columns = "`rank`, fit_status" if group_by_rank else "fit_status"
+        where = " WHERE " + " AND ".join(conditions + ["fit_status IS NOT NULL"])
+        cursor.execute(f"SELECT {columns}, COUNT(*) AS count FROM weight_info{where} GROUP BY {columns}", params)
+        if group_by_rank:
+            counts = {(row['rank'], row['fit_status']): row['count'] for row in cursor.fetchall()}
+        else:
+            counts = {row['fit_status']: row['count'] for row in cursor.fetchall()}
+        conditions.append("fit_status IS NULL")
 
-    for s in soldiers:
-        age = s['age']
-        height_cm = round_to_nearest_even(s['height'])
-        actual_weight = s['actual_weight']
-        name = s['name']
-        company = s['company']
-        army_number = s['army_number']
-        rank = s['rank']
-        status_type = s['status_type']
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    cursor.execute("SELECT `rank`, age, height, actual_weight FROM weight_info" + where, params)
+    pending = cursor.fetchall()
+    for row, assessment in zip(pending, assess_weights(pending, cursor)):
+        key = (row['rank'], assessment['status']) if group_by_rank else assessment['status']
+        counts[key] = counts.get(key, 0) + 1
+    return counts
 
-        ideal_weight = get_ideal_weight(age, height_cm, cursor)
 
-        if ideal_weight is None:
-            status = "No ideal weight found"
-            lower = upper = None
-            weight_deviation_percent = None
-            weight_deviation_kg = None
+def _stored_assessment(row):
+    """Assessment dict (as returned by assess_weights) from the persisted columns."""
+    status = row['fit_status']
+    has_ideal = status in ("Fit", "UnFit")
+    return {
+        "height_cm": round_to_nearest_even(row['height']) if row['height'] is not None else None,
+        "ideal_weight": row['ideal_weight'] if has_ideal else None,
+        "lower_limit": row['lower_limit'] if has_ideal else None,
+        "upper_limit": row['upper_limit'] if has_ideal else None,
+        "status": status,
+        "weight_deviation_percent": (row['weight_deviation_percent'] if status == "UnFit" else 0) if has_ideal else None,
+        "weight_deviation_kg": (row['weight_deviation_kg'] if status == "UnFit" else 0) if has_ideal else None
+    }
+
+
+FITNESS_TABLES = ('weight_info', 'ideal_weights')
+FITNESS_SNAPSHOT_TTL = 300  # seconds; covers edits made directly in the database
+
+# company -> FitnessSnapshot, dropped whenever weight_info or ideal_weights is bumped
+fitness_snapshots = VersionedCache(max_entries=32, ttl=FITNESS_SNAPSHOT_TTL)
+
+
+class FitnessSnapshot:
+    """
+    Fit / UnFit assessment of one company's weight_info rows, taken at one
+    version of FITNESS_TABLES. Shared by every weight dashboard endpoint;
+    treat the rows as read-only.
+    """
+
+    def __init__(self, company, version, soldiers, assessments):
+        self.company = company
+        self.version = version
+        self.rows = []
+        self._details = []
+
+        for s, a in zip(soldiers, assessments):
+            self.rows.append({
+                'army_number': s['army_number'],
+                "name": s['name'],
+                'rank': s['rank'],
+                "company": s['company'],
+                "age": s['age'],
+                "height_cm": a['height_cm'],
+                "actual_weight": s['actual_weight'],
+                "ideal_weight": a['ideal_weight'],
+                "lower_limit": a['lower_limit'],
+                "upper_limit": a['upper_limit'],
+                "status": a['status'],
+                "weight_deviation_percent": a['weight_deviation_percent'],
+                "weight_deviation_kg": a['weight_deviation_kg'],
+                "status_type" : s['status_type']
+            })
+            self._details.append({
+                'army_number': s['army_number'],
+                "name": s['name'],
+                "company": s['company'],
+                'rank': s['rank'],
+                "age": s['age'],
+                "height_cm": s['height'],
+                "actual_weight": s['actual_weight'],
+                "status_type": s['status_type'],
+                "category_type": s['category_type'],
+                "restrictions": s['restrictions'],
+                "ideal_weight": a['ideal_weight'],
+                "lower_limit": a['lower_limit'],
+                "upper_limit": a['upper_limit'],
+                "status": a['status'],
+                "weight_deviation_percent": a['weight_deviation_percent'],
+                "weight_deviation_kg": a['weight_deviation_kg']
+            })
+
+        # NULL names first, like ORDER BY name
+        self._details.sort(key=lambda d: (d['name'] is not None, (d['name'] or '').casefold()))
+        self.fit_count = sum(1 for d in self.rows if d['status'] == "Fit")
+        self.unfit_count = sum(1 for d in self.rows if d['status'] == "UnFit")
+
+    def with_status(self, status):
+        return [d for d in self.rows if d['status'] == status]
+
+    def with_status_type(self, status_type):
+        """Rows for /api/status-data: raw height plus category details, ordered by name."""
+        status_type = status_type.lower()
+        return [d for d in self._details if (d['status_type'] or '').lower() == status_type]
+
+
+def _build_fitness_snapshot(company, version):
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        query = """
+            SELECT army_number, name, `rank`, company, age, height, actual_weight,
+                   status_type, category_type, restrictions
+        """
+        if fitness_columns_present(cursor):
+            query += ", " + ", ".join(FITNESS_COLUMNS)
+        query += " FROM weight_info"
+        if company != "All":
+            cursor.execute(query + " WHERE company = %s", (company,))
         else:
-            lower = round(ideal_weight * 0.9, 2)
-            upper = round(ideal_weight * 1.1, 2)
+            cursor.execute(query)
 
-            if lower <= actual_weight <= upper:
-                status = "Fit"
-                weight_deviation_kg = 0
-                weight_deviation_percent = 0
-            else:
-                status = "UnFit"
-                if actual_weight < lower:
-                    deviation = lower - actual_weight
-                    weight_deviation_kg = round(deviation, 1)
-                    weight_deviation_percent = round((deviation / lower) * 100, 1)
-                else:  # actual_weight > upper
-                    deviation = actual_weight - upper
-                    weight_deviation_kg = round(deviation, 1)
-                    weight_deviation_percent = round((deviation / upper) * 100, 1)
+        soldiers = cursor.fetchall()
 
-        results.append({
-            'army_number': army_number,
-            "name": name,
-            'rank':rank,
-            "company": company,
-            "age": age,
-            "height_cm": height_cm,
-            "actual_weight": actual_weight,
-            "ideal_weight": ideal_weight,
-            "lower_limit": lower,
-            "upper_limit": upper,
-            "status": status,
-            "weight_deviation_percent": weight_deviation_percent,
-            "weight_deviation_kg": weight_deviation_kg,
-            "status_type" : status_type
-        })
+        # Persisted values where present; rows not yet backfilled are assessed live
+        pending = [s for s in soldiers if s.get('fit_status') is None]
+        live = iter(assess_weights(pending, cursor))
+        assessments = [next(live) if s.get('fit_status') is None else _stored_assessment(s) for s in soldiers]
+
+        return FitnessSnapshot(company, version, soldiers, assessments)
+    finally:
+        cursor.close()
+        connection.close()
+
+
+def get_fitness_snapshot(company=None):
+    """
+    Return the company's FitnessSnapshot, computing it only when weight_info
+    or ideal_weights changed since the last one (or it is older than the TTL).
+    """
+    company = company if company and company != "All" else "All"
+    snapshot = fitness_snapshots.get('fitness_snapshot', company, FITNESS_TABLES)
+    if snapshot is None:
+        # Version taken before reading, so a write that races the build wins
+        version = fitness_snapshots.versions(FITNESS_TABLES)
+        snapshot = _build_fitness_snapshot(company, version)
+        fitness_snapshots.set(company, version, snapshot)
+    return snapshot
 
-    cursor.close()
-    connection.close()
-    return results
+
+def compute_authorization(company=None):
+    """Per-soldier fitness dicts for a company (or "All"), served from the shared snapshot."""
+    return list(get_fitness_snapshot(company).rows)
 
 # --- Validation functions ---
 def validate_alpha(value, field_name):
@@ -268,8 +835,10 @@ def add_user():
         
         # Execute with parameterized values
         cursor.execute(query, (name, army_number, age, rank, height_cm, actual_weight, company, status_type, category_type, restrictions))
+        store_weight_fitness(connection, [army_number])
 
         connection.commit()
+        bump_versions('weight_info')
         
         # Get the inserted user's ID
         user_id = cursor.lastrowid
@@ -312,29 +881,32 @@ def add_user():
 def api_summary():
     auto_save_monthly_unfit()
     company = request.args.get('company', 'All')
-    data = compute_authorization(company)
-    total = len(data)
-    unFit = sum(1 for d in data if d['status'] == "UnFit")
-    Fit = sum(1 for d in data if d['status'] == "Fit")
+
+    connection = get_db_connection()
+    cursor = connection.cursor(dictionary=True)
+    try:
+        counts = fitness_counts(cursor, company)
+    finally:
+        cursor.close()
+        connection.close()
+
     return jsonify({
-        "total": total, 
-        "unFit": unFit, 
-        "Fit": Fit,
+        "total": sum(counts.values()), 
+        "unFit": counts.get("UnFit", 0), 
+        "Fit": counts.get("Fit", 0),
         "company": company
     })
 
 @weight_ms.route('/api/unauthorized')
 def api_unFit():
     company = request.args.get('company', 'All')
-    data = compute_authorization(company)
-    unFit = [d for d in data if d['status'] == "UnFit"]
+    unFit = get_fitness_snapshot(company).with_status("UnFit")
     return jsonify({"count": len(unFit), "rows": unFit})
 
 @weight_ms.route('/api/authorized')
 def api_Fit():
     company = request.args.get('company', 'All')
-    data = compute_authorization(company)
-    Fit = [d for d in data if d['status'] == "Fit"]
+    Fit = get_fitness_snapshot(company).with_status("Fit")
     return jsonify({"count": len(Fit), "rows": Fit})
 
 @weight_ms.route('/api/companies')
@@ -417,83 +989,8 @@ def api_status_data():
     if not status_type:
         return jsonify({'error': 'status_type parameter is required'}), 400
     
-    connection = get_db_connection()
-    cursor = connection.cursor(dictionary=True)
-    
     try:
-        if company and company != "All":
-            cursor.execute("""
-                SELECT 
-                    army_number, name, company,`rank`, age, height as height_cm, 
-                    actual_weight, status_type, category_type, restrictions
-                FROM weight_info 
-                WHERE status_type = %s AND company = %s
-                ORDER BY name
-            """, (status_type, company))
-        else:
-            cursor.execute("""
-                SELECT 
-                    army_number, name, company,`rank`, age, height as height_cm, 
-                    actual_weight, status_type, category_type, restrictions
-                FROM weight_info 
-                WHERE status_type = %s
-                ORDER BY name
-            """, (status_type,))
-        
-        users = cursor.fetchall()
-        
-        # Calculate fitness status for each user
-        results = []
-        for user in users:
-            age = user['age']
-            height_cm = round_to_nearest_even(user['height_cm'])
-            actual_weight = user['actual_weight']
-            
-            ideal_weight = get_ideal_weight(age, height_cm, cursor)
-            
-            if ideal_weight is None:
-                status = "No ideal weight found"
-                lower = upper = None
-                weight_deviation_percent = None
-                weight_deviation_kg = None
-            else:
-                lower = round(ideal_weight * 0.9, 2)
-                upper = round(ideal_weight * 1.1, 2)
-
-                if lower <= actual_weight <= upper:
-                    status = "Fit"
-                    weight_deviation_kg = 0
-                    weight_deviation_percent = 0
-                else:
-                    status = "UnFit"
-                    if actual_weight < lower:
-                        deviation = lower - actual_weight
-                        weight_deviation_kg = round(deviation, 1)
-                        weight_deviation_percent = round((deviation / lower) * 100, 1)
-                    else:
-                        deviation = actual_weight - upper
-                        weight_deviation_kg = round(deviation, 1)
-                        weight_deviation_percent = round((deviation / upper) * 100, 1)
-
-            results.append({
-                'army_number': user['army_number'],
-                "name": user['name'],
-                "company": user['company'],
-                'rank':user['rank'],
-                "age": user['age'],
-                "height_cm": user['height_cm'],
-                "actual_weight": user['actual_weight'],
-                "status_type": user['status_type'],
-                "category_type": user['category_type'],
-                "restrictions": user['restrictions'],
-                "ideal_weight": ideal_weight,
-                "lower_limit": lower,
-                "upper_limit": upper,
-                "status": status,
-                "weight_deviation_percent": weight_deviation_percent,
-                "weight_deviation_kg": weight_deviation_kg
-            })
-        #results,"these are resutls")
+        results = get_fitness_snapshot(company).with_status_type(status_type)
         return jsonify({
             "count": len(results),
             "rows": results,
@@ -504,9 +1001,6 @@ def api_status_data():
     except mysql.connector.Error as err:
         print(f"Database error: {err}")
         return jsonify({'error': 'Database error occurred'}), 500
-    finally:
-        cursor.close()
-        connection.close()
 @weight_ms.route('/api/bar-graph-data')
 def api_bar_graph_data():
     company = request.args.get('company', 'All')
@@ -527,11 +1021,11 @@ def api_bar_graph_data():
         # ============================================================
         # 1. Fit / Unfit counts
         # ============================================================
-        data = compute_authorization(company)
-        print("Total authorization records:", len(data))
+        rank_counts = fitness_counts(cursor, company, group_by_rank=True)
+        print("Total authorization records:", sum(rank_counts.values()))
 
-        fit_count = sum(1 for d in data if d['status'] == "Fit")
-        unfit_count = sum(1 for d in data if d['status'] == "UnFit")
+        fit_count = sum(n for (rank, status), n in rank_counts.items() if status == "Fit")
+        unfit_count = sum(n for (rank, status), n in rank_counts.items() if status == "UnFit")
 
         print("Fit count:", fit_count)
         print("UnFit count:", unfit_count)
@@ -540,15 +1034,15 @@ def api_bar_graph_data():
         # 2. JCO / OR counts for selected Fit / UnFit
         # ============================================================
         jco_status_count = sum(
-            1 for d in data
-            if d['status'] == fit_unfit_filter
-            and d['rank'] in JCO_RANKS
+            n for (rank, status), n in rank_counts.items()
+            if status == fit_unfit_filter
+            and rank in JCO_RANKS
         )
 
         or_status_count = sum(
-            1 for d in data
-            if d['status'] == fit_unfit_filter
-            and d['rank'] not in JCO_RANKS
+            n for (rank, status), n in rank_counts.items()
+            if status == fit_unfit_filter
+            and rank not in JCO_RANKS
         )
 
         print("JCO", fit_unfit_filter, "count:", jco_status_count)
@@ -770,9 +1264,8 @@ def auto_save_monthly_unfit():
         if cursor.fetchone():
             continue
 
-        # Compute official count
-        data = compute_authorization(company)
-        unFit = sum(1 for d in data if d['status'] == "UnFit")
+        # Official count: persisted fit_status, un-backfilled rows assessed live
+        unFit = fitness_counts(cursor, company).get("UnFit", 0)
         print("THIS IS UNFIT COUNT",unFit)
 
         cursor.execute("""
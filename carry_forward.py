@@ -0,0 +1,59 @@
+"""
+Carry-forward lookup for the daily state tables.
+
+When today's parade state or trade manpower has not been entered yet, the
+forms open pre-filled with the latest earlier report. latest_on_or_before()
+finds that row with one ORDER BY report_date DESC LIMIT 1 read on the
+(company, report_date) / report_date index, instead of probing day by day.
+
+Resolved rows are cached per (table, company, date). The entries hang off
+a per-company table version, so invalidate_carry_forward() after a save
+retires only that company's entries; a TTL covers writes made outside
+the app.
+"""
+from response_cache import VersionedCache, bump_versions
+
+CARRY_FORWARD_TTL = 600  # seconds
+
+# table -> whether rows are per company
+CARRY_FORWARD_TABLES = {
+    'parade_state_daily': True,
+    'trade_manpower_daily': False
+}
+
+carry_forward_cache = VersionedCache(max_entries=1024, ttl=CARRY_FORWARD_TTL)
+
+
+def _scope(table, company):
+    return f"{table}:{company}" if CARRY_FORWARD_TABLES[table] else table
+
+
+def latest_on_or_before(cursor, table, report_date, company=None):
+    """
+    The newest row of `table` (for `company` where rows are per company)
+    with report_date <= the given date, or None. `cursor` must be a
+    dictionary cursor. The caller gets its own copy of the row.
+    """
+    tables = (_scope(table, company),)
+    key = (table, company, str(report_date))
+
+    cached = carry_forward_cache.get('latest_on_or_before', key, tables)
+    if cached is None:
+        versions = carry_forward_cache.versions(tables)
+        query = f"SELECT * FROM {table} WHERE report_date <= %s"
+        params = [report_date]
+        if CARRY_FORWARD_TABLES[table]:
+            query += " AND company = %s"
+            params.append(company)
+        cursor.execute(query + " ORDER BY report_date DESC LIMIT 1", params)
+        # Wrapped so "no earlier row" is cached too
+        cached = (cursor.fetchone(),)
+        carry_forward_cache.set(key, versions, cached)
+
+    row = cached[0]
+    return dict(row) if row else None
+
+
+def invalidate_carry_forward(table, company=None):
+    """Call after saving `table` (for `company`) so lookups see the new row."""
+    bump_versions(_scope(table, company))
@@ -37,7 +37,10 @@ COMPANY_PATTERNS = [
 RANK_PATTERNS = [
     r"\bJCO\b", r"\bOR\b", r"\bHAV\b", r"\bNK\b", r"\bL\s*NK\b", r"\bNaib\s*Subedar\b",
     r"\bSubedar\b", r"\bAgniveer\b", r"\bSignal\s*Man\b", r"\bNCO\b", r"\bOC\b", r"\bCO\b",
+    r"\bL\s*HAV\b", r"\bSubedar\s*Major\b",
 ]
+# Terms in RANK_PATTERNS that name a group of ranks, not a `rank` value
+RANK_GROUP_PATTERNS = [r"\bJCO\b", r"\bOR\b", r"\bNCO\b", r"\bOC\b", r"\bCO\b"]
 LEAVE_TYPES = ["AL", "CL", "AAL", "leave", "casual", "annual"]
 DATE_PATTERN = re.compile(
     r"\b(\d{4})-(\d{2})-(\d{2})\b|"  # 2026-01-15
@@ -105,6 +108,45 @@ def _extract_rank(text):
     return None
 
 
+def find_entities(text):
+    """
+    Every company, rank, army number and explicit date mentioned in text, as
+    (kind, start, end, value) tuples in order, without overlaps (the longest
+    mention wins, e.g. "subedar major" over "subedar"). Values are canonical:
+    "1 Company", ISO dates, upper-case army numbers. Group terms (JCO, OR,
+    NCO, OC, CO) are kind "rank_group", since they stand for several ranks.
+    Relative dates (today, yesterday) are skipped since queries for them use
+    CURDATE().
+    """
+    text = text or ""
+    found = []
+    for m in DATE_PATTERN.finditer(text):
+        if m.group(7):
+            continue
+        try:
+            found.append(("date", m.start(), m.end(), _extract_date(m.group(0)).isoformat()))
+        except ValueError:
+            continue
+    for pat, repl in COMPANY_PATTERNS:
+        for m in re.finditer(pat, text, re.I):
+            found.append(("company", m.start(), m.end(), repl))
+    for m in ARMY_NUMBER_PATTERN.finditer(text):
+        found.append(("army_number", m.start(1), m.end(1), m.group(1).upper()))
+    for pat in RANK_PATTERNS:
+        kind = "rank_group" if pat in RANK_GROUP_PATTERNS else "rank"
+        for m in re.finditer(pat, text, re.I):
+            found.append((kind, m.start(), m.end(), " ".join(m.group(0).split())))
+
+    entities = []
+    end = 0
+    # Earliest first, then longest; ties keep the kind order above
+    for entity in sorted(found, key=lambda e: (e[1], e[1] - e[2])):
+        if entity[1] >= end:
+            entities.append(entity)
+            end = entity[2]
+    return entities
+
+
 def classify_question(question):
     """
     Classify question and extract entities.
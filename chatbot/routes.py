@@ -6,11 +6,15 @@ Supports any question: pattern-matched SQL first, then:
 - LLM with schema + optional text-to-SQL (if configured), OR
 - Generic auto-answer that inspects the live schema and returns best-effort data.
 """
+import json
 import os
 import re
+import threading
+import time
 from flask import Blueprint, request, jsonify
 from middleware import require_login
 from db_config import get_db_connection
+from llm_scheduler import openai_scheduler
 
 from chatbot.nlp_processor import classify_question
 from chatbot.sql_generator import get_sql, ALLOWED_TABLES
@@ -23,13 +27,61 @@ _USE_LLM_FALLBACK = os.environ.get("CHATBOT_LLM_FALLBACK", "1") == "1"
 # Regex to extract SQL from LLM reply: "SQL:" then SELECT until double newline or end
 _LLM_SQL_PATTERN = re.compile(r"\bSQL:\s*(SELECT\s+.+?)(?=\n\s*\n|\Z)", re.I | re.DOTALL)
 
-
-def _fetch_schema(conn):
-    """Get table and column list from INFORMATION_SCHEMA."""
-    if not conn:
-        return ""
+# Schema and row-count metadata is cached per process. The column list is
+# reloaded when the schema fingerprint changes (checked at most every
+# SCHEMA_CHECK_INTERVAL) and in any case after SCHEMA_MAX_AGE, which covers
+# in-place ALTERs that leave the fingerprint alone. Row counts simply
+# expire after DB_STATS_TTL.
+SCHEMA_CHECK_INTERVAL = 60  # seconds
+SCHEMA_MAX_AGE = 900  # seconds
+DB_STATS_TTL = 120  # seconds
+
+_schema_cache = {"fingerprint": None, "checked_at": 0.0, "loaded_at": 0.0, "columns": None, "text": None}
+_db_stats_cache = {"loaded_at": 0.0, "text": None}
+_metadata_lock = threading.Lock()
+
+
+def _schema_fingerprint(cur):
+    """Table count and newest table create time (bumped by rebuilding ALTERs), from INFORMATION_SCHEMA.TABLES only."""
+    cur.execute("""
+        SELECT COUNT(*) AS table_count, MAX(CREATE_TIME) AS changed_at
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = DATABASE()
+    """)
+    r = cur.fetchone() or {}
+    return (r.get("table_count"), r.get("changed_at"))
+
+
+def _format_schema_text(rows):
+    current = None
+    lines = []
+    for r in rows:
+        t, c, typ = r.get("TABLE_NAME"), r.get("COLUMN_NAME"), r.get("DATA_TYPE")
+        if t != current:
+            current = t
+            lines.append("\n**" + t + "**: " + (c + " (" + typ + ")" if c else ""))
+        else:
+            lines.append("  - " + c + " (" + typ + ")")
+    return "\n".join(lines) if lines else "No schema."
+
+
+def _load_schema(conn):
+    """Return (column rows, schema text), rereading INFORMATION_SCHEMA.COLUMNS only when the fingerprint moved."""
+    now = time.monotonic()
+    with _metadata_lock:
+        cached = (_schema_cache["columns"], _schema_cache["text"])
+        if cached[0] is not None and now - _schema_cache["checked_at"] < SCHEMA_CHECK_INTERVAL:
+            return cached
+
+    cur = conn.cursor(dictionary=True)
     try:
-        cur = conn.cursor(dictionary=True)
+        fingerprint = _schema_fingerprint(cur)
+        with _metadata_lock:
+            if (cached[0] is not None and fingerprint == _schema_cache["fingerprint"]
+                    and now - _schema_cache["loaded_at"] < SCHEMA_MAX_AGE):
+                _schema_cache["checked_at"] = now
+                return cached
+
         cur.execute("""
             SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE
             FROM INFORMATION_SCHEMA.COLUMNS
@@ -37,17 +89,21 @@ def _fetch_schema(conn):
             ORDER BY TABLE_NAME, ORDINAL_POSITION
         """)
         rows = cur.fetchall()
+    finally:
         cur.close()
-        current = None
-        lines = []
-        for r in rows:
-            t, c, typ = r.get("TABLE_NAME"), r.get("COLUMN_NAME"), r.get("DATA_TYPE")
-            if t != current:
-                current = t
-                lines.append("\n**" + t + "**: " + (c + " (" + typ + ")" if c else ""))
-            else:
-                lines.append("  - " + c + " (" + typ + ")")
-        return "\n".join(lines) if lines else "No schema."
+
+    text = _format_schema_text(rows)
+    with _metadata_lock:
+        _schema_cache.update(fingerprint=fingerprint, checked_at=now, loaded_at=now, columns=rows, text=text)
+    return rows, text
+
+
+def _fetch_schema(conn):
+    """Get table and column list from INFORMATION_SCHEMA (cached, see _load_schema)."""
+    if not conn:
+        return ""
+    try:
+        return _load_schema(conn)[1]
     except Exception as e:
         return "Schema error: " + str(e)
 
@@ -119,11 +175,18 @@ Rules:
             if content:
                 messages.append({"role": role, "content": content})
         messages.append({"role": "user", "content": user_question})
-        r = client.chat.completions.create(
-            model=os.environ.get("CHATBOT_MODEL", "gpt-4o-mini"),
-            messages=messages,
-            temperature=0.2,
-            max_tokens=1200,
+        model = os.environ.get("CHATBOT_MODEL", "gpt-4o-mini")
+        # Bounded concurrency; identical conversations in flight share one call.
+        # LLMBusy / LLMTimeout fall through to the auto-answer like any failure.
+        r = openai_scheduler.run(
+            json.dumps([model, messages]),
+            lambda: client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.2,
+                max_tokens=1200,
+                timeout=openai_scheduler.timeout,
+            ),
         )
         raw = (r.choices[0].message.content or "").strip()
         # Extract optional SQL from reply
@@ -148,16 +211,7 @@ def _auto_answer_from_db(conn, user_question):
     if not conn or not user_question:
         return None
     try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT TABLE_NAME, COLUMN_NAME
-            FROM INFORMATION_SCHEMA.COLUMNS
-            WHERE TABLE_SCHEMA = DATABASE()
-            """
-        )
-        rows = cur.fetchall()
-        cur.close()
+        rows = _load_schema(conn)[0]
     except Exception:
         return None
 
@@ -247,9 +301,20 @@ def _auto_answer_from_db(conn, user_question):
 
 
 def _get_db_stats(conn):
-    """Short stats and sample values for LLM context."""
+    """Short stats and sample values for LLM context (cached for DB_STATS_TTL)."""
     if not conn:
         return ""
+    with _metadata_lock:
+        if _db_stats_cache["text"] and time.monotonic() - _db_stats_cache["loaded_at"] < DB_STATS_TTL:
+            return _db_stats_cache["text"]
+    stats = _query_db_stats(conn)
+    if stats:
+        with _metadata_lock:
+            _db_stats_cache.update(loaded_at=time.monotonic(), text=stats)
+    return stats
+
+
+def _query_db_stats(conn):
     try:
         cur = conn.cursor(dictionary=True)
         out = []
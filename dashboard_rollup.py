@@ -0,0 +1,369 @@
+"""
+Per-company dashboard rollup.
+Keeps the counters shown on the CO/OC dashboard in one `dashboard_rollup`
+row per company (plus an 'Admin' row for the whole unit), so
+/api/dashboard_summary reads one row instead of running every aggregate.
+
+Write routes call mark_rollup_stale() with the company they touched; the
+next read recomputes just that row and 'Admin'. Writes to the unit-wide
+counters call refresh_unit_counters() instead. Rows older than
+ROLLUP_MAX_AGE are recomputed too, which covers writes made outside the
+app. The table is created by the first dashboard read of each process
+(or rebuild-dashboard-rollup); until then write routes have nothing to
+flag.
+"""
+import threading
+
+from mysql.connector import Error, errorcode
+
+from db_config import get_db_connection
+
+ROLLUP_MAX_AGE = 600  # seconds
+
+ROLLUP_DDL = """
+    CREATE TABLE IF NOT EXISTS dashboard_rollup (
+        company VARCHAR(100) NOT NULL,
+        detachments INT NOT NULL DEFAULT 0,
+        manpower_date DATE DEFAULT NULL,
+        officer_count INT NOT NULL DEFAULT 0,
+        jco_count INT NOT NULL DEFAULT 0,
+        or_count INT NOT NULL DEFAULT 0,
+        manpower_total INT NOT NULL DEFAULT 0,
+        interview_pending INT NOT NULL DEFAULT 0,
+        interview_total INT NOT NULL DEFAULT 0,
+        projects INT NOT NULL DEFAULT 0,
+        sensitive_count INT NOT NULL DEFAULT 0,
+        boards_count INT NOT NULL DEFAULT 0,
+        attachment_count INT NOT NULL DEFAULT 0,
+        courses_count INT NOT NULL DEFAULT 0,
+        loan_count INT NOT NULL DEFAULT 0,
+        roll_call_pending_points INT NOT NULL DEFAULT 0,
+        duty_count INT NOT NULL DEFAULT 0,
+        agniveer_count INT NOT NULL DEFAULT 0,
+        is_stale TINYINT(1) NOT NULL DEFAULT 1,
+        version INT NOT NULL DEFAULT 0,
+        refreshed_at DATETIME DEFAULT NULL,
+        PRIMARY KEY (company)
+    )
+"""
+
+# Columns compared by the consistency checker
+ROLLUP_FIELDS = [
+    'detachments', 'manpower_date', 'officer_count', 'jco_count', 'or_count',
+    'manpower_total', 'interview_pending', 'interview_total', 'projects',
+    'sensitive_count', 'boards_count', 'attachment_count', 'courses_count',
+    'loan_count', 'roll_call_pending_points', 'duty_count', 'agniveer_count'
+]
+
+# Counters that are the same for every company, kept on every row
+UNIT_COUNTERS = {
+    'boards_count': "SELECT COUNT(*) AS count FROM boards",
+    'roll_call_pending_points': "SELECT COUNT(id) AS count FROM roll_call_points WHERE status = 'PENDING'"
+}
+
+OFFICER_RANK_LIST = "'Lieutenant', 'Captain', 'Major', 'Lieutenant Colonel', 'Colonel', 'Brigadier', 'Major General', 'Lieutenant General', 'General', 'OC'"
+JCO_RANK_LIST = "'Subedar', 'Naib Subedar', 'Subedar Major', 'JCO'"
+
+
+def _count(cursor, query, params=()):
+    cursor.execute(query, params)
+    row = cursor.fetchone()
+    return int(row['count'] or 0) if row else 0
+
+
+def _company_filter(company, column):
+    """Return (sql, params) restricting `column` to company; Admin sees everything."""
+    if company == 'Admin':
+        return "", ()
+    return f" AND {column} = %s", (company,)
+
+
+def compute_company_rollup(cursor, company):
+    """Run the live dashboard aggregates for one company ('Admin' = whole unit)."""
+    result = {'company': company}
+
+    where, params = _company_filter(company, 'company')
+    result['detachments'] = _count(
+        cursor, "SELECT COUNT(*) AS count FROM personnel WHERE detachment_status = 1" + where, params)
+    result['attachment_count'] = _count(
+        cursor, "SELECT COUNT(*) AS count FROM personnel WHERE td_status = 1" + where, params)
+    result['agniveer_count'] = _count(
+        cursor, "SELECT COUNT(id) AS count FROM personnel WHERE `rank` = 'Agniveer'" + where, params)
+    result['projects'] = _count(
+        cursor, "SELECT COUNT(*) AS count FROM projects WHERE 1=1" + where, params)
+
+    # Manpower from the latest parade state, falling back to the personnel table
+    cursor.execute("SELECT MAX(report_date) AS max_date FROM parade_state_daily WHERE 1=1" + where, params)
+    max_date_row = cursor.fetchone()
+    latest_date = max_date_row['max_date'] if max_date_row else None
+
+    manpower_row = None
+    if latest_date:
+        cursor.execute("""
+            SELECT
+                SUM(IFNULL(offr_present_unit, 0)) AS officerCount,
+                SUM(IFNULL(jco_present_unit, 0) + IFNULL(jcoEre_present_unit, 0)) AS jcoCount,
+                SUM(IFNULL(or_present_unit, 0) + IFNULL(orEre_present_unit, 0)) AS orCount
+            FROM parade_state_daily
+            WHERE report_date = %s
+        """ + where, (latest_date,) + params)
+        manpower_row = cursor.fetchone()
+
+    has_parade_data = manpower_row and (
+        (manpower_row['officerCount'] or 0) > 0 or
+        (manpower_row['jcoCount'] or 0) > 0 or
+        (manpower_row['orCount'] or 0) > 0
+    )
+
+    if not has_parade_data:
+        cursor.execute(f"""
+            SELECT
+                SUM(CASE WHEN `rank` IN ({OFFICER_RANK_LIST}) THEN 1 ELSE 0 END) AS officerCount,
+                SUM(CASE WHEN `rank` IN ({JCO_RANK_LIST}) THEN 1 ELSE 0 END) AS jcoCount,
+                SUM(CASE WHEN `rank` NOT IN ({OFFICER_RANK_LIST}, {JCO_RANK_LIST}) THEN 1 ELSE 0 END) AS orCount
+            FROM personnel
+            WHERE 1=1
+        """ + where, params)
+        manpower_row = cursor.fetchone() or {}
+        latest_date = None
+
+    result['manpower_date'] = latest_date
+    result['officer_count'] = int(manpower_row.get('officerCount') or 0)
+    result['jco_count'] = int(manpower_row.get('jcoCount') or 0)
+    result['or_count'] = int(manpower_row.get('orCount') or 0)
+    result['manpower_total'] = result['officer_count'] + result['jco_count'] + result['or_count']
+
+    cursor.execute("""
+        SELECT
+            COALESCE(SUM(interview_status = 0), 0) AS pending_count,
+            COUNT(*) AS total_count
+        FROM personnel
+        WHERE `rank` IN ('AGNIVEER', 'Signal Man', 'L NK', 'NK', 'HAV','LOC NK','L HAV','CHM','RHM')
+    """ + where, params)
+    interview_row = cursor.fetchone()
+    result['interview_pending'] = int(interview_row['pending_count'] or 0) if interview_row else 0
+    result['interview_total'] = int(interview_row['total_count'] or 0) if interview_row else 0
+
+    where_p, params_p = _company_filter(company, 'p.company')
+    result['sensitive_count'] = _count(cursor, """
+        SELECT COUNT(*) AS count
+        FROM sensitive_marking sm
+        LEFT JOIN personnel p ON sm.army_number = p.army_number
+        WHERE 1=1
+    """ + where_p, params_p)
+    result['courses_count'] = _count(cursor, """
+        SELECT COUNT(*) AS count
+        FROM candidate_on_courses c
+        LEFT JOIN personnel p ON c.army_number = p.army_number
+        WHERE 1=1
+    """ + where_p, params_p)
+    result['loan_count'] = _count(cursor, """
+        SELECT COUNT(*) AS count
+        FROM loans l
+        LEFT JOIN personnel p ON l.army_number = p.army_number
+        WHERE 1=1
+    """ + where_p, params_p)
+    result['duty_count'] = _count(cursor, """
+        SELECT COUNT(DISTINCT p.army_number) AS count
+        FROM personnel p
+        LEFT JOIN (
+            SELECT army_number, duty_performed
+            FROM units_served
+            WHERE (army_number, sr_no) IN (
+                SELECT army_number, MAX(sr_no)
+                FROM units_served
+                GROUP BY army_number
+            )
+        ) u ON p.army_number = u.army_number
+        WHERE ((u.duty_performed IS NOT NULL AND u.duty_performed != '')
+           OR (p.section IS NOT NULL AND p.section != ''))
+    """ + where_p, params_p)
+
+    # Unit-wide counters, stored on every row
+    for field, query in UNIT_COUNTERS.items():
+        result[field] = _count(cursor, query)
+
+    return result
+
+
+def refresh_rollup(cursor, company):
+    """Recompute and store one company's row. Returns the fresh values."""
+    cursor.execute("SELECT version FROM dashboard_rollup WHERE company = %s", (company,))
+    row = cursor.fetchone()
+    version = row['version'] if row else 0
+
+    values = compute_company_rollup(cursor, company)
+
+    columns = ['company'] + ROLLUP_FIELDS
+    # A write that lands while we compute bumps `version`; keep the row stale then
+    cursor.execute(f"""
+        INSERT INTO dashboard_rollup ({', '.join(columns)}, is_stale, refreshed_at)
+        VALUES ({', '.join(['%s'] * len(columns))}, 0, NOW())
+        ON DUPLICATE KEY UPDATE
+            {', '.join(f"{col} = VALUES({col})" for col in ROLLUP_FIELDS)},
+            is_stale = IF(version = %s, 0, 1),
+            refreshed_at = NOW()
+    """, [values[col] for col in columns] + [version])
+
+    return values
+
+
+_rollup_table_ready = False
+_rollup_table_lock = threading.Lock()
+
+
+def ensure_rollup_table(cursor):
+    """
+    Once per process: create dashboard_rollup if missing (rows are filled
+    by the first read of each company). Call with no transaction open.
+    Returns whether the table can be used.
+    """
+    global _rollup_table_ready
+    if _rollup_table_ready:
+        return True
+    with _rollup_table_lock:
+        if not _rollup_table_ready:
+            try:
+                cursor.execute(ROLLUP_DDL)
+                _rollup_table_ready = True
+            except Error as e:
+                print("Error creating dashboard rollup table:", e)
+    return _rollup_table_ready
+
+
+def load_rollup(cursor, companies):
+    """
+    Read rollup rows for the given companies, refreshing stale or missing
+    ones. Falls back to the live aggregates if the table cannot be created.
+    """
+    companies = list(dict.fromkeys(companies))
+    if not ensure_rollup_table(cursor):
+        return {company: compute_company_rollup(cursor, company) for company in companies}
+    placeholders = ', '.join(['%s'] * len(companies))
+    cursor.execute(f"""
+        SELECT *, TIMESTAMPDIFF(SECOND, refreshed_at, NOW()) AS age_seconds
+        FROM dashboard_rollup
+        WHERE company IN ({placeholders})
+    """, companies)
+    rows = {row['company']: row for row in cursor.fetchall()}
+
+    for company in companies:
+        row = rows.get(company)
+        if (row is None or row['is_stale'] or row['age_seconds'] is None
+                or row['age_seconds'] > ROLLUP_MAX_AGE):
+            rows[company] = refresh_rollup(cursor, company)
+
+    return rows
+
+
+def mark_rollup_stale(*companies, army_number=None):
+    """
+    Flag rollup rows for recompute after a write.
+    Only the given companies' rows (or the company of `army_number`) and
+    the unit-wide 'Admin' row are flagged; records with no company count
+    in 'Admin' alone. With neither, every row is flagged, which is meant
+    for bulk writes that span companies.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return
+    cursor = conn.cursor()
+    try:
+        if army_number:
+            cursor.execute("SELECT company FROM personnel WHERE army_number = %s", (army_number,))
+            row = cursor.fetchone()
+            companies += (row[0] if row else None,)
+
+        if companies:
+            targets = list(dict.fromkeys([c for c in companies if c] + ['Admin']))
+            cursor.execute(f"""
+                UPDATE dashboard_rollup
+                SET is_stale = 1, version = version + 1
+                WHERE company IN ({', '.join(['%s'] * len(targets))})
+            """, targets)
+        else:
+            cursor.execute("UPDATE dashboard_rollup SET is_stale = 1, version = version + 1")
+    except Error as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            print("Error marking dashboard rollup stale:", e)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def refresh_unit_counters(*fields):
+    """
+    Recompute unit-wide counters (UNIT_COUNTERS) in place on every row,
+    for writes that change nothing else. The version bump still makes a
+    refresh that raced this write store its row as stale.
+    """
+    conn = get_db_connection()
+    if conn is None:
+        return
+    cursor = conn.cursor()
+    try:
+        assignments = ', '.join(f"{field} = ({UNIT_COUNTERS[field]})" for field in fields)
+        cursor.execute(f"UPDATE dashboard_rollup SET {assignments}, version = version + 1")
+    except Error as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            print("Error refreshing dashboard unit counters:", e)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _rollup_companies(cursor):
+    cursor.execute("""
+        SELECT company FROM personnel WHERE company IS NOT NULL AND company != ''
+        UNION
+        SELECT company FROM parade_state_daily
+        UNION
+        SELECT company FROM dashboard_rollup
+    """)
+    companies = [row['company'] for row in cursor.fetchall()]
+    return ['Admin'] + [c for c in companies if c != 'Admin']
+
+
+def rebuild_rollup():
+    """Create the table if needed and recompute every company. Returns the companies rebuilt."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(ROLLUP_DDL)
+        companies = _rollup_companies(cursor)
+        for company in companies:
+            refresh_rollup(cursor, company)
+        conn.commit()
+        return companies
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def check_rollup():
+    """
+    Diff every stored rollup row against the live aggregates.
+    Returns a list of {company, field, rollup, live, is_stale} mismatches.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("SELECT * FROM dashboard_rollup ORDER BY company")
+        stored_rows = cursor.fetchall()
+
+        mismatches = []
+        for stored in stored_rows:
+            live = compute_company_rollup(cursor, stored['company'])
+            for field in ROLLUP_FIELDS:
+                if stored[field] != live[field]:
+                    mismatches.append({
+                        'company': stored['company'],
+                        'field': field,
+                        'rollup': stored[field],
+                        'live': live[field],
+                        'is_stale': bool(stored['is_stale'])
+                    })
+        return mismatches
+    finally:
+        cursor.close()
+        conn.close()
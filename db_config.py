@@ -1,5 +1,12 @@
 from imports import *
 
+import threading
+import time
+from collections import deque
+
+from flask import g, has_app_context
+from mysql.connector.errors import PoolError
+
 # Database configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -10,11 +17,222 @@ DB_CONFIG = {
     'autocommit': True
 }
 
+# Connection pool configuration
+POOL_CONFIG = {
+    'pool_size': 10,            # connections kept open while idle
+    'max_overflow': 10,         # extra connections allowed under load, closed on return
+    'checkout_timeout': 10,     # seconds to wait for a free connection
+    'max_lifetime': 1800,       # seconds before a connection is recycled
+    'ping_on_checkout': True    # check the connection is alive before handing it out
+}
+
+
+class PooledConnection:
+    """
+    Wrapper around a pooled mysql connection.
+    Everything is delegated to the real connection except close(), which
+    returns the connection to the pool instead of closing the socket.
+    Inside a request the same wrapper is shared by every helper and close()
+    does nothing; the connection goes back when the request ends.
+    """
+
+    def __init__(self, pool, raw, created_at, request_scoped=False):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._request_scoped = request_scoped
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        # Buffered by default so a helper sharing this connection never
+        # trips over rows another cursor has not read yet
+        kwargs.setdefault('buffered', True)
+        return self._raw.cursor(*args, **kwargs)
+
+    def close(self):
+        if not self._request_scoped:
+            self.release()
+
+    def release(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.checkin(self._raw, self._created_at)
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with overflow, checkout timeout and recycling."""
+
+    def __init__(self, db_config, pool_size=10, max_overflow=10, checkout_timeout=10,
+                 max_lifetime=1800, ping_on_checkout=True):
+        self.db_config = dict(db_config)
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.checkout_timeout = checkout_timeout
+        self.max_lifetime = max_lifetime
+        self.ping_on_checkout = ping_on_checkout
+
+        self._idle = deque()
+        self._cond = threading.Condition()
+        self._in_use = 0
+
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._checkout_ms_total = 0.0
+        self._checkout_ms_max = 0.0
+
+    def _expired(self, created_at):
+        return self.max_lifetime and time.monotonic() - created_at > self.max_lifetime
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._recycled += 1
+
+    def _prepare(self, raw, created_at):
+        """Recycle old or dead connections and open a new one when needed."""
+        if raw is not None and self._expired(created_at):
+            self._discard(raw)
+            raw = None
+
+        if raw is not None and self.ping_on_checkout:
+            try:
+                raw.ping(reconnect=False)
+            except Error:
+                self._discard(raw)
+                raw = None
+
+        if raw is None:
+            raw = mysql.connector.connect(**self.db_config)
+            created_at = time.monotonic()
+            with self._cond:
+                self._created += 1
+
+        return raw, created_at
+
+    def checkout(self, request_scoped=False):
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+        raw, created_at = None, None
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._idle:
+                    # LIFO keeps the most recently used connections warm
+                    raw, created_at = self._idle.pop()
+                    break
+                if self._in_use < self.pool_size + self.max_overflow:
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolError(
+                        f"Timed out after {self.checkout_timeout}s waiting for a database connection"
+                    )
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+
+        try:
+            raw, created_at = self._prepare(raw, created_at)
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._cond:
+            self._checkouts += 1
+            self._checkout_ms_total += elapsed_ms
+            self._checkout_ms_max = max(self._checkout_ms_max, elapsed_ms)
+
+        return PooledConnection(self, raw, created_at, request_scoped=request_scoped)
+
+    def checkin(self, raw, created_at):
+        healthy = True
+        try:
+            # Never hand the next caller a half-finished transaction
+            if raw.in_transaction:
+                raw.rollback()
+            raw.consume_results()
+        except Exception:
+            healthy = False
+
+        keep = False
+        with self._cond:
+            self._in_use -= 1
+            if healthy and not self._expired(created_at) and len(self._idle) < self.pool_size:
+                self._idle.append((raw, created_at))
+                keep = True
+            self._cond.notify()
+
+        if not keep:
+            self._discard(raw)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'connections_created': self._created,
+                'connections_recycled': self._recycled,
+                'avg_checkout_ms': round(self._checkout_ms_total / self._checkouts, 3) if self._checkouts else 0,
+                'max_checkout_ms': round(self._checkout_ms_max, 3)
+            }
+
+
+db_pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
 
 def get_db_connection():
-    
+    """
+    Get a pooled connection.
+    Inside a request every call returns the same connection, released
+    when the app context tears down. Outside a request (scheduler jobs)
+    the caller owns the connection and close() returns it to the pool.
+    """
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        if has_app_context():
+            lease = g.get('_db_lease')
+            if lease is None:
+                lease = db_pool.checkout(request_scoped=True)
+                g._db_lease = lease
+            return lease
+        return db_pool.checkout()
     except Error as e:
         print("Error connecting to MySQL:", e)
         return None
+
+
+def release_request_connection(exc=None):
+    lease = g.pop('_db_lease', None)
+    if lease is not None:
+        lease.release()
+
+
+def init_db_pool(app):
+    """Return the request-scoped connection to the pool when each request ends."""
+    app.teardown_appcontext(release_request_connection)
+
+
+def get_pool_stats():
+    return db_pool.stats()
@@ -0,0 +1,104 @@
+"""
+Streaming exports for multi-day parade / trade manpower pulls.
+
+Rows come from an unbuffered cursor on a connection of its own (not the
+request-scoped one, which other helpers may still use), so the server
+sends them as MySQL produces them and memory stays flat however long the
+date range is. The CSV writer flushes every EXPORT_CHUNK_SIZE bytes; the
+XLSX writer uses XlsxWriter's constant_memory mode and a temp file, then
+streams the file. Either can be wrapped in zstd_chunks() for archival
+downloads.
+"""
+import csv
+import tempfile
+from io import StringIO
+
+import xlsxwriter
+import zstandard
+
+from db_config import db_pool
+
+EXPORT_CHUNK_SIZE = 64 * 1024   # bytes per yielded chunk
+EXPORT_ZSTD_LEVEL = 10
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'zst': 'application/zstd'
+}
+
+
+def stream_rows(query, params=()):
+    """Yield dict rows of `query` from an unbuffered cursor; the connection is returned when done."""
+    conn = db_pool.checkout()
+    cursor = conn.cursor(dictionary=True, buffered=False)
+    try:
+        cursor.execute(query, params)
+        for row in cursor:
+            yield row
+    finally:
+        # Closing early (client went away) leaves unread rows; checkin drains them
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        conn.close()
+
+
+def csv_chunks(header, rows):
+    """Encode header + rows (lists) as CSV, yielding ~EXPORT_CHUNK_SIZE byte chunks."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def xlsx_chunks(header, rows, sheet_name='Export'):
+    """Write header + rows to a one-sheet workbook in a temp file, then stream the file."""
+    with tempfile.TemporaryFile() as output:
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True, 'in_memory': False})
+        worksheet = workbook.add_worksheet(sheet_name)
+        bold = workbook.add_format({'bold': True})
+        worksheet.write_row(0, 0, header, bold)
+        for row_num, row in enumerate(rows, 1):
+            worksheet.write_row(row_num, 0, row)
+        workbook.close()
+
+        output.seek(0)
+        while True:
+            chunk = output.read(EXPORT_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def zstd_chunks(chunks, level=EXPORT_ZSTD_LEVEL):
+    """Compress a stream of byte chunks into one zstd frame."""
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+
+def export_chunks(fmt, header, rows, compress=False, sheet_name='Export'):
+    """
+    Byte chunks for an export in `fmt` ('csv' or 'xlsx'), optionally zstd
+    compressed. Returns (chunks, mimetype, extension).
+    """
+    if fmt == 'xlsx':
+        chunks = xlsx_chunks(header, rows, sheet_name)
+    else:
+        chunks = csv_chunks(header, rows)
+
+    if compress:
+        return zstd_chunks(chunks), EXPORT_MIMETYPES['zst'], f"{fmt}.zst"
+    return chunks, EXPORT_MIMETYPES[fmt], fmt
@@ -1,6 +1,8 @@
 from flask_socketio import SocketIO
 
+# Threading mode: the app relies on real threads (connection pool,
+# APScheduler, chat long-polling), which eventlet would need monkey-patched
 socketio = SocketIO(
     cors_allowed_origins="*",
-    async_mode="eventlet"
+    async_mode="threading"
 )
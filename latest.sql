@@ -295,6 +295,39 @@ INSERT INTO `daily_events` VALUES (10,'2026-01-23','GAMEP','PT','2026-01-23 22:4
 /*!40000 ALTER TABLE `daily_events` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `dashboard_rollup`
+--
+
+DROP TABLE IF EXISTS `dashboard_rollup`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `dashboard_rollup` (
+  `company` varchar(100) NOT NULL,
+  `detachments` int NOT NULL DEFAULT '0',
+  `manpower_date` date DEFAULT NULL,
+  `officer_count` int NOT NULL DEFAULT '0',
+  `jco_count` int NOT NULL DEFAULT '0',
+  `or_count` int NOT NULL DEFAULT '0',
+  `manpower_total` int NOT NULL DEFAULT '0',
+  `interview_pending` int NOT NULL DEFAULT '0',
+  `interview_total` int NOT NULL DEFAULT '0',
+  `projects` int NOT NULL DEFAULT '0',
+  `sensitive_count` int NOT NULL DEFAULT '0',
+  `boards_count` int NOT NULL DEFAULT '0',
+  `attachment_count` int NOT NULL DEFAULT '0',
+  `courses_count` int NOT NULL DEFAULT '0',
+  `loan_count` int NOT NULL DEFAULT '0',
+  `roll_call_pending_points` int NOT NULL DEFAULT '0',
+  `duty_count` int NOT NULL DEFAULT '0',
+  `agniveer_count` int NOT NULL DEFAULT '0',
+  `is_stale` tinyint(1) NOT NULL DEFAULT '1',
+  `version` int NOT NULL DEFAULT '0',
+  `refreshed_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`company`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `department_accounts`
 --
@@ -708,6 +741,31 @@ LOCK TABLES `marital_discord_cases` WRITE;
 /*!40000 ALTER TABLE `marital_discord_cases` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `message_unread_counts`
+--
+
+DROP TABLE IF EXISTS `message_unread_counts`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `message_unread_counts` (
+  `receiver_id` int NOT NULL,
+  `sender_id` int NOT NULL,
+  `unread_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`receiver_id`,`sender_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `message_unread_counts`
+--
+
+LOCK TABLES `message_unread_counts` WRITE;
+/*!40000 ALTER TABLE `message_unread_counts` DISABLE KEYS */;
+INSERT INTO `message_unread_counts` VALUES (25,74,1),(38,1,1);
+/*!40000 ALTER TABLE `message_unread_counts` ENABLE KEYS */;
+UNLOCK TABLES;
+
 --
 -- Table structure for table `messages`
 --
@@ -722,7 +780,9 @@ CREATE TABLE `messages` (
   `message` text NOT NULL,
   `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `status` enum('sent','read') DEFAULT 'sent',
-  PRIMARY KEY (`id`)
+  PRIMARY KEY (`id`),
+  KEY `idx_conversation` (`sender_id`,`receiver_id`,`id`),
+  KEY `idx_unread` (`receiver_id`,`sender_id`,`status`,`id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=22 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -2104,9 +2164,16 @@ CREATE TABLE `weight_info` (
   `status_type` varchar(10) NOT NULL DEFAULT 'safe',
   `category_type` varchar(10) DEFAULT NULL,
   `restrictions` text,
+  `ideal_weight` double DEFAULT NULL,
+  `lower_limit` double DEFAULT NULL,
+  `upper_limit` double DEFAULT NULL,
+  `fit_status` varchar(25) DEFAULT NULL,
+  `weight_deviation_kg` double DEFAULT NULL,
+  `weight_deviation_percent` double DEFAULT NULL,
   PRIMARY KEY (`troop_id`),
   UNIQUE KEY `army_number` (`army_number`),
-  UNIQUE KEY `army_number_2` (`army_number`)
+  UNIQUE KEY `army_number_2` (`army_number`),
+  KEY `idx_company_fit_status` (`company`,`fit_status`)
 ) ENGINE=InnoDB AUTO_INCREMENT=150 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -2116,7 +2183,7 @@ CREATE TABLE `weight_info` (
 
 LOCK TABLES `weight_info` WRITE;
 /*!40000 ALTER TABLE `weight_info` DISABLE KEYS */;
-INSERT INTO `weight_info` VALUES (33,'SR PANDEY','HAV','15689681K',82,41,183,'1 Company','shape',NULL,NULL),(38,'PRADEEP BABU','NK','15717264F',70,36,170,'1 Company','shape',NULL,NULL),(39,'ADARASH KUMAR SABU','Agniveer','A4200038M',63,22,170,'1 Company','shape',NULL,NULL),(40,'LAXMAN MUNDA','NK','15724953A',72,37,170,'1 Company','shape',NULL,NULL),(41,'SUNIL KUMAR','NK','15720596L',75,37,173,'1 Company','shape',NULL,NULL),(42,'RAVI','Agniveer','A4204797K',60,22,174,'1 Company','shape',NULL,NULL),(43,'RAM SINGH','HAV','15688598A',NULL,44,17,'1 Company','shape',NULL,NULL),(44,'RAJESH CHAURASIA','HAV','15716216K',72,38,177,'1 Company','shape',NULL,NULL),(45,'SUNIL KUMAR YADAV','NK','15709802K',64,38,172,'1 Company','shape',NULL,NULL),(47,'PREM MOHAN','HAV','15719951L',79,36,186,'1 Company','shape',NULL,NULL),(49,'JINCE L','HAV','15731820M',75,31,177,'1 Company','shape',NULL,NULL),(50,'JEBIN PAUL K','NK','15740143F',90,30,182,'1 Company','shape',NULL,NULL),(51,'MD SUJAN MIRZA','NK','15749660A',83,28,182,'1 Company','shape',NULL,NULL),(52,'MOHANRAJ T','NK','15753860N',76,30,180,'1 Company','shape',NULL,NULL),(53,'ASWIN M','Agniveer','A4201316F',65,24,172,'1 Company','shape',NULL,NULL),(55,'GAIKWAD RAHUL SUNIL','Agniveer','A4204643X',59,23,171,'1 Company','shape',NULL,NULL),(56,'VIVEK KUMAR SRIVASTAV','Agniveer','A4352497P',63,22,174,'1 Company','shape',NULL,NULL),(57,'ROSHAN KESHARWANI','Agniveer','A4203079F',65,24,170,'1 Company','shape',NULL,NULL),(58,'GIDIJALA VENNKATA RAMANA ','Agniveer','A4351064L',59,23,171,'1 Company','shape',NULL,NULL),(59,'EROTHU RAKESH','Agniveer','A4351041K',61,25,169,'1 Company','shape',NULL,NULL),(60,'SHAILENDRA SINGH','NK','1574165Y',74,31,178,'1 Company','shape',NULL,'AS PER MED BD'),(61,'PANDURANG B K','HAV','15692903Y',70,42,170,'1 Company','shape',NULL,NULL),(62,'AMIT RANJAN','HAV','15720931K',74,37,174,'1 Company','shape',NULL,NULL),(63,'T. RAMESH BABU','HAV','15681641N',76,43,174,'1 Company','shape',NULL,NULL),(67,'ADARSH S','HAV','15719460P',84,33,174,'1 Company','shape',NULL,NULL),(68,'DURGESH KHAROLE','L HAV','15722524A',85,34,174,'1 Company','shape',NULL,NULL),(69,'RAVI KANT','LOC NK','15724706M',81,36,176,'1 Company','shape',NULL,NULL),(70,'PRADEEP KUMAR NAHAK','Agniveer','A4203499F',68,22,182,'1 Company','shape',NULL,NULL),(71,'VIJAY PAL','Agniveer','A4204720F',63,22,168,'1 Company','shape',NULL,NULL),(73,'MANOHAR KUMAR','L HAV','15732973H',75,33,174,'1 Company','shape',NULL,NULL),(74,'AMBRESH','Agniveer','A4205053L',51,21,167,'1 Company','shape',NULL,NULL),(75,'SUDISH KUMAR','L NK','15748339K',64,30,172,'1 Company','shape',NULL,NULL),(76,'SUKHDEV','L NK','15736649H',85,30,172,'1 Company','shape',NULL,NULL),(77,'PADIGELA RAMESH','NK','15721376N',75,33,175,'1 Company','shape',NULL,NULL),(78,'UPPARA MADHU','Agniveer','A4204683Y',59,20,167,'1 Company','shape',NULL,NULL),(79,'ANIL CHALAWADI','Agniveer','A4204856L',57,22,168,'1 Company','shape',NULL,NULL),(80,'AMAN KUMAR','Agniveer','A4203556X',70,23,172,'1 Company','shape',NULL,NULL),(81,'HEMANTA DEY','Agniveer','A4205008Y',63,23,180,'1 Company','shape',NULL,NULL),(82,'PAWAR SANKET SANJAY','Agniveer','A4204930F',62,23,172,'1 Company','shape',NULL,NULL),(85,'ASHISH KUMAR GUPTA','Agniveer','A4205213A',65,20,172,'1 Company','shape',NULL,NULL),(86,'SAJAN','Agniveer','A4200365X',64,21,174,'1 Company','shape',NULL,NULL),(89,'SHUBHAM','Agniveer','A4205888A',58,20,174,'1 Company','shape',NULL,NULL),(90,'RAUT PANKAJ J','L NK','15749159N',76,29,170,'1 Company','shape',NULL,NULL),(91,'HARIBALA S','Agniveer','A4206051M',54,22,170,'1 Company','shape',NULL,NULL),(95,'SENTHIL KUMAR G','NK','15720341L',85,36,180,'1 Company','shape',NULL,NULL),(99,'MOHAN KUMAR YADAV','NK','15736949K',77,33,172,'1 Company','shape',NULL,NULL),(100,'DHANANJAY KUMAR YADAV','NK','15740970K',74,32,169,'1 Company','shape',NULL,NULL),(103,'UDAY KUMAR','Agniveer','A4203816X',68,22,170,'1 Company','shape',NULL,NULL),(107,'RAJPUT VIKAS','Agniveer','A4351981P',59,23,168,'1 Company','shape',NULL,NULL),(109,'ABHISHEK YADAV','Agniveer','A4207474M',52,22,163,'1 Company','shape',NULL,NULL),(110,'G SREENIVASULU','HAV','15715916L',74,35,180,'1 Company','shape',NULL,NULL),(111,'SATYENDRA SINGH','L NK','15742217K',82,29,173,'1 Company','shape',NULL,NULL),(112,'SUDHIR KUMAR','Signal Man','15756017Y',86,26,175,'1 Company','shape',NULL,NULL),(113,'RAHUL LAGAD D','Agniveer','A4205388H',56,21,168,'1 Company','shape',NULL,NULL),(114,'ABHISHEK KUMAR YADAV','Signal Man','15752536K',65.5,28,168,'1 Company','shape',NULL,NULL),(115,'SWAPANIR KUMAR','Signal Man','15706852K',71,39,173,'1 Company','shape',NULL,NULL),(116,'ANKIT SINGH TOMAR','Agniveer','A4204811L',67,22,173,'1 Company','shape',NULL,NULL),(117,'Majgaonkar Rushikesh Prakash','Agniveer','A4203007X',65,24,170,'1 Company','shape',NULL,NULL),(118,'BRAJESH TIWARI','NK','15740527W',69,34,172,'1 Company','shape',NULL,NULL),(119,'ARVIND GUPTA','NK','15740824K',73,31,170,'1 Company','shape',NULL,NULL),(120,'BRIJESH KUMAR TIWARI','NK','15731634W',66,31,171,'1 Company','shape',NULL,NULL),(121,'SHAHIL','Agniveer','A4353823Y',70,22,176,'1 Company','shape',NULL,NULL),(122,'BATTINI RANGASWAMY','NK','15734096Y',68,32,169,'1 Company','shape',NULL,NULL),(123,'PATIL AKASJ RAJARAM','Agniveer','A4354515L',60,23,176,'1 Company','shape',NULL,NULL),(124,'MANE PRAIWAL K','Agniveer','A4354369W',62,22,169,'1 Company','shape',NULL,NULL),(125,'ASHISH SINGH','Agniveer','A4350867L',67,21,176,'1 Company','shape',NULL,NULL),(126,'Hansram ','Naib Subedar','jc393919L',72,33,176,'1 Company','shape',NULL,NULL),(128,'JITENDRA SINGH','NK','15730189W',76,32,178,'1 Company','shape',NULL,NULL),(131,'GIRI AJINATH BABAN','L NK','15743230A',67,29,168,'1 Company','shape',NULL,NULL),(135,'SUNIL GODARA','Agniveer','A4203413X',62.5,21,179,'1 Company','shape',NULL,NULL),(136,'AMRENDRA SHUKLA ','L NK','15744564F',80,31,185,'HQ company','shape',NULL,NULL),(138,'GHANSHYAM MAHLA','HAV','15718811M',78,34,182,'1 Company','shape',NULL,NULL),(143,'CODERWW','Agniveer','12345EE',78,25,178,'1 Company','shape',NULL,NULL),(147,'PUSHPENDRA','HAV','15734024P',79,34,178,'1 Company','shape',NULL,NULL),(149,'S K GUPTA','NK','15716045H',73,39,170,'1 Company','shape',NULL,NULL);
+INSERT INTO `weight_info` (`troop_id`, `name`, `rank`, `army_number`, `actual_weight`, `age`, `height`, `company`, `status_type`, `category_type`, `restrictions`) VALUES (33,'SR PANDEY','HAV','15689681K',82,41,183,'1 Company','shape',NULL,NULL),(38,'PRADEEP BABU','NK','15717264F',70,36,170,'1 Company','shape',NULL,NULL),(39,'ADARASH KUMAR SABU','Agniveer','A4200038M',63,22,170,'1 Company','shape',NULL,NULL),(40,'LAXMAN MUNDA','NK','15724953A',72,37,170,'1 Company','shape',NULL,NULL),(41,'SUNIL KUMAR','NK','15720596L',75,37,173,'1 Company','shape',NULL,NULL),(42,'RAVI','Agniveer','A4204797K',60,22,174,'1 Company','shape',NULL,NULL),(43,'RAM SINGH','HAV','15688598A',NULL,44,17,'1 Company','shape',NULL,NULL),(44,'RAJESH CHAURASIA','HAV','15716216K',72,38,177,'1 Company','shape',NULL,NULL),(45,'SUNIL KUMAR YADAV','NK','15709802K',64,38,172,'1 Company','shape',NULL,NULL),(47,'PREM MOHAN','HAV','15719951L',79,36,186,'1 Company','shape',NULL,NULL),(49,'JINCE L','HAV','15731820M',75,31,177,'1 Company','shape',NULL,NULL),(50,'JEBIN PAUL K','NK','15740143F',90,30,182,'1 Company','shape',NULL,NULL),(51,'MD SUJAN MIRZA','NK','15749660A',83,28,182,'1 Company','shape',NULL,NULL),(52,'MOHANRAJ T','NK','15753860N',76,30,180,'1 Company','shape',NULL,NULL),(53,'ASWIN M','Agniveer','A4201316F',65,24,172,'1 Company','shape',NULL,NULL),(55,'GAIKWAD RAHUL SUNIL','Agniveer','A4204643X',59,23,171,'1 Company','shape',NULL,NULL),(56,'VIVEK KUMAR SRIVASTAV','Agniveer','A4352497P',63,22,174,'1 Company','shape',NULL,NULL),(57,'ROSHAN KESHARWANI','Agniveer','A4203079F',65,24,170,'1 Company','shape',NULL,NULL),(58,'GIDIJALA VENNKATA RAMANA ','Agniveer','A4351064L',59,23,171,'1 Company','shape',NULL,NULL),(59,'EROTHU RAKESH','Agniveer','A4351041K',61,25,169,'1 Company','shape',NULL,NULL),(60,'SHAILENDRA SINGH','NK','1574165Y',74,31,178,'1 Company','shape',NULL,'AS PER MED BD'),(61,'PANDURANG B K','HAV','15692903Y',70,42,170,'1 Company','shape',NULL,NULL),(62,'AMIT RANJAN','HAV','15720931K',74,37,174,'1 Company','shape',NULL,NULL),(63,'T. RAMESH BABU','HAV','15681641N',76,43,174,'1 Company','shape',NULL,NULL),(67,'ADARSH S','HAV','15719460P',84,33,174,'1 Company','shape',NULL,NULL),(68,'DURGESH KHAROLE','L HAV','15722524A',85,34,174,'1 Company','shape',NULL,NULL),(69,'RAVI KANT','LOC NK','15724706M',81,36,176,'1 Company','shape',NULL,NULL),(70,'PRADEEP KUMAR NAHAK','Agniveer','A4203499F',68,22,182,'1 Company','shape',NULL,NULL),(71,'VIJAY PAL','Agniveer','A4204720F',63,22,168,'1 Company','shape',NULL,NULL),(73,'MANOHAR KUMAR','L HAV','15732973H',75,33,174,'1 Company','shape',NULL,NULL),(74,'AMBRESH','Agniveer','A4205053L',51,21,167,'1 Company','shape',NULL,NULL),(75,'SUDISH KUMAR','L NK','15748339K',64,30,172,'1 Company','shape',NULL,NULL),(76,'SUKHDEV','L NK','15736649H',85,30,172,'1 Company','shape',NULL,NULL),(77,'PADIGELA RAMESH','NK','15721376N',75,33,175,'1 Company','shape',NULL,NULL),(78,'UPPARA MADHU','Agniveer','A4204683Y',59,20,167,'1 Company','shape',NULL,NULL),(79,'ANIL CHALAWADI','Agniveer','A4204856L',57,22,168,'1 Company','shape',NULL,NULL),(80,'AMAN KUMAR','Agniveer','A4203556X',70,23,172,'1 Company','shape',NULL,NULL),(81,'HEMANTA DEY','Agniveer','A4205008Y',63,23,180,'1 Company','shape',NULL,NULL),(82,'PAWAR SANKET SANJAY','Agniveer','A4204930F',62,23,172,'1 Company','shape',NULL,NULL),(85,'ASHISH KUMAR GUPTA','Agniveer','A4205213A',65,20,172,'1 Company','shape',NULL,NULL),(86,'SAJAN','Agniveer','A4200365X',64,21,174,'1 Company','shape',NULL,NULL),(89,'SHUBHAM','Agniveer','A4205888A',58,20,174,'1 Company','shape',NULL,NULL),(90,'RAUT PANKAJ J','L NK','15749159N',76,29,170,'1 Company','shape',NULL,NULL),(91,'HARIBALA S','Agniveer','A4206051M',54,22,170,'1 Company','shape',NULL,NULL),(95,'SENTHIL KUMAR G','NK','15720341L',85,36,180,'1 Company','shape',NULL,NULL),(99,'MOHAN KUMAR YADAV','NK','15736949K',77,33,172,'1 Company','shape',NULL,NULL),(100,'DHANANJAY KUMAR YADAV','NK','15740970K',74,32,169,'1 Company','shape',NULL,NULL),(103,'UDAY KUMAR','Agniveer','A4203816X',68,22,170,'1 Company','shape',NULL,NULL),(107,'RAJPUT VIKAS','Agniveer','A4351981P',59,23,168,'1 Company','shape',NULL,NULL),(109,'ABHISHEK YADAV','Agniveer','A4207474M',52,22,163,'1 Company','shape',NULL,NULL),(110,'G SREENIVASULU','HAV','15715916L',74,35,180,'1 Company','shape',NULL,NULL),(111,'SATYENDRA SINGH','L NK','15742217K',82,29,173,'1 Company','shape',NULL,NULL),(112,'SUDHIR KUMAR','Signal Man','15756017Y',86,26,175,'1 Company','shape',NULL,NULL),(113,'RAHUL LAGAD D','Agniveer','A4205388H',56,21,168,'1 Company','shape',NULL,NULL),(114,'ABHISHEK KUMAR YADAV','Signal Man','15752536K',65.5,28,168,'1 Company','shape',NULL,NULL),(115,'SWAPANIR KUMAR','Signal Man','15706852K',71,39,173,'1 Company','shape',NULL,NULL),(116,'ANKIT SINGH TOMAR','Agniveer','A4204811L',67,22,173,'1 Company','shape',NULL,NULL),(117,'Majgaonkar Rushikesh Prakash','Agniveer','A4203007X',65,24,170,'1 Company','shape',NULL,NULL),(118,'BRAJESH TIWARI','NK','15740527W',69,34,172,'1 Company','shape',NULL,NULL),(119,'ARVIND GUPTA','NK','15740824K',73,31,170,'1 Company','shape',NULL,NULL),(120,'BRIJESH KUMAR TIWARI','NK','15731634W',66,31,171,'1 Company','shape',NULL,NULL),(121,'SHAHIL','Agniveer','A4353823Y',70,22,176,'1 Company','shape',NULL,NULL),(122,'BATTINI RANGASWAMY','NK','15734096Y',68,32,169,'1 Company','shape',NULL,NULL),(123,'PATIL AKASJ RAJARAM','Agniveer','A4354515L',60,23,176,'1 Company','shape',NULL,NULL),(124,'MANE PRAIWAL K','Agniveer','A4354369W',62,22,169,'1 Company','shape',NULL,NULL),(125,'ASHISH SINGH','Agniveer','A4350867L',67,21,176,'1 Company','shape',NULL,NULL),(126,'Hansram ','Naib Subedar','jc393919L',72,33,176,'1 Company','shape',NULL,NULL),(128,'JITENDRA SINGH','NK','15730189W',76,32,178,'1 Company','shape',NULL,NULL),(131,'GIRI AJINATH BABAN','L NK','15743230A',67,29,168,'1 Company','shape',NULL,NULL),(135,'SUNIL GODARA','Agniveer','A4203413X',62.5,21,179,'1 Company','shape',NULL,NULL),(136,'AMRENDRA SHUKLA ','L NK','15744564F',80,31,185,'HQ company','shape',NULL,NULL),(138,'GHANSHYAM MAHLA','HAV','15718811M',78,34,182,'1 Company','shape',NULL,NULL),(143,'CODERWW','Agniveer','12345EE',78,25,178,'1 Company','shape',NULL,NULL),(147,'PUSHPENDRA','HAV','15734024P',79,34,178,'1 Company','shape',NULL,NULL),(149,'S K GUPTA','NK','15716045H',73,39,170,'1 Company','shape',NULL,NULL);
 /*!40000 ALTER TABLE `weight_info` ENABLE KEYS */;
 UNLOCK TABLES;
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
@@ -0,0 +1,164 @@
+"""
+Bounded scheduler in front of the LLM clients.
+
+A model call holds its request thread for seconds. Without a limit a
+burst of chatbot questions ties up every server thread and the rest of
+the HRMS app stalls behind it. Each scheduler runs at most
+`max_concurrent` calls; up to `max_queue` more wait for a slot and
+anything beyond that is rejected at once (LLMBusy). Every call has a
+deadline: waiting past it raises LLMTimeout, and the clients are given
+the same timeout for the call itself.
+
+Identical prompts already in flight are coalesced: later callers wait
+for the first call's result instead of asking the model again.
+
+Calls run in the caller's thread, so a streamed response can hold a slot
+(slot()) while it yields tokens.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LLM_MAX_CONCURRENT = int(os.environ.get("LLM_MAX_CONCURRENT", 2))
+LLM_MAX_QUEUE = int(os.environ.get("LLM_MAX_QUEUE", 8))
+LLM_TIMEOUT = float(os.environ.get("LLM_TIMEOUT", 60))  # seconds, queueing + generation
+
+
+class LLMBusy(Exception):
+    """The queue is full; the caller should answer 503 and let the user retry."""
+
+
+class LLMTimeout(Exception):
+    """The deadline passed before the model answered."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class LLMScheduler:
+    """Concurrency limit, bounded queue, deadlines and coalescing for one model client."""
+
+    def __init__(self, name, max_concurrent=LLM_MAX_CONCURRENT, max_queue=LLM_MAX_QUEUE, timeout=LLM_TIMEOUT):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._inflight = {}             # key -> _Call
+
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._coalesced = 0
+        self._max_waiting = 0
+        self._waits = 0
+        self._wait_ms_total = 0.0
+        self._wait_ms_max = 0.0
+
+    @contextmanager
+    def slot(self, timeout=None):
+        """Hold one of the max_concurrent slots, queueing until the deadline if all are busy."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        with self._cond:
+            if self._running >= self.max_concurrent:
+                if self._waiting >= self.max_queue:
+                    self._rejected += 1
+                    raise LLMBusy(f"{self.name}: {self._waiting} requests already queued")
+
+                started = time.monotonic()
+                self._waiting += 1
+                self._max_waiting = max(self._max_waiting, self._waiting)
+                try:
+                    while self._running >= self.max_concurrent:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._timeouts += 1
+                            raise LLMTimeout(f"{self.name}: no free slot within {timeout or self.timeout}s")
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+                    waited_ms = (time.monotonic() - started) * 1000
+                    self._waits += 1
+                    self._wait_ms_total += waited_ms
+                    self._wait_ms_max = max(self._wait_ms_max, waited_ms)
+            self._running += 1
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._completed += 1
+                self._cond.notify()
+
+    def run(self, key, fn, timeout=None):
+        """
+        Return fn() run inside a slot. Callers passing the same key while
+        a call is in flight get that call's result (or exception).
+        """
+        timeout = timeout or self.timeout
+        with self._cond:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._cond:
+                    self._timeouts += 1
+                raise LLMTimeout(f"{self.name}: shared call did not finish within {timeout}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self.slot(timeout):
+                call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._cond:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'timeout': self.timeout,
+                'running': self._running,
+                'queue_depth': self._waiting,
+                'max_queue_depth': self._max_waiting,
+                'in_flight_prompts': len(self._inflight),
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'timeouts': self._timeouts,
+                'coalesced': self._coalesced,
+                'queued_calls': self._waits,
+                'avg_wait_ms': round(self._wait_ms_total / self._waits, 3) if self._waits else 0,
+                'max_wait_ms': round(self._wait_ms_max, 3)
+            }
+
+
+# One per model backend: the local Ollama model (/bot) and the OpenAI
+# fallback in chatbot/routes.py
+ollama_scheduler = LLMScheduler('ollama')
+openai_scheduler = LLMScheduler('openai')
+
+
+def get_llm_scheduler_stats():
+    return {s.name: s.stats() for s in (ollama_scheduler, openai_scheduler)}
@@ -1,9 +1,15 @@
-from flask import Flask,redirect,request
+from flask import Flask,redirect,request,g
 import jwt
 JWT_SECRET = "MY_SUPER_SECRET_KEY_123"      # change this later
 JWT_ALGO = "HS256"
 def require_login():
-    """Check if user is logged in via JWT token"""
+    """Check if user is logged in via JWT token (decoded once per request)"""
+    if '_jwt_user' not in g:
+        g._jwt_user = _decode_login_token()
+    return g._jwt_user
+
+
+def _decode_login_token():
     token = request.cookies.get('token')
     
     if not token:
@@ -0,0 +1,187 @@
+"""
+Parade state grid.
+
+A parade state is 13 categories (OFFR, JCO, ... GRAND TOTAL) by 17
+columns (AUTH, H/S, POSTED/STR, ... DUES OUT), stored flat in
+parade_state_daily as `{category}_{column}`. ParadeStateGrid keeps it as
+one (13, 17) int array so the endpoints load, total and save it in one
+step instead of looping over 221 named cells.
+
+Only the ten input categories are entered by hand. T/OUT, PRESENT/STR DET
+and PRESENT/STR UNIT, and the TOTAL (I), TOTAL (II) and GRAND TOTAL rows
+are always recomputed by recalculate().
+"""
+import numpy as np
+
+PARADE_CATEGORIES = [
+    'offr', 'jco', 'jcoEre', 'or', 'orEre',
+    'firstTotal',
+    'oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr',
+    'secondTotal',
+    'grandTotal'
+]
+
+PARADE_COLUMNS = [
+    'auth', 'hs', 'posted_str', 'lve', 'course', 'det', 'mh',
+    'sick_lve', 'ex', 'td', 'att', 'awl_osl_jc', 'trout_det',
+    'present_det', 'present_unit', 'dues_in', 'dues_out'
+]
+
+FIRST_SECTION = ['offr', 'jco', 'jcoEre', 'or', 'orEre']
+SECOND_SECTION = ['oaOr', 'attSummary', 'attOffr', 'attJco', 'attOr']
+INPUT_CATEGORIES = FIRST_SECTION + SECOND_SECTION
+
+# Labels used by the CSV export
+PARADE_CATEGORY_LABELS = {
+    'offr': 'OFFR',
+    'jco': 'JCO',
+    'jcoEre': 'JCO (ERE)',
+    'or': 'OR',
+    'orEre': 'OR (ERE)',
+    'firstTotal': 'TOTAL (I)',
+    'oaOr': 'OA/OR',
+    'attSummary': 'SUPERNUMARARY',
+    'attOffr': 'ATT (OFFR)',
+    'attJco': 'ATT (JCO)',
+    'attOr': 'ATT (OR)',
+    'secondTotal': 'TOTAL (II)',
+    'grandTotal': 'GRAND TOTAL'
+}
+PARADE_CSV_HEADERS = ['Category', 'AUTH', 'H/S', 'POSTED/STR', 'LVE', 'COURSE', 'DET',
+                      'MH', 'SICK/LVE', 'EX', 'TD', 'ATT', 'AWL/OSL/JC', 'T/OUT',
+                      'PRES/DET', 'PRES/UNIT', 'DUES IN', 'DUES OUT']
+
+# parade_state_daily cell columns in grid order (row-major), so
+# grid.values.ravel() lines up with them
+PARADE_DB_COLUMNS = [f"{category}_{column}" for category in PARADE_CATEGORIES for column in PARADE_COLUMNS]
+
+GRID_SHAPE = (len(PARADE_CATEGORIES), len(PARADE_COLUMNS))
+GRID_DTYPE = np.int32
+
+CATEGORY_INDEX = {name: i for i, name in enumerate(PARADE_CATEGORIES)}
+COLUMN_INDEX = {name: i for i, name in enumerate(PARADE_COLUMNS)}
+
+_INPUT_ROWS = [CATEGORY_INDEX[c] for c in INPUT_CATEGORIES]
+_FIRST_ROWS = [CATEGORY_INDEX[c] for c in FIRST_SECTION]
+_SECOND_ROWS = [CATEGORY_INDEX[c] for c in SECOND_SECTION]
+
+# T/OUT = LVE + COURSE + DET + MH + SICK/LVE + EX + TD + ATT + AWL/OSL/JC
+_TOUT_PARTS = slice(COLUMN_INDEX['lve'], COLUMN_INDEX['awl_osl_jc'] + 1)
+
+
+class ParadeStateGrid:
+    """One parade state as a (category, column) int array."""
+
+    def __init__(self, values=None):
+        if values is None:
+            self.values = np.zeros(GRID_SHAPE, dtype=GRID_DTYPE)
+        else:
+            self.values = np.asarray(values).astype(GRID_DTYPE).reshape(GRID_SHAPE)
+
+    @staticmethod
+    def stack(rows):
+        """(n, 13, 17) array of parade_state_daily rows (dict cursor); NULL cells read as 0."""
+        flat = np.array([[row.get(c) or 0 for c in PARADE_DB_COLUMNS] for row in rows], dtype=GRID_DTYPE)
+        return flat.reshape((-1,) + GRID_SHAPE)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(cls.stack([row])[0])
+
+    @classmethod
+    def sum_rows(cls, rows):
+        """Aggregate any number of company/day rows with a single array sum."""
+        return cls(cls.stack(rows).sum(axis=0))
+
+    @classmethod
+    def from_input(cls, parade_data):
+        """
+        Grid from the form payload ({category: [up to 17 cells]}).
+        Missing categories and short rows are zero-filled; derived cells
+        and total rows are recomputed, whatever the client sent.
+        """
+        grid = cls()
+        for category in INPUT_CATEGORIES:
+            cells = [int(v or 0) for v in (parade_data.get(category) or [])[:len(PARADE_COLUMNS)]]
+            grid.values[CATEGORY_INDEX[category], :len(cells)] = cells
+        grid.recalculate()
+        return grid
+
+    def recalculate(self):
+        inputs = self.values[_INPUT_ROWS]
+        trout = np.maximum(inputs[:, _TOUT_PARTS].sum(axis=1), 0)
+        inputs[:, COLUMN_INDEX['trout_det']] = trout
+        inputs[:, COLUMN_INDEX['present_det']] = inputs[:, COLUMN_INDEX['det']]
+        inputs[:, COLUMN_INDEX['present_unit']] = np.maximum(inputs[:, COLUMN_INDEX['posted_str']] - trout, 0)
+        self.values[_INPUT_ROWS] = inputs
+
+        first = self.values[_FIRST_ROWS].sum(axis=0)
+        second = self.values[_SECOND_ROWS].sum(axis=0)
+        self.values[CATEGORY_INDEX['firstTotal']] = first
+        self.values[CATEGORY_INDEX['secondTotal']] = second
+        self.values[CATEGORY_INDEX['grandTotal']] = first + second
+        return self
+
+    def cell(self, category, column):
+        return int(self.values[CATEGORY_INDEX[category], COLUMN_INDEX[column]])
+
+    def total(self, categories, column):
+        """Sum of one column over several categories."""
+        return int(self.values[[CATEGORY_INDEX[c] for c in categories], COLUMN_INDEX[column]].sum())
+
+    def to_dict(self):
+        """Frontend format: {category: [17 ints]}."""
+        return dict(zip(PARADE_CATEGORIES, self.values.tolist()))
+
+    def db_values(self):
+        """Cell values in PARADE_DB_COLUMNS order."""
+        return self.values.ravel().tolist()
+
+    def csv_rows(self):
+        for category, cells in zip(PARADE_CATEGORIES, self.values.tolist()):
+            yield [PARADE_CATEGORY_LABELS[category]] + cells
+
+
+
+# One statement per company/day against unique_company_date (company, report_date).
+# executemany() sends a batch of these as a single multi-row INSERT.
+PARADE_UPSERT_SQL = f"""
+    INSERT INTO parade_state_daily (report_date, company, {', '.join(PARADE_DB_COLUMNS)})
+    VALUES (%s, %s, {', '.join(['%s'] * len(PARADE_DB_COLUMNS))})
+    ON DUPLICATE KEY UPDATE
+        {', '.join(f"{col} = VALUES({col})" for col in PARADE_DB_COLUMNS)},
+        updated_at = NOW()
+"""
+
+
+def upsert_parade_states(cursor, report_date, grids):
+    """Insert or replace the parade state of each {company: grid} for one date."""
+    cursor.executemany(PARADE_UPSERT_SQL, [
+        [report_date, company] + grid.db_values() for company, grid in grids.items()
+    ])
+
+# Columns charted by /api/parade-state/range (GRAND TOTAL row)
+SERIES_COLUMNS = ['present_unit', 'lve', 'trout_det']
+
+
+def daily_series(rows, columns=SERIES_COLUMNS, category='grandTotal'):
+    """
+    Per-day values of `columns` in one category for rows ordered by
+    report_date; rows of several companies on the same day are summed.
+    Returns (days, {column: [per-day values]}, {column: {'min', 'max', 'mean'}}).
+    """
+    if not rows:
+        return [], {c: [] for c in columns}, {c: None for c in columns}
+
+    cells = ParadeStateGrid.stack(rows)[:, CATEGORY_INDEX[category], [COLUMN_INDEX[c] for c in columns]]
+    dates = [row['report_date'] for row in rows]
+    starts = [0] + [i for i in range(1, len(dates)) if dates[i] != dates[i - 1]]
+    per_day = np.add.reduceat(cells.astype(np.int64), starts, axis=0)   # (days, columns)
+
+    mins, maxs, means = per_day.min(axis=0), per_day.max(axis=0), per_day.mean(axis=0)
+    series = dict(zip(columns, per_day.T.tolist()))
+    stats = {
+        column: {'min': int(mins[i]), 'max': int(maxs[i]), 'mean': round(float(means[i]), 2)}
+        for i, column in enumerate(columns)
+    }
+    return [dates[i] for i in starts], series, stats
@@ -0,0 +1,156 @@
+"""
+In-process response cache for the /api/dashboard/* widgets.
+
+Every widget aggregates the same rows for all users of a company, so
+responses are cached per (widget, company, role). Each entry remembers
+the version of the tables it was built from; write routes call
+bump_versions() and any entry built from an older version is a miss.
+Entries also expire after a TTL, and the cache is LRU-bounded.
+
+Table versions are shared by every VersionedCache, so one bump_versions()
+call also invalidates other caches built on the same tables (e.g. the
+weight_ms fitness snapshots).
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response
+
+from middleware import require_login
+
+CACHE_MAX_ENTRIES = 512
+CACHE_TTL = 60  # seconds
+
+
+class TableVersions:
+    """Per-table write counters; bumped by write routes, read by caches."""
+
+    def __init__(self):
+        self._versions = {}             # table -> int
+        self._lock = threading.Lock()
+
+    def get(self, tables):
+        with self._lock:
+            return tuple(self._versions.get(t, 0) for t in tables)
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._versions)
+
+
+table_versions = TableVersions()
+
+
+class VersionedCache:
+    """LRU + TTL cache whose entries are invalidated by per-table version counters."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, versions=table_versions):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (expires_at, versions, value)
+        self._versions = versions
+        self._stats = {}                # endpoint -> {'hits', 'misses'}
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def versions(self, tables):
+        return self._versions.get(tables)
+
+    def _record(self, endpoint, hit):
+        counters = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        counters['hits' if hit else 'misses'] += 1
+
+    def get(self, endpoint, key, tables):
+        current = self._versions.get(tables)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, versions, value = entry
+                if expires_at > time.monotonic() and versions == current:
+                    self._entries.move_to_end(key)
+                    self._record(endpoint, True)
+                    return value
+                del self._entries[key]
+            self._record(endpoint, False)
+            return None
+
+    def set(self, key, versions, value):
+        """Store value built from `versions` (taken before computing, so a racing write wins)."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            endpoints = {}
+            for endpoint, counters in self._stats.items():
+                total = counters['hits'] + counters['misses']
+                endpoints[endpoint] = dict(counters, hit_rate=round(counters['hits'] / total, 3) if total else 0)
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'evictions': self._evictions,
+                'table_versions': self._versions.snapshot(),
+                'endpoints': endpoints
+            }
+
+
+widget_cache = VersionedCache()
+
+
+def bump_versions(*tables):
+    """Call after a write so cached widgets built from these tables are recomputed."""
+    table_versions.bump(*tables)
+
+
+def get_cache_stats():
+    return widget_cache.stats()
+
+
+def cached_widget(*tables, per_user=False):
+    """
+    Cache a dashboard widget route for users of the same company and role.
+    per_user (bool, or callable taking the JWT user) adds the army number to
+    the key for widgets that depend on who is asking.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            user = require_login()
+            if not user:
+                return f(*args, **kwargs)
+
+            vary = per_user(user) if callable(per_user) else per_user
+            # Keyed by view, not request.path: /api/dashboard/batch calls
+            # several widgets inside one request
+            endpoint = f.__name__
+            key = (endpoint, user.get('company'), user.get('role'),
+                   user.get('army_number') if vary else None)
+
+            cached = widget_cache.get(endpoint, key, tables)
+            if cached is not None:
+                body, mimetype = cached
+                return current_app.response_class(body, status=200, mimetype=mimetype)
+
+            versions = widget_cache.versions(tables)
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                widget_cache.set(key, versions, (response.get_data(), response.mimetype))
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,231 @@
+"""
+Question -> SQL cache for the Ollama bot (/bot/chat).
+
+Generating SQL takes the LLM several seconds, and users ask the same
+questions over and over ("how many jco in 2 coy"). Entries are keyed by
+the normalized question plus the schema block the question was routed
+to, so editing a schema in schema.py retires its entries. Only SQL that
+passed the safety checks and ran successfully is stored; the query itself
+still runs on every request, so answers are always live.
+
+Questions that differ only in a company, rank, army number or date share
+a template: those mentions are replaced by slots ("how many {rank} in
+{company}"), the SQL is stored with %s placeholders where their values
+appeared, and a later question of the same shape runs it with its own
+values as query parameters. A value is only turned into a placeholder
+where the SQL compares it for equality with its own column
+(`rank` = 'HAV'). Group terms such as JCO or OR stand for several ranks,
+so they stay part of the shape ("how many {rank_group:JCO} in {company}")
+instead of becoming a slot.
+
+Both caches are LRU-bounded and written to disk on every new entry, so
+they survive restarts. Hits record the LLM time the original generation
+took as "saved" seconds.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+from chatbot.nlp_processor import find_entities
+
+SQL_CACHE_MAX_ENTRIES = 1000
+SQL_CACHE_PATH = os.environ.get(
+    "HRMS_SQL_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "ollama_sql_cache.json")
+)
+SQL_TEMPLATE_CACHE_PATH = os.environ.get(
+    "HRMS_SQL_TEMPLATE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "ollama_sql_templates.json")
+)
+
+# Single-quoted SQL string literal ('' and backslash escapes inside)
+_SQL_LITERAL = re.compile(r"'((?:[^'\\]|\\.|'')*)'")
+# "[alias.]column =" right before a literal; <=, >= and != do not match
+_EQUALS_COLUMN = re.compile(r"`?(\w+)`?\s*(?<![<>!])=\s*$")
+
+# Entity kinds that stay literal in the shape instead of becoming a slot
+UNSLOTTED_KINDS = {"rank_group"}
+
+# Bumped when templating rules change; entries in an older format are ignored
+TEMPLATE_FORMAT = 2
+
+
+def _slot_column_ok(kind, column):
+    """Whether a {kind} value may be a parameter compared against `column`."""
+    column = column.lower()
+    if kind == "date":
+        return "date" in column
+    return column == kind
+
+
+class QuestionSqlCache:
+    """LRU question -> SQL map persisted as JSON."""
+
+    def __init__(self, path=SQL_CACHE_PATH, max_entries=SQL_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> {'question', 'sql', 'llm_seconds', 'hits'}
+        self._hits = 0
+        self._misses = 0
+        self._seconds_saved = 0.0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def key(question, schema):
+        return hashlib.sha256((question + "\0" + (schema or "")).encode("utf-8")).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        # Saved oldest first, so the tail is the most recently used
+        for key, entry in entries[-self.max_entries:]:
+            self._entries[key] = entry
+
+    def _save(self):
+        """Write atomically so a crash never leaves a half-written file."""
+        directory = os.path.dirname(self.path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(list(self._entries.items()), f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print("❌ Could not save SQL cache:", e)
+
+    def get_entry(self, question, schema):
+        key = self.key(question, schema)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry['hits'] = entry.get('hits', 0) + 1
+            self._hits += 1
+            self._seconds_saved += entry.get('llm_seconds', 0)
+            return dict(entry)
+
+    def get(self, question, schema):
+        entry = self.get_entry(question, schema)
+        return entry['sql'] if entry else None
+
+    def set(self, question, schema, sql, llm_seconds, **fields):
+        key = self.key(question, schema)
+        with self._lock:
+            self._entries[key] = dict(
+                fields,
+                question=question,
+                sql=sql,
+                llm_seconds=round(llm_seconds, 3),
+                hits=0
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            self._save()
+
+    def delete(self, question, schema):
+        """Drop an entry whose SQL stopped working (e.g. a column was renamed)."""
+        with self._lock:
+            if self._entries.pop(self.key(question, schema), None) is not None:
+                self._save()
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / total, 3) if total else 0,
+                'llm_seconds_saved': round(self._seconds_saved, 3),
+                'evictions': self._evictions,
+                'path': self.path
+            }
+
+
+def question_shape(question):
+    """
+    Replace entity mentions with {kind} slots.
+    Returns (shape, entities) with entities as [(kind, value)], e.g.
+    ("how many {rank} in {company}", [("rank", "hav"), ("company", "2 Company")]).
+    Group terms stay in the shape under their canonical name.
+    """
+    parts, entities, pos = [], [], 0
+    for kind, start, end, value in find_entities(question):
+        parts.append(question[pos:start])
+        if kind in UNSLOTTED_KINDS:
+            parts.append("{" + kind + ":" + value.upper() + "}")
+        else:
+            parts.append("{" + kind + "}")
+            entities.append((kind, value))
+        pos = end
+    parts.append(question[pos:])
+    return "".join(parts), entities
+
+
+def build_sql_template(sql, entities):
+    """
+    Turn SQL generated for a question into (template, slots), or None.
+    Each string literal equal to one of the entity values (case-insensitive,
+    like the table collation) becomes a %s placeholder; slots[i] is the
+    index of the value that fills the i-th placeholder. Returns None unless
+    every value was found, and only in a plain `column = 'value'` test on
+    the value's own column, so a value the LLM rewrote, embedded in a
+    pattern or compared against something else never leaves a stale or
+    wrong literal behind.
+    """
+    lowered = [str(value).lower() for _, value in entities]
+    if not lowered or len(set(lowered)) != len(lowered):
+        return None
+
+    parts, slots, pos = [], [], 0
+    for m in _SQL_LITERAL.finditer(sql):
+        literal = m.group(1).lower()
+        if literal not in lowered:
+            continue
+        index = lowered.index(literal)
+        column = _EQUALS_COLUMN.search(sql, 0, m.start())
+        if not column or not _slot_column_ok(entities[index][0], column.group(1)):
+            return None
+        parts.append(sql[pos:m.start()])
+        parts.append("%s")
+        slots.append(index)
+        pos = m.end()
+    parts.append(sql[pos:])
+
+    # The driver substitutes every %s, including one inside a remaining literal
+    if set(slots) != set(range(len(entities))) or any("%s" in part for part in parts[::2]):
+        return None
+    return "".join(parts), slots
+
+
+def fill_sql_template(entry, entities):
+    """Query parameters for a template entry, or None if the values do not fit its slots."""
+    slots = entry.get('slots') or []
+    if entry.get('format') != TEMPLATE_FORMAT or not slots or max(slots) >= len(entities):
+        return None
+    return [entities[i][1] for i in slots]
+
+
+question_sql_cache = QuestionSqlCache()
+sql_template_cache = QuestionSqlCache(path=SQL_TEMPLATE_CACHE_PATH)
+
+
+def get_sql_cache_stats():
+    return {
+        'questions': question_sql_cache.stats(),
+        'templates': sql_template_cache.stats()
+    }
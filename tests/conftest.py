@@ -0,0 +1,7 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The blueprints import each other through imports.py, which must load first
+import imports  # noqa: E402,F401
@@ -0,0 +1,48 @@
+"""Long-poll wake-ups and the waiter cap in blueprints.chat.MessageEvents."""
+import threading
+import time
+
+from blueprints.chat import MessageEvents
+
+
+def test_wait_returns_at_once_when_counter_already_moved():
+    events = MessageEvents(max_waiters=1)
+    seen = events.version(7)
+    events.notify(7)
+    assert events.wait(7, seen, timeout=5) is True
+
+
+def test_wait_wakes_on_notify():
+    events = MessageEvents(max_waiters=1)
+    seen = events.version(7)
+    threading.Timer(0.05, events.notify, args=(7,)).start()
+    started = time.monotonic()
+    assert events.wait(7, seen, timeout=5) is True
+    assert time.monotonic() - started < 1
+
+
+def test_wait_times_out():
+    events = MessageEvents(max_waiters=1)
+    assert events.wait(7, events.version(7), timeout=0.05) is False
+    assert events.waiters() == 0
+
+
+def test_waiters_beyond_the_cap_are_turned_away():
+    events = MessageEvents(max_waiters=2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(events.wait(user, 0, timeout=5)))
+               for user in (1, 2)]
+    for thread in threads:
+        thread.start()
+    while events.waiters() < 2:
+        time.sleep(0.01)
+
+    started = time.monotonic()
+    assert events.wait(3, 0, timeout=5) is None
+    assert time.monotonic() - started < 1
+
+    events.notify(1, 2)
+    for thread in threads:
+        thread.join()
+    assert results == [True, True]
+    assert events.waiters() == 0
@@ -0,0 +1,117 @@
+"""Parallel /bot/chat requests with a slow stub model and a fake database."""
+import threading
+import time
+
+import pytest
+
+import db_config
+from blueprints import ollama
+from llm_scheduler import LLMScheduler
+from sql_cache import QuestionSqlCache
+
+CLIENTS = 4
+LLM_DELAY = 0.5     # seconds per model call
+
+QUESTIONS = [
+    "how many agniveer in 1 company",
+    "how many agniveer in 2 company",
+    "how many hav in 3 company",
+    "list nb sub in hq company",
+]
+
+
+class FakeCursor:
+    def execute(self, sql, params=None):
+        self.sql = sql
+
+    def fetchall(self):
+        return [{'count': 3}]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class SlowLLM:
+    """Sleeps like a model call and records how many calls overlapped."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+
+    def invoke(self, prompt):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(LLM_DELAY)
+            return "SELECT COUNT(*) AS count FROM personnel"
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+@pytest.fixture
+def chat_app(monkeypatch, tmp_path):
+    from app import app
+
+    llm = SlowLLM()
+    pool = db_config.ConnectionPool(db_config.DB_CONFIG, pool_size=CLIENTS, max_overflow=0,
+                                    ping_on_checkout=False)
+    monkeypatch.setattr(db_config.mysql.connector, 'connect', lambda **kwargs: FakeConnection())
+    monkeypatch.setattr(db_config, 'db_pool', pool)
+    monkeypatch.setattr(ollama, 'get_llm', lambda: llm)
+    monkeypatch.setattr(ollama, 'ollama_scheduler', LLMScheduler('test', max_concurrent=CLIENTS))
+    # Nothing written to instance/, and no answer served from an earlier run
+    monkeypatch.setattr(ollama, 'question_sql_cache', QuestionSqlCache(path=str(tmp_path / 'questions.json')))
+    monkeypatch.setattr(ollama, 'sql_template_cache', QuestionSqlCache(path=str(tmp_path / 'templates.json')))
+    return app, llm, pool
+
+
+def test_parallel_chat_requests_do_not_serialize(chat_app):
+    app, llm, pool = chat_app
+    responses = [None] * CLIENTS
+
+    def ask(i):
+        responses[i] = app.test_client().post('/bot/chat', json={'message': QUESTIONS[i]})
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(CLIENTS)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    assert [r.status_code for r in responses] == [200] * CLIENTS
+    assert all(r.get_json()['answer'] for r in responses)
+    assert llm.calls == CLIENTS
+    assert llm.max_running > 1
+    # One after another would take CLIENTS * LLM_DELAY
+    assert elapsed < CLIENTS * LLM_DELAY / 2
+
+    stats = pool.stats()
+    assert stats['checkouts'] == CLIENTS
+    assert stats['in_use'] == 0
+    assert stats['timeouts'] == 0
@@ -0,0 +1,98 @@
+"""assess_weights() against the original per-row compute_authorization logic."""
+import random
+from decimal import Decimal
+
+import pytest
+
+from blueprints.weight_ms import (
+    ASSESSMENT_FIELDS, IdealWeightGrid, assess_weights, assessment_check_rows,
+    check_weight_assessment, reference_assessment, round_to_nearest_even
+)
+
+# A slice of ideal_weights as the dictionary cursor returns it (latest.sql),
+# plus a malformed band and one overlapping an earlier band, which must lose
+BANDS = {
+    156: [('18-22', '49.00'), ('23-27', '51.00'), ('28-32', '52.50'), ('33-37', '53.50'),
+          ('38-42', '54.00'), ('43-47', '54.50'), ('48-70', '55.00')],
+    158: [('18-22', '50.00'), ('23-27', '52.00'), ('28-32', '54.00'), ('33-37', '55.00'),
+          ('38-42', '55.50'), ('43-47', '56.00'), ('48-70', '56.50')],
+    160: [('18-22', '51.00'), ('23-27', '53.00'), ('28-32', '55.00'), ('33-37', '56.00'),
+          ('38-42', '56.50'), ('43-47', '57.00'), ('48-70', '57.50')],
+    170: [('18-22', '57.00'), ('23-27', 'x'), ('28-32', '61.00'), ('abc', '70.00'),
+          ('30-40', '99.00'), ('48-70', '64.00')],
+}
+
+IDEAL_WEIGHTS = [
+    {'height_cm': height, 'age_range': age_range, 'ideal_weight_kg': Decimal(weight)}
+    for height, bands in BANDS.items()
+    for age_range, weight in bands
+    if weight != 'x'
+]
+
+
+def random_rows(count, seed=7):
+    """weight_info rows: height and actual_weight are FLOAT columns, age INT."""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        rows.append({
+            'height': rng.choice([None, rng.uniform(150, 176), rng.randint(150, 176)]),
+            'age': rng.choice([None, rng.randint(15, 75)]),
+            'actual_weight': rng.choice([None, round(rng.uniform(35, 95), 1), rng.randint(35, 95)]),
+        })
+    return rows
+
+
+def expected_assessment(row):
+    try:
+        return reference_assessment(row, IDEAL_WEIGHTS)
+    except TypeError:
+        return None
+
+
+@pytest.mark.parametrize('rows', [
+    assessment_check_rows(IDEAL_WEIGHTS),
+    random_rows(5000),
+], ids=['grid', 'random'])
+def test_assess_weights_matches_per_row_logic(rows):
+    grid = IdealWeightGrid(IDEAL_WEIGHTS)
+    got = assess_weights(rows, None, grid=grid)
+    assert len(got) == len(rows)
+
+    compared = 0
+    for row, result in zip(rows, got):
+        expected = expected_assessment(row)
+        if expected is None:
+            # The per-row version crashed on NULL height / weight
+            assert result['status'] == "No ideal weight found"
+            continue
+        assert {f: result[f] for f in ASSESSMENT_FIELDS} == expected, row
+        for field in ASSESSMENT_FIELDS:
+            assert type(result[field]) is type(expected[field]), (row, field)
+        compared += 1
+    assert compared
+
+
+def test_statuses_are_all_covered():
+    rows = assessment_check_rows(IDEAL_WEIGHTS)
+    statuses = {a['status'] for a in assess_weights(rows, None, grid=IdealWeightGrid(IDEAL_WEIGHTS))}
+    assert statuses == {"Fit", "UnFit", "No ideal weight found"}
+
+
+def test_check_weight_assessment_reports_no_mismatches():
+    rows = assessment_check_rows(IDEAL_WEIGHTS) + random_rows(1000, seed=11)
+    assert check_weight_assessment(IDEAL_WEIGHTS, rows) == []
+
+
+def test_first_matching_band_wins():
+    grid = IdealWeightGrid(IDEAL_WEIGHTS)
+    assert grid.lookup(31, 170) == 61.0
+    assert grid.lookup(35, 170) == 99.0
+    assert grid.lookup(25, 170) is None
+
+
+def test_height_rounds_to_nearest_even():
+    for height in (155, 156.4, 157, 157.5, 159, 160.6):
+        row = {'height': height, 'age': 30, 'actual_weight': 54.0}
+        [result] = assess_weights([row], None, grid=IdealWeightGrid(IDEAL_WEIGHTS))
+        assert result['height_cm'] == round_to_nearest_even(height)